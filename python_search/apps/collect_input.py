@@ -1,5 +1,4 @@
 import sys
-import fire
 
 from python_search.apps.clipboard import Clipboard
 from python_search.declarative_ui.declarative_ui import DeclarativeUI
@@ -40,6 +39,8 @@ class CollectInput:
 
 
 def main():
+    import fire
+
     fire.Fire(CollectInput().launch)
 
 
@@ -25,6 +25,7 @@ class PythonSearchConfiguration(EntriesGroup):
     _rerank_via_model_enabled = None
     entry_generation = False
     privacy_sensitive_terms = None
+    semantic_search_backend = "chroma"
 
     def __init__(
         self,
@@ -40,6 +41,7 @@ class PythonSearchConfiguration(EntriesGroup):
         collect_data: bool = False,
         entry_generation=False,
         privacy_sensitive_terms: Optional[List[str]] = None,
+        semantic_search_backend: Literal["chroma", "numpy"] = "chroma",
     ):
         """
 
@@ -57,6 +59,8 @@ class PythonSearchConfiguration(EntriesGroup):
         :param use_webservice: if True, the ranking will be generated via a webservice
         :param collect_data: if True, we will collect data about the entries
             you run in your machine
+        :param semantic_search_backend: "chroma" or "numpy" for the built-in memory mapped
+            vector index that needs no database
         """
         if entries:
             self.commands = entries
@@ -82,6 +86,7 @@ class PythonSearchConfiguration(EntriesGroup):
         self.collect_data = collect_data
         self.entry_generation = entry_generation
         self.privacy_sensitive_terms = privacy_sensitive_terms
+        self.semantic_search_backend = semantic_search_backend
 
     def get_text_editor(self):
         return self._default_text_editor
@@ -97,6 +102,9 @@ class PythonSearchConfiguration(EntriesGroup):
 
         return self._rerank_via_model_enabled
 
+    def get_semantic_search_backend(self) -> str:
+        return getattr(self, "semantic_search_backend", "chroma")
+
     def get_python_installation_path(self):
         return "/Users/jean.machado/miniconda3/envs/python312/bin"
 
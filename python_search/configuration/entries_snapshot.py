@@ -0,0 +1,314 @@
+"""
+Compiled snapshot of the entries, so they can be read without importing entries_main.
+
+Importing the entries project runs arbitrary user code, which is most of the startup time
+of every process that needs the entries. The snapshot is compiled whenever the project is
+imported and is used until a python file of the project changes.
+
+Layout of the file, all integers little endian:
+
+    header        magic, version, number of entries and the offsets of the sections below
+    metadata      json with the stat of the project files and the configuration flags
+    records       utf-8 key, type, content, json tags and json value of every entry
+    offset table  per entry the start of its record and the length of each field
+    key table     open addressing hash table of the lowercased keys to entry positions
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+SNAPSHOT_LOCATION = "/tmp/python_search_entries.snapshot"
+
+
+class EntriesSnapshot:
+    MAGIC = b"PSES"
+    VERSION = 2
+    # magic, version, entries, metadata offset and length, offset table offset, key table offset and size
+    HEADER = struct.Struct("<4sHIQIQQI")
+    # record start and the lengths of the key, type, content, tags and value fields
+    OFFSET = struct.Struct("<Q5I")
+    SLOT = struct.Struct("<I")
+    # configuration attributes needed to run an entry or search without the configuration
+    CONFIGURATION_FLAGS = ("collect_data", "use_webservice", "semantic_search_backend")
+    # fields of a record
+    KEY, TYPE, CONTENT, TAGS, VALUE = range(5)
+
+    def __init__(self, data, location: Optional[str] = None):
+        """
+        :param data: the bytes of the file, usually a memoryview of its memory map
+        """
+        self._data = data
+        self.location = location
+        (
+            magic,
+            version,
+            self._size,
+            metadata_offset,
+            metadata_length,
+            self._offsets_offset,
+            self._key_table_offset,
+            self._key_table_size,
+        ) = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"Not a version {self.VERSION} entries snapshot")
+
+        self.metadata = json.loads(bytes(data[metadata_offset : metadata_offset + metadata_length]))
+
+    @staticmethod
+    def open(location: Optional[str] = None) -> Optional["EntriesSnapshot"]:
+        """
+        Memory maps the snapshot at the location, None if there is none or it cannot be read.
+        Nothing is parsed until an entry is accessed and only the pages read get loaded.
+        """
+        import mmap
+
+        location = location if location else SNAPSHOT_LOCATION
+        try:
+            with open(location, "rb") as f:
+                # the mapping outlives the file descriptor and a newer snapshot replacing the file
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return EntriesSnapshot(memoryview(data), location)
+        except (FileNotFoundError, ValueError, struct.error):
+            return None
+
+    @staticmethod
+    def open_fresh(location: Optional[str] = None, project_root: Optional[str] = None) -> Optional["EntriesSnapshot"]:
+        """
+        The snapshot if no file of the entries project changed since it was compiled
+        """
+        snapshot = EntriesSnapshot.open(location)
+        if snapshot is None or snapshot.is_stale(project_root):
+            return None
+
+        return snapshot
+
+    @staticmethod
+    def compile(configuration=None, location: Optional[str] = None) -> "EntriesSnapshot":
+        """
+        Imports the entries project if no configuration is given and writes its snapshot
+        """
+        from python_search.configuration.loader import ConfigurationLoader
+
+        loader = ConfigurationLoader()
+        project_root = loader.get_entries_project_root()
+        # taken before importing so a file changed meanwhile makes the snapshot stale
+        files = EntriesSnapshot.file_signatures(project_root)
+        if configuration is None:
+            configuration = loader.load_config()
+
+        return EntriesSnapshot.write(configuration, files, project_root, location)
+
+    @staticmethod
+    def write(
+        configuration, files: Dict[str, list], project_root: str, location: Optional[str] = None
+    ) -> "EntriesSnapshot":
+        from python_search.core_entities import Entry
+
+        location = location if location else SNAPSHOT_LOCATION
+        metadata = json.dumps(
+            {
+                "project_root": project_root,
+                "files": files,
+                "configuration": {
+                    flag: getattr(configuration, flag, None) for flag in EntriesSnapshot.CONFIGURATION_FLAGS
+                },
+            }
+        ).encode()
+
+        records = bytearray()
+        offsets = bytearray()
+        keys = []
+        for key, value in configuration.commands.items():
+            entry = Entry(key, value)
+            tags = value.get("tags", []) if isinstance(value, dict) else []
+            try:
+                raw_value = json.dumps(value)
+            except (TypeError, ValueError):
+                # callables and other python objects are only available by importing the project
+                raw_value = ""
+
+            fields = [
+                key.encode(),
+                entry.get_type_str().encode(),
+                entry.get_content_str().encode(),
+                json.dumps(tags, default=str).encode(),
+                raw_value.encode(),
+            ]
+            offsets += EntriesSnapshot.OFFSET.pack(
+                EntriesSnapshot.HEADER.size + len(metadata) + len(records), *[len(field) for field in fields]
+            )
+            records += b"".join(fields)
+            keys.append(key)
+
+        key_table_size = 1
+        while key_table_size < 2 * len(keys):
+            key_table_size *= 2
+        key_table = [0] * key_table_size
+        for position, key in enumerate(keys):
+            # keys differing only by case share the probe sequence in the order they were defined
+            slot = EntriesSnapshot._hash(key) & (key_table_size - 1)
+            while key_table[slot]:
+                slot = (slot + 1) & (key_table_size - 1)
+            key_table[slot] = position + 1
+
+        offsets_offset = EntriesSnapshot.HEADER.size + len(metadata) + len(records)
+        header = EntriesSnapshot.HEADER.pack(
+            EntriesSnapshot.MAGIC,
+            EntriesSnapshot.VERSION,
+            len(keys),
+            EntriesSnapshot.HEADER.size,
+            len(metadata),
+            offsets_offset,
+            offsets_offset + len(offsets),
+            key_table_size,
+        )
+        data = header + metadata + bytes(records) + bytes(offsets) + struct.pack(f"<{key_table_size}I", *key_table)
+
+        tmp_location = f"{location}.{os.getpid()}.tmp"
+        with open(tmp_location, "wb") as f:
+            f.write(data)
+        os.replace(tmp_location, location)
+
+        return EntriesSnapshot(data, location)
+
+    @staticmethod
+    def file_signatures(project_root: str) -> Dict[str, list]:
+        from python_search.entry_change import EntryChangeDetector
+
+        signatures = {}
+        for path in EntryChangeDetector.project_files(project_root):
+            stat = os.stat(path)
+            signatures[path] = [stat.st_mtime_ns, stat.st_size]
+
+        return signatures
+
+    def is_stale(self, project_root: Optional[str] = None) -> bool:
+        if project_root is None:
+            from python_search.configuration.loader import ConfigurationLoader
+
+            project_root = ConfigurationLoader().get_entries_project_root()
+
+        if project_root != self.metadata["project_root"]:
+            return True
+
+        try:
+            return self.file_signatures(project_root) != self.metadata["files"]
+        except FileNotFoundError:
+            return True
+
+    def __len__(self) -> int:
+        return self._size
+
+    def keys(self) -> Iterator[str]:
+        for key, _, _ in self.rows():
+            yield key
+
+    def rows(self) -> Iterator[Tuple[str, str, str]]:
+        """
+        Key, type and content of every entry in order, decoded in a single pass over the offset table
+        """
+        data = self._data
+        table = data[self._offsets_offset : self._offsets_offset + self._size * self.OFFSET.size]
+        for start, key_length, type_length, content_length, _, _ in self.OFFSET.iter_unpack(table):
+            type_start = start + key_length
+            content_start = type_start + type_length
+            yield (
+                str(data[start:type_start], "utf-8"),
+                str(data[type_start:content_start], "utf-8"),
+                str(data[content_start : content_start + content_length], "utf-8"),
+            )
+
+    def position_of(self, key: str, case_sensitive: bool = False) -> Optional[int]:
+        """
+        Position of the entry with the key. By default keys are compared case insensitively like
+        EntriesGroup.get_command, the first entry defined wins when several keys only differ by case.
+        """
+        if not self._key_table_size:
+            return None
+
+        lower_key = key.lower()
+        slot = self._hash(key) & (self._key_table_size - 1)
+        while True:
+            (position,) = self.SLOT.unpack_from(self._data, self._key_table_offset + slot * self.SLOT.size)
+            if not position:
+                return None
+            found = self.field(position - 1, self.KEY)
+            if found == key or (not case_sensitive and found.lower() == lower_key):
+                return position - 1
+            slot = (slot + 1) & (self._key_table_size - 1)
+
+    def get_serialized(self, key: str) -> Optional[dict]:
+        """
+        The entry in the {type: content} format of EntriesLoader.serialize_entries
+        """
+        position = self.position_of(key)
+        if position is None:
+            return None
+
+        return {self.field(position, self.TYPE): self.field(position, self.CONTENT)}
+
+    def get_value(self, key: str) -> Optional[dict]:
+        """
+        The value of the entry as written in the entries project, None if it only exists there
+        """
+        position = self.position_of(key)
+        if position is None:
+            return None
+
+        raw_value = self.field(position, self.VALUE)
+        return json.loads(raw_value) if raw_value else None
+
+    def get_tags(self, key: str) -> List[str]:
+        position = self.position_of(key)
+        return json.loads(self.field(position, self.TAGS)) if position is not None else []
+
+    def serialized_entries(self) -> dict:
+        return {key: {type: content} for key, type, content in self.rows()}
+
+    def configuration_flag(self, flag: str):
+        return self.metadata["configuration"].get(flag)
+
+    def field(self, position: int, field: int) -> str:
+        """
+        Decodes a single field of the entry at the position straight from the mapped file
+        """
+        start, *lengths = self.OFFSET.unpack_from(self._data, self._offsets_offset + position * self.OFFSET.size)
+        start += sum(lengths[:field])
+
+        return str(self._data[start : start + lengths[field]], "utf-8")
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return zlib.crc32(key.lower().encode())
+
+
+class SnapshotConfiguration:
+    """
+    The part of PythonSearchConfiguration needed to run an entry, served from a snapshot
+    """
+
+    def __init__(self, snapshot: EntriesSnapshot):
+        self._snapshot = snapshot
+        for flag in EntriesSnapshot.CONFIGURATION_FLAGS:
+            setattr(self, flag, snapshot.configuration_flag(flag))
+
+    def get_command(self, given_key):
+        value = self._snapshot.get_value(given_key)
+        if value is None:
+            raise Exception(f"Value not found for key: {given_key}")
+
+        return value
+
+    def get_keys(self):
+        return list(self._snapshot.keys())
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(EntriesSnapshot)
@@ -1,7 +1,11 @@
+from __future__ import annotations
+
 import logging
 import os
+from typing import TYPE_CHECKING
 
-from python_search.configuration.configuration import PythonSearchConfiguration
+if TYPE_CHECKING:
+    from python_search.configuration.configuration import PythonSearchConfiguration
 
 
 class ConfigurationLoader:
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import inspect
+import logging
+from typing import Dict, List
 
 
 class EntriesGroup:
@@ -15,6 +17,8 @@ class EntriesGroup:
         """
         aggregates a list of classes or instances
         """
+        # copied once so neither the class attribute nor a dict given by the user gets modified
+        commands = dict(self.commands)
         for class_i in commands_classes:
             is_class = inspect.isclass(class_i)
             instance = class_i() if is_class else class_i
@@ -24,16 +28,53 @@ class EntriesGroup:
             else:
                 cmd_items = instance.commands
 
-            self.commands = {**self.commands, **cmd_items}
+            commands.update(cmd_items)
+
+        self.commands = commands
+        collisions = self._build_key_index()
+        if collisions:
+            logging.warning(
+                "Keys only differing by case, the first one is used when looking them up: "
+                + "; ".join(", ".join(keys) for keys in collisions)
+            )
 
     def get_command(self, given_key):
         """Returns command value based on the key name, must match 11"""
-        given_key = given_key.lower()
-        for key, value in self.commands.items():
-            if key.lower() == given_key:
-                return value
+        index = self.__dict__.get("_key_index")
+        if index is None or index[0] is not self.commands or index[1] != len(self.commands):
+            self._build_key_index()
+
+        key = self._key_index[2].get(given_key.lower())
+        if (key is not None and key not in self.commands) or (key is None and given_key in self.commands):
+            # commands changed in place keeping their size, an unknown key alone never rebuilds the index
+            self._build_key_index()
+            key = self._key_index[2].get(given_key.lower())
+
+        if key is None:
+            raise Exception(f"Value not found for key: {given_key}")
 
-        raise Exception(f"Value not found for key: {given_key}")
+        return self.commands[key]
+
+    def get_key_collisions(self) -> List[List[str]]:
+        """
+        Groups of keys that only differ by case, get_command returns the first of each group
+        """
+        return self._build_key_index()
+
+    def _build_key_index(self) -> List[List[str]]:
+        keys_by_lower_key: Dict[str, str] = {}
+        collisions: Dict[str, List[str]] = {}
+        for key in self.commands:
+            lower_key = key.lower()
+            if lower_key in keys_by_lower_key:
+                collisions.setdefault(lower_key, [keys_by_lower_key[lower_key]]).append(key)
+                continue
+            keys_by_lower_key[lower_key] = key
+
+        # the dict indexed and its size tell if the index is still valid
+        self._key_index = (self.commands, len(self.commands), keys_by_lower_key)
+
+        return list(collisions.values())
 
     def get_keys(self):
         keys = []
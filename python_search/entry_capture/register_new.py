@@ -1,12 +1,5 @@
 from __future__ import annotations
 
-from python_search.configuration.loader import ConfigurationLoader
-from python_search.entry_capture.filesystem_entry_inserter import (
-    FilesystemEntryInserter,
-)
-
-from python_search.interpreter.base import BaseInterpreter
-from python_search.interpreter.interpreter_matcher import InterpreterMatcher
 from python_search.error.exception import notify_exception
 
 
@@ -16,6 +9,11 @@ class RegisterNew:
     """
 
     def __init__(self, configuration=None):
+        from python_search.configuration.loader import ConfigurationLoader
+        from python_search.entry_capture.filesystem_entry_inserter import (
+            FilesystemEntryInserter,
+        )
+
         if not configuration:
             configuration = ConfigurationLoader().load_config()
 
@@ -64,6 +62,9 @@ class RegisterNew:
             raise Exception("Key is required")
 
         if not type:
+            from python_search.interpreter.base import BaseInterpreter
+            from python_search.interpreter.interpreter_matcher import InterpreterMatcher
+
             interpreter: BaseInterpreter = InterpreterMatcher.build_instance(
                 self.configuration
             ).get_interpreter(value)
@@ -98,6 +99,10 @@ class RegisterNew:
         return key.replace("\n", " ").replace(":", " ").strip()
 
 
+def launch_ui():
+    RegisterNew().launch_ui()
+
+
 def main():
     import fire
 
@@ -1,44 +1,172 @@
-from python_search.host_system.system_paths import SystemPaths
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+
+class EntryChanges(NamedTuple):
+    """Keys that changed since the last detection"""
+
+    added: List[str]
+    updated: List[str]
+    removed: List[str]
+
+    def keys(self) -> List[str]:
+        return self.added + self.updated + self.removed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
 
 
 class EntryChangeDetector:
-    HASH_FILE = "/tmp/entries_md5"
+    """
+    Detects changes of the entries without spawning a new python search process.
+
+    The python files of the entries project are compared by mtime and size first and only
+    hashed when those differ, so an unchanged project is detected with a few stat calls.
+    The entries themselves are hashed one by one in process, which tells which keys changed.
+    """
+
+    STATE_FILE = "/tmp/entries_change_state.json"
+    IGNORED_FOLDERS = {"__pycache__", "node_modules", "venv", "site-packages"}
+
+    def __init__(self, state_file: Optional[str] = None, project_root: Optional[str] = None):
+        self._state_file = state_file if state_file else self.STATE_FILE
+        self._project_root = project_root
+        self._state = self._load_state()
 
     def has_changed(self) -> bool:
-        result = self.current_entries_md5() != self.previous_entries_md5()
+        return bool(self.detect())
 
-        if result:
-            self.save_current_entries_md5()
-        return result
+    def detect(self, commands: Optional[dict] = None, save: bool = True) -> EntryChanges:
+        """
+        Keys added, updated or removed since the last detection.
 
-    def previous_entries_md5(self) -> str:
-        try:
-            with open(self.HASH_FILE, "r") as file:
-                return file.read()
-        except FileNotFoundError:
-            return ""
+        :param commands: the already loaded entries, if not given they are loaded only when
+            a file of the entries project changed
+        """
+        changed_files = self.changed_files()
+        if commands is None:
+            if not changed_files and "entries" in self._state:
+                return EntryChanges([], [], [])
+
+            from python_search.configuration.loader import ConfigurationLoader
+
+            commands = ConfigurationLoader().load_entries()
+
+        previous = self._state.get("entries", {})
+        current = {key: self.entry_md5(value) for key, value in commands.items()}
+
+        changes = EntryChanges(
+            added=[key for key in current if key not in previous],
+            updated=[key for key in current if key in previous and previous[key] != current[key]],
+            removed=[key for key in previous if key not in current],
+        )
+
+        self._state["entries"] = current
+        if save:
+            self._save_state()
+
+        return changes
+
+    def changed_files(self, update: bool = True) -> List[str]:
+        """
+        Python files of the entries project created, modified or deleted since the last detection
+
+        :param update: records the current files as detected, without it the next call reports them again
+        """
+        previous: Dict[str, list] = self._state.get("files", {})
+        current: Dict[str, list] = {}
+        changed = []
+
+        for path in self._project_files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
 
-    def save_current_entries_md5(self) -> None:
-        with open(self.HASH_FILE, "w") as file:
-            file.write(self.current_entries_md5())
+            signature = previous.get(path)
+            if signature and signature[0] == stat.st_mtime_ns and signature[1] == stat.st_size:
+                current[path] = signature
+                continue
 
-    def current_entries_md5(self) -> str:
+            # touched files are only reported if the content changed
+            content_md5 = self._file_md5(path)
+            current[path] = [stat.st_mtime_ns, stat.st_size, content_md5]
+            if not signature or signature[2] != content_md5:
+                changed.append(path)
+
+        changed += [path for path in previous if path not in current]
+        if update:
+            self._state["files"] = current
+
+        return changed
+
+    def current_entries_md5(self, commands: Optional[dict] = None) -> str:
+        """
+        A single hash of all entries
+        """
         import hashlib
 
-        result = ""
+        if commands is None:
+            from python_search.configuration.loader import ConfigurationLoader
 
-        try:
-            import subprocess
+            commands = ConfigurationLoader().load_entries()
+
+        result = hashlib.md5()
+        for key, value in commands.items():
+            result.update(f"{key}\0{self.entry_md5(value)}\0".encode())
+
+        return result.hexdigest()
+
+    @staticmethod
+    def entry_md5(value) -> str:
+        import hashlib
+
+        return hashlib.md5(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
 
-            output = subprocess.getoutput(
-                "pys _entries_loader load_entries_as_json"
-            )
-            result = hashlib.md5(output.encode())
-            result = result.hexdigest()
-        except Exception:
-            pass
+    def _project_files(self) -> List[str]:
+        if self._project_root is None:
+            from python_search.configuration.loader import ConfigurationLoader
+
+            self._project_root = ConfigurationLoader().get_entries_project_root()
+
+        return self.project_files(self._project_root)
+
+    @staticmethod
+    def project_files(project_root: str) -> List[str]:
+        """
+        The python files of the entries project, the ones importing entries_main can run
+        """
+        files = []
+        for folder, subfolders, names in os.walk(project_root):
+            subfolders[:] = [
+                name
+                for name in subfolders
+                if not name.startswith(".") and name not in EntryChangeDetector.IGNORED_FOLDERS
+            ]
+            files += [os.path.join(folder, name) for name in names if name.endswith(".py")]
+
+        return sorted(files)
+
+    @staticmethod
+    def _file_md5(path: str) -> str:
+        import hashlib
+
+        with open(path, "rb") as file:
+            return hashlib.md5(file.read()).hexdigest()
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self._state_file, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return {}
 
-        return result
+    def _save_state(self) -> None:
+        tmp_file = f"{self._state_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as file:
+            json.dump(self._state, file)
+        os.replace(tmp_file, self._state_file)
 
 
 if __name__ == "__main__":
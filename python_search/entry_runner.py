@@ -1,13 +1,13 @@
 from __future__ import annotations
 import re
 import os
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
-from python_search.configuration.loader import ConfigurationLoader
 from python_search.core_entities import Key
 from python_search.interpreter.interpreter_matcher import InterpreterMatcher
 from python_search.logger import setup_run_key_logger
+from python_search.tracing import get_tracer
 from python_search.error.exception import notify_exception
 from python_search.search.search_ui.serialized_entry import (
     decode_serialized_data_from_entry_text,
@@ -21,13 +21,13 @@ class EntryRunner:
     """
 
     def __init__(self, configuration=None):
-        if not configuration:
-            configuration = ConfigurationLoader().load_config()
+        # loaded on the first run as the key decides if the snapshot is enough
         self._configuration = configuration
         self._logger = setup_run_key_logger()
         self._earliest_execution = datetime.now()
 
     @notify_exception()
+    @get_tracer().traced("entry_runner.run")
     def run(
         self,
         entry_text: str,
@@ -67,15 +67,20 @@ class EntryRunner:
             CmdInterpreter({"cli_cmd": query_used}).interpret_default()
             return
 
-        result = InterpreterMatcher.build_instance(self._configuration).default(
-            input_str
-        )
+        configuration = self._get_configuration(key)
+        result = InterpreterMatcher.build_instance(configuration).default(input_str)
 
         self._logger.info("Passed interpreter")
-        from python_search.events.run_performed.entity import EntryExecuted
-        from python_search.events.run_performed.writer import LogRunPerformedClient
+        if not getattr(configuration, "collect_data", False):
+            # the events stack and pydantic are only imported when the run gets logged
+            return result
+
+        from python_search.events.event_sink import get_event_sink
 
-        run_performed = EntryExecuted(
+        # written in the background, the process exits once it is written
+        get_event_sink().submit(
+            self.log_run,
+            configuration,
             key=key,
             query_input=query_used,
             shortcut=from_shortcut,
@@ -84,10 +89,66 @@ class EntryRunner:
             earliest_time=self._earliest_execution.isoformat(),
             after_execution_time=datetime.now().isoformat(),
         )
-        LogRunPerformedClient(self._configuration).send(run_performed)
 
         return result
 
+    @staticmethod
+    def log_run(configuration, **run_performed):
+        """
+        Sends the run performed event, the events stack is imported in the thread running it
+        """
+        from python_search.events.run_performed.entity import EntryExecuted
+        from python_search.events.run_performed.writer import LogRunPerformedClient
+
+        LogRunPerformedClient(configuration).send(EntryExecuted(**run_performed))
+
+    def _get_configuration(self, key: str):
+        """
+        Entries stored in a fresh snapshot run without importing the entries project
+        """
+        if self._configuration:
+            return self._configuration
+
+        from python_search.configuration.entries_snapshot import (
+            EntriesSnapshot,
+            SnapshotConfiguration,
+        )
+
+        snapshot = EntriesSnapshot.open_fresh()
+        if snapshot is None:
+            snapshot = self._snapshot_from_daemon()
+        if snapshot and snapshot.get_value(key) is not None:
+            self._configuration = SnapshotConfiguration(snapshot)
+            return self._configuration
+
+        from python_search.configuration.loader import ConfigurationLoader
+
+        self._configuration = ConfigurationLoader().load_config()
+
+        return self._configuration
+
+    def _snapshot_from_daemon(self):
+        """
+        Lets a running search daemon import the changed entries project, it compiles a fresh snapshot
+        while doing so and is much faster at it than a new interpreter
+        """
+        from python_search.configuration.entries_snapshot import EntriesSnapshot
+        from python_search.search.search_ui.search_daemon import SearchDaemonClient
+
+        daemon = SearchDaemonClient.connect()
+        if not daemon:
+            return None
+
+        try:
+            daemon.reload(if_changed=True)
+        except Exception as e:
+            self._logger.warning(f"Search daemon could not reload the entries: {e}")
+            return None
+        finally:
+            daemon.close()
+
+        return EntriesSnapshot.open_fresh()
+
     def _matching_keys(self, key: str) -> List[str]:
         """
         give a key it will give suggestions that matches
@@ -97,7 +158,7 @@ class EntryRunner:
         key_regex = re.compile(key)
 
         matching_keys = []
-        for registered_key in self._configuration.get_keys():
+        for registered_key in self._get_configuration(key).get_keys():
             encoded_registered_key = generate_identifier(registered_key)
             matches_kv_encoded = key_regex.search(encoded_registered_key)
             if matches_kv_encoded:
@@ -116,10 +177,58 @@ def generate_identifier(string):
     return result
 
 
+def parse_run_arguments(arguments: List[str]) -> Optional[dict]:
+    """
+    Parses the command lines shortcuts and the search ui use to run a key, like
+    'run_key "my key" --from_shortcut=True'. Returns None for anything else so fire handles it.
+    """
+    options = {"query_used": str, "from_shortcut": bool, "wrap_in_terminal": bool}
+    result = {}
+    i = 0
+    while i < len(arguments):
+        argument = arguments[i]
+        if not argument.startswith("--"):
+            if "entry_text" in result:
+                return None
+            result["entry_text"] = argument
+            i += 1
+            continue
+
+        name, has_value, value = argument[2:].partition("=")
+        if name not in options:
+            return None
+        if not has_value:
+            if options[name] is bool:
+                value = "True"
+            elif i + 1 < len(arguments):
+                i += 1
+                value = arguments[i]
+            else:
+                return None
+
+        if options[name] is bool:
+            if value not in ("True", "False"):
+                return None
+            result[name] = value == "True"
+        else:
+            result[name] = value
+        i += 1
+
+    return result if "entry_text" in result else None
+
+
 def main():
     """
     Entry point to run a key
     """
+    import sys
+
+    # fire alone takes longer to import than running most entries
+    arguments = parse_run_arguments(sys.argv[1:])
+    if arguments is not None:
+        EntryRunner().run(**arguments)
+        return
+
     import fire
 
     fire.Fire(EntryRunner().run)
@@ -1,15 +1,19 @@
 import json
 import os
+from typing import Iterator
 
+from python_search.events.event_log import EventLog
 from python_search.logger import setup_data_writter_logger
 
 
 class GenericDataCollector:
     """
-    A generic data writer component that works tightly integrated with spark
+    A generic data writer component that works tightly integrated with spark.
+    The events of every table are appended to an EventLog in the folder of the table.
     """
 
     BASE_DATA_DESTINATION_DIR = os.environ["HOME"] + "/.python_search/data/"
+    _loggers = {}
 
     def __init__(self, *, base_location=None):
         self.base_location = (
@@ -25,24 +29,53 @@ class GenericDataCollector:
         return fire.Fire(GenericDataCollector())
 
     def write(self, *, data: dict, table_name: str, date=None):
-        self.logger = setup_data_writter_logger(table_name)
-        from datetime import datetime
-
-        datetime.now().timestamp()
-
-        os.system(f"mkdir -p {self.base_location}/{table_name}")
-        import datetime
-
-        file_name = f"{self.data_location(table_name)}/{datetime.datetime.now(datetime.timezone.utc).timestamp()}.json"
-
-        with open(file_name, "w") as f:
-            f.write(json.dumps(data))
-
-        self.logger.info(f"File {file_name} written successfully with data {data}")
+        """
+        Appends the event to the log of the table
+        """
+        self.event_log(table_name).append(data)
+        self._logger(table_name).info(f"Event written to {table_name} with data {data}")
+
+    def read(self, table_name) -> Iterator[dict]:
+        """
+        All the events of the table, oldest first, including the ones written one file per event
+        """
+        event_log = self.event_log(table_name)
+        for path in event_log.legacy_files():
+            try:
+                with open(path, "r") as f:
+                    yield json.load(f)
+            except ValueError:
+                continue
+
+        yield from event_log.read()
+
+    def read_reverse(self, table_name) -> Iterator[dict]:
+        """
+        All the events of the table, latest first
+        """
+        event_log = self.event_log(table_name)
+        yield from event_log.read_reverse()
+
+        for path in reversed(event_log.legacy_files()):
+            try:
+                with open(path, "r") as f:
+                    yield json.load(f)
+            except ValueError:
+                continue
+
+    def event_log(self, table_name) -> EventLog:
+        return EventLog(self.data_location(table_name))
 
     def data_location(self, table_name) -> str:
         return f"{self.base_location}/{table_name}"
 
+    @staticmethod
+    def _logger(table_name):
+        if table_name not in GenericDataCollector._loggers:
+            GenericDataCollector._loggers[table_name] = setup_data_writter_logger(table_name)
+
+        return GenericDataCollector._loggers[table_name]
+
     def dataframe(self, table_name):
         from pyspark.sql import DataFrame
         from pyspark.sql.session import SparkSession
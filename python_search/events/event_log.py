@@ -0,0 +1,218 @@
+"""
+Append only log of the events of a table, split in segments of newline delimited json.
+
+Writing an event is a single append to the active segment, a new segment is started once it
+reaches the segment size. Reading is a sequential scan of the segments in order, or backwards
+from the end for the latest events. The segments are plain json lines so spark.read.json on the
+folder of the table keeps working, together with the one file per event written before the log.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+
+class Position(NamedTuple):
+    """Where a reader stopped, the segment number and the byte offset in it"""
+
+    segment: int
+    offset: int
+
+
+class EventLog:
+    SEGMENT_PREFIX = "segment-"
+    SEGMENT_SUFFIX = ".jsonl"
+    SEGMENT_SIZE = 8 * 1024 * 1024
+    # fsync policies: never leaves it to the os, rotate syncs a segment once it is full, always syncs every event
+    FSYNC_NEVER, FSYNC_ROTATE, FSYNC_ALWAYS = "never", "rotate", "always"
+    READ_BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, location: str, segment_size: Optional[int] = None, fsync: Optional[str] = None):
+        self.location = location
+        self.segment_size = segment_size if segment_size else self.SEGMENT_SIZE
+        self.fsync = fsync if fsync else self.FSYNC_ROTATE
+        if self.fsync not in (self.FSYNC_NEVER, self.FSYNC_ROTATE, self.FSYNC_ALWAYS):
+            raise ValueError(f"Unknown fsync policy {self.fsync}")
+        self._active_segment: Optional[int] = None
+
+    def append(self, event: dict) -> Position:
+        """
+        Appends the event with a single write and returns the position after it.
+        Several processes can append at once, O_APPEND keeps every event on its own line.
+        """
+        line = (json.dumps(event, default=str) + "\n").encode()
+        segment = self._segment_for_append(len(line))
+
+        fd = os.open(self._segment_path(segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            if self.fsync == self.FSYNC_ALWAYS:
+                os.fsync(fd)
+            offset = os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            os.close(fd)
+
+        return Position(segment, offset)
+
+    def read(self, start: Optional[Position] = None) -> Iterator[dict]:
+        for _, event in self.read_with_positions(start):
+            yield event
+
+    def read_with_positions(self, start: Optional[Position] = None) -> Iterator[Tuple[Position, dict]]:
+        """
+        The events in the order they were written, each with the position right after it,
+        from the start position if given so a reader can resume where it stopped
+        """
+        for segment in self.segments():
+            if start is not None and segment < start.segment:
+                continue
+
+            offset = start.offset if start is not None and segment == start.segment else 0
+            with open(self._segment_path(segment), "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # an event still being written or cut by a crash, read again from here next time
+                        break
+                    offset += len(line)
+                    event = self._decode(line)
+                    if event is not None:
+                        yield Position(segment, offset), event
+
+    def read_reverse(self) -> Iterator[dict]:
+        """
+        The events from the latest to the oldest, reading the segments backwards block by block
+        """
+        for segment in reversed(self.segments()):
+            for line in self._lines_reversed(self._segment_path(segment)):
+                event = self._decode(line)
+                if event is not None:
+                    yield event
+
+    def end(self) -> Position:
+        """
+        The position after the last event written
+        """
+        segments = self.segments()
+        if not segments:
+            return Position(0, 0)
+
+        return Position(segments[-1], os.path.getsize(self._segment_path(segments[-1])))
+
+    def remove_segments_before(self, position: Position) -> None:
+        """
+        Removes the segments a reader at the position is done with
+        """
+        for segment in self.segments():
+            if segment < position.segment:
+                os.remove(self._segment_path(segment))
+
+    def segments(self) -> List[int]:
+        try:
+            names = os.listdir(self.location)
+        except FileNotFoundError:
+            return []
+
+        return sorted(
+            int(name[len(self.SEGMENT_PREFIX) : -len(self.SEGMENT_SUFFIX)])
+            for name in names
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX)
+        )
+
+    def legacy_files(self) -> List[str]:
+        """
+        The one json file per event files written before the log, oldest first
+        """
+        try:
+            names = os.listdir(self.location)
+        except FileNotFoundError:
+            return []
+
+        names = sorted((name for name in names if name.endswith(".json")), key=self.legacy_timestamp)
+
+        return [os.path.join(self.location, name) for name in names]
+
+    @staticmethod
+    def legacy_timestamp(path: str) -> float:
+        """
+        The unix timestamp a legacy file is named after
+        """
+        try:
+            return float(os.path.basename(path)[: -len(".json")])
+        except ValueError:
+            return 0.0
+
+    def import_legacy_files(self, remove: bool = False) -> int:
+        """
+        Appends the events of the legacy files to the log, which should only be done before new events are
+        written to it as they are appended after them
+        """
+        imported = 0
+        for path in self.legacy_files():
+            try:
+                with open(path, "r") as f:
+                    event = json.load(f)
+            except ValueError:
+                continue
+
+            self.append(event)
+            imported += 1
+            if remove:
+                os.remove(path)
+
+        return imported
+
+    def _segment_for_append(self, size: int) -> int:
+        if self._active_segment is None:
+            os.makedirs(self.location, exist_ok=True)
+        if self._active_segment is None or os.path.exists(self._segment_path(self._active_segment + 1)):
+            # first append or another process rotated since, events always go to the last segment
+            segments = self.segments()
+            self._active_segment = segments[-1] if segments else 1
+
+        try:
+            current_size = os.path.getsize(self._segment_path(self._active_segment))
+        except FileNotFoundError:
+            current_size = 0
+
+        if current_size and current_size + size > self.segment_size:
+            if self.fsync == self.FSYNC_ROTATE:
+                fd = os.open(self._segment_path(self._active_segment), os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            # another process may have rotated already, then both append to the same new segment
+            self._active_segment = max(self._active_segment + 1, self.segments()[-1])
+
+        return self._active_segment
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.location, f"{self.SEGMENT_PREFIX}{segment:08d}{self.SEGMENT_SUFFIX}")
+
+    def _lines_reversed(self, path: str) -> Iterator[bytes]:
+        with open(path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            remainder = b""
+            while end > 0:
+                start = max(0, end - self.READ_BLOCK_SIZE)
+                f.seek(start)
+                lines = (f.read(end - start) + remainder).split(b"\n")
+                end = start
+                # the first line may continue in the previous block
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line:
+                        yield line
+            if remainder:
+                yield remainder
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[dict]:
+        try:
+            return json.loads(line)
+        except ValueError:
+            # a line cut by a crash
+            return None
@@ -0,0 +1,172 @@
+"""
+Writes events from a background thread so logging never delays running an entry.
+
+Writes are queued in a bounded in process queue and a daemon thread runs them in batches.
+When the queue is full the policy decides between dropping the new write, dropping the oldest
+queued one or blocking the caller until there is room. What is still queued is written when the
+process exits, within a timeout.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+
+class EventSink:
+    MAX_QUEUE_SIZE = 1000
+    # writes taken from the queue at once
+    BATCH_SIZE = 100
+    # how long the exit waits for the queued writes
+    FLUSH_TIMEOUT_SECONDS = 5.0
+    DROP_NEWEST, DROP_OLDEST, BLOCK = "drop_newest", "drop_oldest", "block"
+
+    def __init__(
+        self,
+        max_queue_size: Optional[int] = None,
+        policy: Optional[str] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.max_queue_size = max_queue_size if max_queue_size else self.MAX_QUEUE_SIZE
+        self.policy = policy if policy else self.DROP_NEWEST
+        if self.policy not in (self.DROP_NEWEST, self.DROP_OLDEST, self.BLOCK):
+            raise ValueError(f"Unknown policy {self.policy}")
+        self.batch_size = batch_size if batch_size else self.BATCH_SIZE
+
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+
+        self._queue: deque = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        # writes taken from the queue and not finished yet
+        self._in_flight = 0
+        self._logger = None
+
+    def submit(self, write: Callable, *args, **kwargs) -> bool:
+        """
+        Queues the call of write with the arguments, False if it was dropped
+        """
+        with self._condition:
+            if self._closing:
+                self.dropped += 1
+                return False
+
+            if len(self._queue) >= self.max_queue_size:
+                if self.policy == self.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self.policy == self.DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    self._condition.wait_for(lambda: len(self._queue) < self.max_queue_size or self._closing)
+                    if self._closing:
+                        self.dropped += 1
+                        return False
+
+            self._queue.append((write, args, kwargs))
+            self.submitted += 1
+            if self._thread is None:
+                self._start()
+            self._condition.notify_all()
+
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until everything submitted was written, False if the timeout passed first
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending() == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Writes what is queued and stops the writer thread
+        """
+        timeout = timeout if timeout is not None else self.FLUSH_TIMEOUT_SECONDS
+        flushed = self.flush(timeout)
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            import atexit
+
+            atexit.unregister(self.close)
+            self._thread.join(timeout)
+        if self.dropped or self.failed:
+            self._get_logger().warning(f"Event sink closed with {self.stats()}")
+
+        return flushed
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "submitted": self.submitted,
+                "written": self.written,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "queued": len(self._queue),
+            }
+
+    def _pending(self) -> int:
+        return len(self._queue) + self._in_flight
+
+    def _start(self) -> None:
+        import atexit
+
+        self._thread = threading.Thread(target=self._write_loop, name="event-sink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._closing)
+                if not self._queue:
+                    return
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._in_flight = len(batch)
+                # wakes the writers blocked on a full queue
+                self._condition.notify_all()
+
+            written = failed = 0
+            for write, args, kwargs in batch:
+                try:
+                    write(*args, **kwargs)
+                    written += 1
+                except Exception as e:
+                    failed += 1
+                    self._get_logger().error(f"Writing event failed: {e}")
+
+            with self._condition:
+                self.written += written
+                self.failed += failed
+                self._in_flight = 0
+                self._condition.notify_all()
+
+    def _get_logger(self):
+        if self._logger is None:
+            from python_search.logger import setup_data_writter_logger
+
+            self._logger = setup_data_writter_logger("event_sink")
+
+        return self._logger
+
+
+_event_sink: Optional[EventSink] = None
+
+
+def get_event_sink() -> EventSink:
+    """
+    The event sink of the process
+    """
+    global _event_sink
+    if _event_sink is None:
+        _event_sink = EventSink()
+
+    return _event_sink
@@ -7,6 +7,14 @@ class EventsEtl:
     """
 
     def clean_events_performed(self):
+        from python_search.events.run_performed.compaction import RunPerformedCompaction
+
+        RunPerformedCompaction().compact()
+
+    def clean_events_performed_spark(self):
+        """
+        Rewrites the whole clean dataset with spark
+        """
         RunPerformedCleaning().clean()
 
 
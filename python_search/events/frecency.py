@@ -0,0 +1,321 @@
+"""
+Usage score of every key decaying exponentially with time, so the entries used often and lately rank first.
+
+The scores are kept relative to a reference timestamp: a run at t adds 2 ** ((t - reference) / half life)
+to its key. All scores decay at the same rate, so a run only touches its own key and comparing scores
+does not depend on the current time. When runs get too far from the reference it is moved forward.
+
+Layout of the file, all integers little endian:
+
+    header  magic, version, reference timestamp, number of keys, generation and size of the scores
+    scores  per key its score, the key length and the utf-8 key
+    runs    per run the score it adds to its key, the key length and the utf-8 key
+
+A run is appended to the file, so adding one costs the same whatever the size of the table. Once the
+runs take more space than the scores the file is compacted: the runs are summed into the scores and
+the file is replaced under a new generation. Writers hold an exclusive flock on a lock file next to it.
+Readers load it once into a dict and on refresh only read the runs appended since, unless the
+generation changed.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+FRECENCY_LOCATION = os.environ["HOME"] + "/.python_search/data/frecency.table"
+
+
+class FrecencyTable:
+    MAGIC = b"PSFR"
+    VERSION = 2
+    # magic, version, reference timestamp, number of keys, generation and size of the header and the scores
+    HEADER = struct.Struct("<4sHdIQQ")
+    # score and key length, followed by the key
+    ENTRY = struct.Struct("<dH")
+    HALF_LIFE_SECONDS = 14 * 24 * 3600
+    # a run this many half lives after the reference moves the reference to it, far from overflowing floats
+    REBASE_HALF_LIVES = 256
+    # longer keys are not tracked
+    KEY_SIZE = 256
+    # the runs appended are compacted once they take more than this and more than the scores
+    COMPACT_MIN_BYTES = 64 * 1024
+
+    def __init__(self, location: Optional[str] = None):
+        self.location = location if location else FRECENCY_LOCATION
+        self.reference = 0.0
+        self._scores: Dict[str, float] = {}
+        self._highest = 0.0
+        self._ranked: Optional[List[str]] = None
+        self._modified = None
+        self._generation = None
+        # bytes of the file already read
+        self._offset = 0
+
+    @staticmethod
+    def load(location: Optional[str] = None) -> "FrecencyTable":
+        """
+        The table at the location, empty if there is none yet
+        """
+        table = FrecencyTable(location)
+        table.refresh()
+        return table
+
+    def refresh(self) -> bool:
+        """
+        Reloads the table if the file changed since it was loaded, True if it did
+        """
+        try:
+            stat = os.stat(self.location)
+            modified = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            modified = None
+        if modified == self._modified:
+            return False
+
+        self._modified = modified
+        self._read()
+        return True
+
+    def score(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Decayed score of the key at now, each run counting 1 when it happens
+        """
+        now = now if now is not None else time.time()
+        return self._scores.get(key, 0.0) * 2 ** ((self.reference - now) / self.HALF_LIFE_SECONDS)
+
+    def relative_score(self, key: str) -> float:
+        """
+        Score of the key relative to the highest one, in [0, 1]
+        """
+        return self._scores.get(key, 0.0) / self._highest if self._highest else 0.0
+
+    def boost(self) -> Callable[[str], float]:
+        """
+        Boost for RankFusion, follows the table when it is refreshed
+        """
+        return self.relative_score
+
+    def top(self, size: int) -> List[str]:
+        """
+        The size keys with the highest scores, the highest first
+        """
+        if self._ranked is None:
+            self._ranked = sorted(self._scores, key=lambda key: -self._scores[key])
+
+        return self._ranked[:size]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._scores
+
+    @staticmethod
+    def exists(location: Optional[str] = None) -> bool:
+        return os.path.exists(location if location else FRECENCY_LOCATION)
+
+    @staticmethod
+    def add(key: str, timestamp: Optional[float] = None, location: Optional[str] = None) -> bool:
+        """
+        Adds a run of the key to the table on disk by appending it.
+        False if the file is corrupt or of another version, it is then left to be rebuilt from the events.
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        encoded_key = key.encode() if key else b""
+        if not encoded_key or len(encoded_key) > FrecencyTable.KEY_SIZE:
+            return True
+
+        table = FrecencyTable(location)
+        with table._lock():
+            try:
+                with open(table.location, "rb") as f:
+                    header = table._unpack_header(f.read(table.HEADER.size))
+            except FileNotFoundError:
+                table._add(key, timestamp)
+                table._write()
+                return True
+            if header is None:
+                return False
+
+            reference, _, _, scores_size = header
+            if (timestamp - reference) / table.HALF_LIFE_SECONDS > table.REBASE_HALF_LIVES:
+                # the scores are rewritten relative to the new reference
+                table._read()
+                table._add(key, timestamp)
+                table._write()
+                return True
+
+            score = 2 ** ((timestamp - reference) / table.HALF_LIFE_SECONDS)
+            fd = os.open(table.location, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, table.ENTRY.pack(score, len(encoded_key)) + encoded_key)
+                size = os.lseek(fd, 0, os.SEEK_CUR)
+            finally:
+                os.close(fd)
+
+            runs_size = size - scores_size
+            if runs_size > table.COMPACT_MIN_BYTES and runs_size > scores_size:
+                table._read()
+                table._write()
+
+        return True
+
+    @staticmethod
+    def rebuild(events: Iterable[dict], location: Optional[str] = None) -> "FrecencyTable":
+        """
+        Replaces the table with the scores of the run events
+        """
+        table = FrecencyTable(location)
+        with table._lock():
+            for event in events:
+                key = event.get("key")
+                timestamp = FrecencyTable._timestamp(event)
+                if key and timestamp is not None:
+                    table._add(key, timestamp)
+            table._write()
+
+        return table
+
+    def _add(self, key: str, timestamp: float) -> None:
+        if not key or len(key.encode()) > self.KEY_SIZE:
+            return
+        if not self._scores:
+            self.reference = timestamp
+        elif (timestamp - self.reference) / self.HALF_LIFE_SECONDS > self.REBASE_HALF_LIVES:
+            self._rebase(timestamp)
+
+        self._add_score(key, 2 ** ((timestamp - self.reference) / self.HALF_LIFE_SECONDS))
+
+    def _add_score(self, key: str, score: float) -> None:
+        score += self._scores.get(key, 0.0)
+        self._scores[key] = score
+        self._highest = max(self._highest, score)
+        self._ranked = None
+
+    def _rebase(self, reference: float) -> None:
+        factor = 2 ** ((self.reference - reference) / self.HALF_LIFE_SECONDS)
+        self._scores = {key: score * factor for key, score in self._scores.items()}
+        self._highest *= factor
+        self.reference = reference
+
+    def _read(self) -> None:
+        """
+        Reads the runs appended since the last read, or the whole file if it was replaced since
+        """
+        try:
+            with open(self.location, "rb") as f:
+                header = self._unpack_header(f.read(self.HEADER.size))
+                if header is not None and header[2] == self._generation:
+                    f.seek(self._offset)
+                    self._offset += self._read_runs(f.read())
+                    return
+                f.seek(0)
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+            header = None
+
+        self.reference = 0.0
+        self._scores = {}
+        self._highest = 0.0
+        self._ranked = None
+        self._generation = None
+        self._offset = 0
+        if header is None:
+            return
+
+        reference, count, generation, _ = header
+        scores = {}
+        offset = self.HEADER.size
+        try:
+            for _ in range(count):
+                score, length = self.ENTRY.unpack_from(data, offset)
+                offset += self.ENTRY.size
+                scores[data[offset : offset + length].decode()] = score
+                offset += length
+        except (struct.error, UnicodeDecodeError):
+            return
+
+        self.reference = reference
+        self._scores = scores
+        self._highest = max(scores.values()) if scores else 0.0
+        self._generation = generation
+        self._offset = offset + self._read_runs(data[offset:])
+
+    def _read_runs(self, data: bytes) -> int:
+        """
+        Adds the appended runs to the scores and returns the bytes read, a run still being written is left
+        """
+        offset = 0
+        while offset + self.ENTRY.size <= len(data):
+            score, length = self.ENTRY.unpack_from(data, offset)
+            end = offset + self.ENTRY.size + length
+            if end > len(data):
+                break
+            try:
+                self._add_score(data[offset + self.ENTRY.size : end].decode(), score)
+            except UnicodeDecodeError:
+                pass
+            offset = end
+
+        return offset
+
+    def _unpack_header(self, data: bytes):
+        """
+        Reference, number of keys, generation and size of the scores, None if it is not a table of this version
+        """
+        try:
+            magic, version, reference, count, generation, scores_size = self.HEADER.unpack_from(data, 0)
+        except struct.error:
+            return None
+        if magic != self.MAGIC or version != self.VERSION:
+            return None
+
+        return reference, count, generation, scores_size
+
+    def _write(self) -> None:
+        chunks = []
+        for key, score in self._scores.items():
+            encoded_key = key.encode()
+            chunks.append(self.ENTRY.pack(score, len(encoded_key)))
+            chunks.append(encoded_key)
+        scores = b"".join(chunks)
+        header = self.HEADER.pack(
+            self.MAGIC, self.VERSION, self.reference, len(self._scores), time.time_ns(), self.HEADER.size + len(scores)
+        )
+
+        tmp_location = f"{self.location}.{os.getpid()}.tmp"
+        with open(tmp_location, "wb") as f:
+            f.write(header + scores)
+        os.replace(tmp_location, self.location)
+
+    def _lock(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.location)), exist_ok=True)
+        return _LockFile(f"{self.location}.lock")
+
+    @staticmethod
+    def _timestamp(event: dict) -> Optional[float]:
+        try:
+            return float(event.get("timestamp"))
+        except (TypeError, ValueError):
+            return None
+
+
+class _LockFile:
+    def __init__(self, location: str):
+        self._location = location
+        self._file = None
+
+    def __enter__(self):
+        import fcntl
+
+        self._file = open(self._location, "w")
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+
+    def __exit__(self, *exception):
+        # closing the file releases the lock
+        self._file.close()
+        return False
@@ -1,6 +1,4 @@
 #!/usr/bin/env python3
-import json
-import os
 from typing import List
 
 from python_search.events.run_performed.dataset import EntryExecutedDataset
@@ -18,35 +16,21 @@ class RecentKeys:
         """
         return a list of unike used keys ordered by the last time they were used
         the most recent in the top.
+        Read from the recency ring kept by RunPerformedWriter, which is built from the events the first time.
         """
+        from python_search.events.recency_ring import RecencyRing
 
-        ds = EntryExecutedDataset
-        path = ds.load_new_path()
+        ring = RecencyRing.open()
+        if ring is None:
+            from python_search.events.data_collector import GenericDataCollector
 
-        import glob
+            events = GenericDataCollector().read_reverse(EntryExecutedDataset.NEW_FILE_NAME)
+            ring = RecencyRing.rebuild(events)
 
-        list_of_files = sorted(filter(os.path.isfile, glob.glob(path + "/*")))
+        keys = ring.latest_keys(history_size + len(self._blacklisted_items))
+        ring.close()
 
-        result = []
-
-        list_of_files = list_of_files[-history_size:]
-        list_of_files.reverse()
-        for file in list_of_files:
-            try:
-                data = json.load(open(file, "r"))
-            except Exception:
-                continue
-
-            key = data["key"]
-            if not key:
-                continue
-            result.append(key)
-
-        seen = set()
-        seen_add = seen.add
-        result = [x for x in result if not (x in seen or seen_add(x))]
-
-        return result
+        return [key for key in keys if key not in self._blacklisted_items][:history_size]
 
     @staticmethod
     def add_latest_used(key):
@@ -0,0 +1,210 @@
+"""
+Fixed size file of the most recently used keys, so the recent keys are read without scanning the events.
+
+Layout of the file, all integers little endian:
+
+    header  magic, version, capacity, key size and number of keys
+    order   slot numbers from the most to the least recently used
+    slots   per key the unix timestamp of its last use, the key length and the utf-8 key
+
+The file is memory mapped. Writers hold an exclusive flock while they move a key to the front,
+so parallel run_key processes never interleave, and readers a shared one.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+from typing import List, Optional, Tuple
+
+RECENCY_RING_LOCATION = os.environ["HOME"] + "/.python_search/data/recent_keys.ring"
+
+
+class RecencyRing:
+    MAGIC = b"PSRR"
+    VERSION = 1
+    # magic, version, capacity, key size and number of keys
+    HEADER = struct.Struct("<4sHIHI")
+    ORDER = struct.Struct("<I")
+    # timestamp and key length, followed by the key
+    SLOT = struct.Struct("<dH")
+    CAPACITY = 512
+    # longer keys are not tracked
+    KEY_SIZE = 256
+
+    def __init__(self, location: str, data, file):
+        self.location = location
+        self._data = data
+        self._file = file
+        _, _, self.capacity, self.key_size, _ = self.HEADER.unpack_from(data, 0)
+        self._order_offset = self.HEADER.size
+        self._slots_offset = self._order_offset + self.capacity * self.ORDER.size
+        self._slot_size = self.SLOT.size + self.key_size
+
+    @staticmethod
+    def open(location: Optional[str] = None, create: bool = False) -> Optional["RecencyRing"]:
+        """
+        Maps the ring at the location, None if there is none and create is not set
+        """
+        import mmap
+
+        location = location if location else RECENCY_RING_LOCATION
+        if create and not os.path.exists(location):
+            RecencyRing._create(location)
+
+        try:
+            file = open(location, "r+b")
+        except FileNotFoundError:
+            return None
+
+        try:
+            data = mmap.mmap(file.fileno(), 0)
+            magic, version = struct.unpack_from("<4sH", data, 0)
+        except (ValueError, struct.error):
+            file.close()
+            return None
+        if magic != RecencyRing.MAGIC or version != RecencyRing.VERSION:
+            file.close()
+            return None
+
+        return RecencyRing(location, data, file)
+
+    def add(self, key: str, timestamp: Optional[float] = None) -> None:
+        """
+        Moves the key to the front, evicting the least recently used one when the ring is full
+        """
+        encoded_key = key.encode()
+        if not encoded_key or len(encoded_key) > self.key_size:
+            return
+
+        with self._lock(exclusive=True):
+            order = self._order()
+            slot = None
+            for position, candidate in enumerate(order):
+                if self._key_bytes(candidate) == encoded_key:
+                    slot = order.pop(position)
+                    break
+            if slot is None:
+                # a new slot while there is room, otherwise the least recently used one
+                slot = len(order) if len(order) < self.capacity else order.pop()
+
+            offset = self._slots_offset + slot * self._slot_size
+            self.SLOT.pack_into(self._data, offset, timestamp if timestamp else time.time(), len(encoded_key))
+            self._data[offset + self.SLOT.size : offset + self.SLOT.size + len(encoded_key)] = encoded_key
+
+            order.insert(0, slot)
+            struct.pack_into(f"<{len(order)}I", self._data, self._order_offset, *order)
+            struct.pack_into("<I", self._data, self.HEADER.size - 4, len(order))
+
+    def latest(self, size: int) -> List[Tuple[str, float]]:
+        """
+        The size most recently used keys with their timestamps, the most recent first
+        """
+        with self._lock(exclusive=False):
+            result = []
+            for slot in self._order()[:size]:
+                offset = self._slots_offset + slot * self._slot_size
+                timestamp, _ = self.SLOT.unpack_from(self._data, offset)
+                result.append((self._key_bytes(slot).decode(), timestamp))
+
+        return result
+
+    def latest_keys(self, size: int) -> List[str]:
+        return [key for key, _ in self.latest(size)]
+
+    def __len__(self) -> int:
+        return self._count()
+
+    def close(self) -> None:
+        self._data.close()
+        self._file.close()
+
+    @staticmethod
+    def rebuild(events, location: Optional[str] = None) -> "RecencyRing":
+        """
+        Fills a new ring from run events ordered from the latest to the oldest
+        """
+        ring = RecencyRing.open(location, create=True)
+        seen = set()
+        recent = []
+        for event in events:
+            key = event.get("key")
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            recent.append((key, RecencyRing._timestamp(event)))
+            if len(recent) >= ring.capacity:
+                break
+
+        # the oldest first so the latest ends at the front
+        for key, timestamp in reversed(recent):
+            ring.add(key, timestamp)
+
+        return ring
+
+    def _order(self) -> List[int]:
+        count = self._count()
+        return list(struct.unpack_from(f"<{count}I", self._data, self._order_offset))
+
+    def _count(self) -> int:
+        return struct.unpack_from("<I", self._data, self.HEADER.size - 4)[0]
+
+    def _key_bytes(self, slot: int) -> bytes:
+        offset = self._slots_offset + slot * self._slot_size
+        _, length = self.SLOT.unpack_from(self._data, offset)
+        return bytes(self._data[offset + self.SLOT.size : offset + self.SLOT.size + length])
+
+    def _lock(self, exclusive: bool):
+        return _FileLock(self._file.fileno(), exclusive)
+
+    @staticmethod
+    def _timestamp(event: dict) -> float:
+        try:
+            return float(event.get("timestamp"))
+        except (TypeError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def _create(location: str) -> None:
+        """
+        Writes an empty ring under a temporary name and links it in place, if another process
+        created one meanwhile that one is kept
+        """
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+        size = (
+            RecencyRing.HEADER.size
+            + RecencyRing.CAPACITY * RecencyRing.ORDER.size
+            + RecencyRing.CAPACITY * (RecencyRing.SLOT.size + RecencyRing.KEY_SIZE)
+        )
+        tmp_location = f"{location}.{os.getpid()}.tmp"
+        with open(tmp_location, "wb") as f:
+            f.write(
+                RecencyRing.HEADER.pack(
+                    RecencyRing.MAGIC, RecencyRing.VERSION, RecencyRing.CAPACITY, RecencyRing.KEY_SIZE, 0
+                )
+            )
+            f.truncate(size)
+        try:
+            os.link(tmp_location, location)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_location)
+
+
+class _FileLock:
+    def __init__(self, fd: int, exclusive: bool):
+        self._fd = fd
+        self._exclusive = exclusive
+
+    def __enter__(self):
+        import fcntl
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX if self._exclusive else fcntl.LOCK_SH)
+
+    def __exit__(self, *exception):
+        import fcntl
+
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return False
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from python_search.events.event_log import EventLog, Position
+
+
+class RunPerformedCompaction:
+    """
+    Incremental compaction of the searches performed into the date partitioned parquet of
+    EntryExecutedDataset.CLEAN_PATH with pyarrow, an alternative to the spark based RunPerformedCleaning.
+
+    A watermark saved next to the partitions remembers up to where the event log and the legacy
+    one file per event files were compacted, so a run only reads the newer events and only adds a
+    file to the date partitions they belong to. Files are written under a temporary name and
+    renamed, and named after the position the run started from, so a run repeated after a crash
+    replaces what the crashed one wrote instead of duplicating it.
+    """
+
+    WATERMARK_NAME = "_watermark.json"
+    STRING_COLUMNS = [
+        "key",
+        "query_input",
+        "shortcut",
+        "rank_uuid",
+        "timestamp",
+        "earliest_time",
+        "after_execution_time",
+    ]
+    # the files this compaction writes, unlike the part-<number>-<uuid> ones of spark
+    PART_NAME = re.compile(r"^part-\d{8}-\d{12}-\d+\.parquet$")
+
+    def __init__(self, events_location: Optional[str] = None, clean_location: Optional[str] = None):
+        from python_search.events.run_performed.dataset import EntryExecutedDataset
+
+        self.events_location = events_location if events_location else EntryExecutedDataset.load_new_path()
+        self.clean_location = clean_location if clean_location else EntryExecutedDataset.CLEAN_PATH
+
+    def compact(self) -> int:
+        """
+        Appends the events newer than the watermark to the clean dataset, returns how many were added
+        """
+        watermark = self.load_watermark()
+        event_log = EventLog(self.events_location)
+        start = Position(*watermark["position"])
+        # the events of clean data written by spark before there was a watermark are skipped
+        max_timestamp = watermark.get("max_timestamp")
+
+        rows = []
+        legacy_timestamp = watermark["legacy_timestamp"]
+        for path in event_log.legacy_files():
+            file_timestamp = EventLog.legacy_timestamp(path)
+            if file_timestamp <= legacy_timestamp:
+                continue
+            try:
+                with open(path, "r") as f:
+                    rows.append(json.load(f))
+            except ValueError:
+                continue
+            legacy_timestamp = max(legacy_timestamp, file_timestamp)
+
+        end = start
+        for end, event in event_log.read_with_positions(start):
+            rows.append(event)
+
+        partitions = self.partition_by_date(rows, max_timestamp)
+        # named after where the run started, so only a repeated run writes to the same file
+        name = f"part-{start.segment:08d}-{start.offset:012d}-{int(watermark['legacy_timestamp'] * 1000000)}.parquet"
+        for date, date_rows in partitions.items():
+            self._write_partition(date, date_rows, name)
+
+        self.save_watermark({"position": list(end), "legacy_timestamp": legacy_timestamp})
+        added = sum(len(date_rows) for date_rows in partitions.values())
+        print(f"Compacted {added} new events into {len(partitions)} date partitions of {self.clean_location}")
+
+        return added
+
+    def partition_by_date(self, events: List[dict], max_timestamp: Optional[str] = None) -> Dict[str, List[dict]]:
+        """
+        The events in the schema of EntryExecutedDataset grouped by date, with the unix timestamp
+        formatted as from_unixtime does in the spark cleaning
+        """
+        partitions: Dict[str, List[dict]] = {}
+        for event in events:
+            try:
+                timestamp = datetime.fromtimestamp(float(event["timestamp"])).strftime("%Y-%m-%d %H:%M:%S")
+            except (KeyError, TypeError, ValueError):
+                continue
+            if max_timestamp and timestamp <= max_timestamp:
+                continue
+
+            row = {column: self._string(event.get(column)) for column in self.STRING_COLUMNS}
+            row["timestamp"] = timestamp
+            row["rank_position"] = self._integer(event.get("rank_position"))
+            partitions.setdefault(timestamp[:10], []).append(row)
+
+        return partitions
+
+    def load_watermark(self) -> dict:
+        try:
+            with open(os.path.join(self.clean_location, self.WATERMARK_NAME), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {
+                "position": [0, 0],
+                "legacy_timestamp": 0.0,
+                "max_timestamp": self._existing_max_timestamp(),
+            }
+
+    def save_watermark(self, watermark: dict) -> None:
+        os.makedirs(self.clean_location, exist_ok=True)
+        location = os.path.join(self.clean_location, self.WATERMARK_NAME)
+        tmp_location = f"{location}.{os.getpid()}.tmp"
+        with open(tmp_location, "w") as f:
+            json.dump(watermark, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_location, location)
+
+    def schema(self):
+        import pyarrow as pa
+
+        return pa.schema(
+            [
+                ("key", pa.string()),
+                ("query_input", pa.string()),
+                ("shortcut", pa.string()),
+                ("rank_uuid", pa.string()),
+                ("rank_position", pa.int32()),
+                ("timestamp", pa.string()),
+                ("earliest_time", pa.string()),
+                ("after_execution_time", pa.string()),
+            ]
+        )
+
+    def _write_partition(self, date: str, rows: List[dict], name: str) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        folder = os.path.join(self.clean_location, f"date={date}")
+        os.makedirs(folder, exist_ok=True)
+        # hidden from spark and pyarrow readers until it is complete
+        tmp_location = os.path.join(folder, f".{name}.{os.getpid()}.tmp")
+
+        pq.write_table(pa.Table.from_pylist(rows, schema=self.schema()), tmp_location)
+        os.replace(tmp_location, os.path.join(folder, name))
+
+    def _existing_max_timestamp(self) -> Optional[str]:
+        """
+        Latest timestamp of a clean dataset written by spark before there was a watermark
+        """
+        files = [
+            os.path.join(folder, name)
+            for folder, _, names in os.walk(self.clean_location)
+            for name in names
+            if name.endswith(".parquet") and not self.PART_NAME.match(name)
+        ]
+        if not files:
+            return None
+
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        timestamps = ds.dataset(files, format="parquet").to_table(columns=["timestamp"])
+        if not timestamps.num_rows:
+            return None
+
+        return pc.max(timestamps["timestamp"].cast("string")).as_py()
+
+    @staticmethod
+    def _string(value) -> Optional[str]:
+        return None if value is None else str(value)
+
+    @staticmethod
+    def _integer(value) -> Optional[int]:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+
+def compact():
+    RunPerformedCompaction().compact()
+
+
+if __name__ == "__main__":
+    compact()
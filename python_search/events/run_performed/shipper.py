@@ -0,0 +1,193 @@
+"""
+Ships the run performed events to the webservice through a spool on disk.
+
+Every event is first appended to the spool, so logging costs a single append and nothing is lost
+while the webservice is down. The events not shipped yet are then sent in batches over a kept
+alive connection, each event with an id and each batch with an idempotency key so the webservice
+can ignore what a retry sends twice. The position up to which the spool was shipped is saved
+after every batch accepted.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+from python_search.events.event_log import EventLog, Position
+from python_search.logger import setup_data_writter_logger
+
+SPOOL_LOCATION = os.environ["HOME"] + "/.python_search/data/log_run_spool"
+WEBSERVICE_URL = "http://localhost:8000"
+
+logger = setup_data_writter_logger("run_performed_shipper")
+
+
+class RunPerformedShipper:
+    BATCH_SIZE = 100
+    MAX_RETRIES = 3
+    BACKOFF_SECONDS = 0.1
+    TIMEOUT_SECONDS = 2.0
+    BATCH_PATH = "/log_run_batch"
+    SINGLE_PATH = "/log_run"
+    POSITION_NAME = "_shipped.json"
+    LOCK_NAME = "_ship.lock"
+    # rejected events are kept here instead of blocking the spool
+    REJECTED_NAME = "rejected"
+
+    def __init__(self, url: Optional[str] = None, spool_location: Optional[str] = None):
+        url = urlsplit(url if url else WEBSERVICE_URL)
+        self.host = url.hostname
+        self.port = url.port if url.port else 80
+        self.spool_location = spool_location if spool_location else SPOOL_LOCATION
+        self._spool = EventLog(self.spool_location)
+        self._connection = None
+        # set when the webservice has no batch endpoint
+        self._batch_supported = True
+
+    def send(self, event: dict) -> int:
+        """
+        Spools the event and ships everything spooled so far
+        """
+        self.spool(event)
+        return self.ship()
+
+    def spool(self, event: dict) -> None:
+        self._spool.append(dict(event, event_id=event.get("event_id") or uuid.uuid4().hex))
+
+    def ship(self) -> int:
+        """
+        Sends the spooled events not shipped yet and returns how many were shipped. It stops at
+        the first batch that could not be sent, which stays in the spool for the next time.
+        Only one process ships at a time, the others leave it to that one.
+        """
+        import fcntl
+
+        os.makedirs(self.spool_location, exist_ok=True)
+        with open(os.path.join(self.spool_location, self.LOCK_NAME), "w") as lock:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+
+            try:
+                return self._ship_spooled()
+            finally:
+                self.close()
+
+    def pending(self) -> int:
+        return sum(1 for _ in self._spool.read(self._load_position()))
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _ship_spooled(self) -> int:
+        position = self._load_position()
+        shipped = 0
+        batch: List[dict] = []
+        batch_end = position
+
+        for event_end, event in self._spool.read_with_positions(position):
+            batch.append(event)
+            batch_end = event_end
+            if len(batch) < self.BATCH_SIZE:
+                continue
+            if not self._send_batch(batch):
+                return shipped
+            shipped += len(batch)
+            self._save_position(batch_end)
+            batch = []
+
+        if batch:
+            if not self._send_batch(batch):
+                return shipped
+            shipped += len(batch)
+            self._save_position(batch_end)
+
+        self._spool.remove_segments_before(batch_end)
+        return shipped
+
+    def _send_batch(self, events: List[dict]) -> bool:
+        """
+        True once the webservice accepted or rejected the events, False if they should be sent later
+        """
+        if not self._batch_supported:
+            return all(self._send(self.SINGLE_PATH, event, event["event_id"]) for event in events)
+
+        idempotency_key = f"{events[0]['event_id']}-{events[-1]['event_id']}-{len(events)}"
+        status = self._post(self.BATCH_PATH, {"events": events}, idempotency_key)
+        if status == 404:
+            logger.info("The webservice has no batch endpoint, sending the events one by one")
+            self._batch_supported = False
+            return self._send_batch(events)
+
+        return self._accepted(status, events)
+
+    def _send(self, path: str, event: dict, idempotency_key: str) -> bool:
+        return self._accepted(self._post(path, event, idempotency_key), [event])
+
+    def _accepted(self, status: Optional[int], events: List[dict]) -> bool:
+        if status is None:
+            return False
+        if 400 <= status < 500 and status not in (408, 429):
+            # sending them again would be rejected again
+            logger.error(f"The webservice rejected {len(events)} events with status {status}")
+            rejected = EventLog(os.path.join(self.spool_location, self.REJECTED_NAME))
+            for event in events:
+                rejected.append(event)
+            return True
+
+        return 200 <= status < 300
+
+    def _post(self, path: str, body: dict, idempotency_key: str) -> Optional[int]:
+        """
+        Status of the response, retried with exponential backoff on timeouts and server errors.
+        None if there was no answer, right away if the webservice is not running.
+        """
+        import http.client
+
+        payload = json.dumps(body, default=str).encode()
+        headers = {"Content-Type": "application/json", "Idempotency-Key": idempotency_key}
+        status = None
+        for attempt in range(self.MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(self.BACKOFF_SECONDS * 2 ** (attempt - 1))
+            try:
+                if self._connection is None:
+                    self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.TIMEOUT_SECONDS)
+                self._connection.request("POST", path, payload, headers)
+                response = self._connection.getresponse()
+                response.read()
+                status = response.status
+            except ConnectionRefusedError:
+                self.close()
+                return None
+            except (OSError, http.client.HTTPException) as e:
+                logger.info(f"Sending events failed: {e}")
+                self.close()
+                status = None
+                continue
+
+            if status < 500 and status not in (408, 429):
+                return status
+
+        return status
+
+    def _load_position(self) -> Position:
+        try:
+            with open(os.path.join(self.spool_location, self.POSITION_NAME), "r") as f:
+                return Position(*json.load(f))
+        except (FileNotFoundError, ValueError, TypeError):
+            return Position(0, 0)
+
+    def _save_position(self, position: Position) -> None:
+        location = os.path.join(self.spool_location, self.POSITION_NAME)
+        tmp_location = f"{location}.{os.getpid()}.tmp"
+        with open(tmp_location, "w") as f:
+            json.dump(list(position), f)
+        os.replace(tmp_location, location)
@@ -17,20 +17,15 @@ class LogRunPerformedClient:
             RunPerformedWriter().write(data)
             return
 
-        import requests
+        from python_search.events.run_performed.shipper import RunPerformedShipper
 
-        try:
-            result = requests.post(
-                url="http://localhost:8000/log_run", json=data.__dict__
-            )
-            return result
-        except BaseException as e:
-            print(f"Logging results failed, reason: {e}")
+        # spooled on disk first so nothing is lost while the webservice is down
+        return RunPerformedShipper().send(data.__dict__)
 
 
 class RunPerformedWriter:
     """
-    Writes event
+    Writes event, moves its key to the front of the recent keys and adds the run to its frecency
     """
 
     def write(self, event: EntryExecuted):
@@ -39,7 +34,25 @@ class RunPerformedWriter:
         event.timestamp = str(datetime.datetime.now(datetime.timezone.utc).timestamp())
 
         from python_search.events.data_collector import GenericDataCollector
+        from python_search.events.frecency import FrecencyTable
+        from python_search.events.recency_ring import RecencyRing
 
-        return GenericDataCollector().write(
+        result = GenericDataCollector().write(
             data=event.__dict__, table_name="searches_performed"
         )
+
+        if event.key:
+            ring = RecencyRing.open()
+            if ring is None:
+                # the first time the ring is built from all events, including this one
+                ring = RecencyRing.rebuild(GenericDataCollector().read_reverse("searches_performed"))
+            else:
+                ring.add(event.key, float(event.timestamp))
+            ring.close()
+
+        if event.key:
+            if not FrecencyTable.exists() or not FrecencyTable.add(event.key, float(event.timestamp)):
+                # the first time, or if the table is corrupt, it is built from all events including this one
+                FrecencyTable.rebuild(GenericDataCollector().read("searches_performed"))
+
+        return result
@@ -9,6 +9,7 @@ from python_search.interpreter.python import PythonInterpreter
 from python_search.interpreter.snippet import SnippetInterpreter
 from python_search.interpreter.url import UrlInterpreter
 from python_search.logger import interpreter_logger
+from python_search.tracing import get_tracer
 
 INTERPRETERS_IN_ORDER = [
     UrlInterpreter,
@@ -95,6 +96,7 @@ class InterpreterMatcher:
         specific_interpreter: BaseInterpreter = self.get_interpreter(given_input)
         return specific_interpreter.interpret_clipboard()
 
+    @get_tracer().traced("interpreter_matcher.match_interpreter")
     def _match_interpreter(self, cmd) -> BaseInterpreter:
         self.logger.info("Matching interpreter for command: %s", cmd)
         print("Matching interpreter for command: %s", cmd)
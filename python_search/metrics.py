@@ -0,0 +1,400 @@
+"""
+Metrics of python search, sent to a backend chosen with the PS_METRICS environment variable:
+
+    none        the default, nothing is recorded and timed functions are not even wrapped
+    histogram   in process log bucketed histograms dumped as json to PS_METRICS_FILE on exit
+    statsd      udp packets to a statsd or datadog agent at PS_STATSD_HOST:PS_STATSD_PORT
+    prometheus  text exposition format written to PS_METRICS_FILE for the node exporter textfile collector
+
+Recording a metric only appends to a buffer, a background thread hands the buffered metrics
+in batches to the backend so the search ui never waits on a socket or a file.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from collections import deque
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+METRICS_BACKEND_ENV = "PS_METRICS"
+METRICS_FILE_ENV = "PS_METRICS_FILE"
+HISTOGRAM_LOCATION = "/tmp/python_search_metrics.json"
+PROMETHEUS_LOCATION = "/tmp/python_search_metrics.prom"
+
+COUNTER, GAUGE, HISTOGRAM = "counter", "gauge", "histogram"
+Record = Tuple[str, str, float]
+
+
+class Histogram:
+    """
+    Histogram with logarithmic buckets in the spirit of HdrHistogram: any value is counted in a
+    bucket at most precision away from it, so percentiles have a bounded relative error with a
+    memory proportional to the orders of magnitude seen instead of to the number of values.
+    """
+
+    PRECISION = 0.01
+    # values below are counted as this, timings are recorded in seconds
+    LOWEST_VALUE = 1e-7
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def record(self, value: float) -> None:
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self.count:
+            return None
+
+        rank = max(1, math.ceil(self.count * percentile / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # the middle of the bucket, clamped to what was actually recorded
+                return min(max(self._value(index + 0.5), self.min), self.max)
+
+        return self.max
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.total / self.count,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+        }
+
+    def _index(self, value: float) -> int:
+        return math.floor(math.log(max(value, self.LOWEST_VALUE) / self.LOWEST_VALUE, 1 + self.PRECISION))
+
+    def _value(self, index: float) -> float:
+        return self.LOWEST_VALUE * (1 + self.PRECISION) ** index
+
+
+class NoopBackend:
+    enabled = False
+
+    def send(self, batch: List[Record]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class HistogramBackend:
+    """
+    Aggregates the metrics in process, dumped as json when closed or on demand
+    """
+
+    enabled = True
+
+    def __init__(self, location: Optional[str] = None):
+        self.location = location if location else HISTOGRAM_LOCATION
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def send(self, batch: List[Record]) -> None:
+        for kind, name, value in batch:
+            if kind == COUNTER:
+                self.counters[name] = self.counters.get(name, 0) + value
+            elif kind == GAUGE:
+                self.gauges[name] = value
+            else:
+                self.histograms.setdefault(name, Histogram()).record(value)
+
+    def summary(self) -> dict:
+        return {
+            "counters": self.counters,
+            "gauges": self.gauges,
+            "histograms": {name: histogram.summary() for name, histogram in self.histograms.items()},
+        }
+
+    def dump(self, location: Optional[str] = None) -> None:
+        _write_atomically(location if location else self.location, json.dumps(self.summary(), indent=4))
+
+    def close(self) -> None:
+        if self.counters or self.gauges or self.histograms:
+            self.dump()
+
+
+class StatsdBackend:
+    """
+    Sends the metrics in the statsd line protocol, several per udp packet
+    """
+
+    enabled = True
+    # fits a packet in the usual mtu
+    MAX_PACKET_SIZE = 1432
+    TYPES = {COUNTER: "c", GAUGE: "g", HISTOGRAM: "h"}
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8125, prefix: str = ""):
+        import socket
+
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def send(self, batch: List[Record]) -> None:
+        packet = b""
+        for kind, name, value in batch:
+            line = f"{self.prefix}{name}:{value:g}|{self.TYPES[kind]}".encode()
+            if packet and len(packet) + len(line) + 1 > self.MAX_PACKET_SIZE:
+                self._send_packet(packet)
+                packet = b""
+            packet = packet + b"\n" + line if packet else line
+
+        if packet:
+            self._send_packet(packet)
+
+    def _send_packet(self, packet: bytes) -> None:
+        try:
+            self._socket.sendto(packet, self.address)
+        except OSError:
+            # metrics are best effort, there may be no agent listening
+            pass
+
+    def close(self) -> None:
+        self._socket.close()
+
+
+class PrometheusBackend:
+    """
+    Keeps counters, gauges and cumulative histograms and rewrites the exposition file after every batch
+    """
+
+    enabled = True
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, location: Optional[str] = None, prefix: str = "python_search_"):
+        self.location = location if location else PROMETHEUS_LOCATION
+        self.prefix = prefix
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        # bucket counts, sum and count of every histogram
+        self.histograms: Dict[str, list] = {}
+
+    def send(self, batch: List[Record]) -> None:
+        for kind, name, value in batch:
+            if kind == COUNTER:
+                self.counters[name] = self.counters.get(name, 0) + value
+            elif kind == GAUGE:
+                self.gauges[name] = value
+            else:
+                buckets, total, count = self.histograms.get(name, [[0] * len(self.BUCKETS), 0.0, 0])
+                for i, bound in enumerate(self.BUCKETS):
+                    if value <= bound:
+                        buckets[i] += 1
+                self.histograms[name] = [buckets, total + value, count + 1]
+
+        if batch:
+            _write_atomically(self.location, self.exposition())
+
+    def exposition(self) -> str:
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            lines += [f"# TYPE {self.prefix}{name}_total counter", f"{self.prefix}{name}_total {value:g}"]
+        for name, value in sorted(self.gauges.items()):
+            lines += [f"# TYPE {self.prefix}{name} gauge", f"{self.prefix}{name} {value:g}"]
+        for name, (buckets, total, count) in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {self.prefix}{name} histogram")
+            for bound, bucket_count in zip(self.BUCKETS, buckets):
+                lines.append(f'{self.prefix}{name}_bucket{{le="{bound:g}"}} {bucket_count}')
+            lines += [
+                f'{self.prefix}{name}_bucket{{le="+Inf"}} {count}',
+                f"{self.prefix}{name}_sum {total:g}",
+                f"{self.prefix}{name}_count {count}",
+            ]
+
+        return "\n".join(lines) + "\n"
+
+    def close(self) -> None:
+        pass
+
+
+class Metrics:
+    """
+    Records metrics without blocking, a daemon thread flushes them to the backend in batches
+    """
+
+    FLUSH_INTERVAL_SECONDS = 1.0
+    # a batch is flushed earlier when the buffer reaches this size
+    FLUSH_SIZE = 1000
+
+    def __init__(self, backend=None, flush_interval: Optional[float] = None):
+        self.backend = backend if backend else NoopBackend()
+        self.enabled = self.backend.enabled
+        self._flush_interval = flush_interval if flush_interval is not None else self.FLUSH_INTERVAL_SECONDS
+        # appends and pops of a deque are thread safe without a lock
+        self._buffer: deque = deque()
+        self._wake = None
+        self._thread = None
+        self._closing = False
+
+    def increment(self, metric: str, value: float = 1) -> None:
+        if self.enabled:
+            self._record(COUNTER, metric, value)
+
+    def gauge(self, metric: str, value: float) -> None:
+        if self.enabled:
+            self._record(GAUGE, metric, value)
+
+    def histogram(self, metric: str, value: float) -> None:
+        if self.enabled:
+            self._record(HISTOGRAM, metric, value)
+
+    def timing(self, metric: str, seconds: float) -> None:
+        if self.enabled:
+            self._record(HISTOGRAM, metric, seconds)
+
+    def timed(self, metric: str):
+        """
+        Decorator recording the duration of every call in seconds, the function is returned as is when disabled
+        """
+
+        def decorator(func):
+            if not self.enabled:
+                return func
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._record(HISTOGRAM, metric, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def flush(self) -> None:
+        """
+        Sends everything recorded so far to the backend
+        """
+        batch = []
+        for _ in range(len(self._buffer)):
+            batch.append(self._buffer.popleft())
+        if batch:
+            self.backend.send(batch)
+
+    def close(self) -> None:
+        self._closing = True
+        if self._thread is not None:
+            self._wake.set()
+            self._thread.join()
+        self.flush()
+        self.backend.close()
+
+    def _record(self, kind: str, metric: str, value: float) -> None:
+        self._buffer.append((kind, metric, value))
+        if self._thread is None:
+            self._start_flusher()
+        elif len(self._buffer) >= self.FLUSH_SIZE:
+            self._wake.set()
+
+    def _start_flusher(self) -> None:
+        import atexit
+        import threading
+
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _flush_loop(self) -> None:
+        while not self._closing:
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+def backend_from_environment():
+    """
+    The backend selected by PS_METRICS, the no op one if it is not set
+    """
+    name = os.environ.get(METRICS_BACKEND_ENV, "none").lower()
+    location = os.environ.get(METRICS_FILE_ENV)
+
+    if name == "histogram":
+        return HistogramBackend(location)
+    if name == "statsd":
+        return StatsdBackend(
+            os.environ.get("PS_STATSD_HOST", "127.0.0.1"), int(os.environ.get("PS_STATSD_PORT", "8125"))
+        )
+    if name == "prometheus":
+        return PrometheusBackend(location)
+
+    return NoopBackend()
+
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    """
+    The metrics of the process with the backend of the environment
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics(backend_from_environment())
+
+    return _metrics
+
+
+def show(location: str = HISTOGRAM_LOCATION):
+    """
+    Prints the histograms dumped by the histogram backend in milliseconds
+    """
+    with open(location) as f:
+        summary = json.load(f)
+
+    for name, value in summary["counters"].items():
+        print(f"{name}: {value:g}")
+    for name, value in summary["gauges"].items():
+        print(f"{name}: {value:g}")
+    for name, histogram in summary["histograms"].items():
+        if not histogram["count"]:
+            continue
+        percentiles = " ".join(
+            f"{percentile}={histogram[percentile] * 1000:.3f}ms" for percentile in ("p50", "p90", "p99", "p999")
+        )
+        print(f"{name}: count={histogram['count']} {percentiles} max={histogram['max'] * 1000:.3f}ms")
+
+
+def _write_atomically(location: str, content: str) -> None:
+    tmp_location = f"{location}.{os.getpid()}.tmp"
+    with open(tmp_location, "w") as f:
+        f.write(content)
+    os.replace(tmp_location, location)
+
+
+def main():
+    import fire
+
+    fire.Fire({"show": show})
+
+
+if __name__ == "__main__":
+    main()
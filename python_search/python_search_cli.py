@@ -1,18 +1,13 @@
+from __future__ import annotations
+
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from python_search.configuration.configuration import PythonSearchConfiguration
-from python_search.configuration.loader import ConfigurationLoader
 from python_search.core_entities import Key
-from python_search.entry_capture.register_new import RegisterNew
-from python_search.entry_runner import EntryRunner
 from python_search.error.exception import notify_exception
-from python_search.events.run_performed.entity import EntryExecuted
-from python_search.events.run_performed.writer import LogRunPerformedClient
-from python_search.host_system.window_hide import HideWindow
-from python_search.search.entries_loader import EntriesLoader
-from python_search.search.search_ui.kitty_for_search_ui import KittyForSearchUI
-from python_search.search.search_ui.semantic_search import SemanticSearch
+
+if TYPE_CHECKING:
+    from python_search.configuration.configuration import PythonSearchConfiguration
 
 
 class PythonSearchCli:
@@ -57,18 +52,48 @@ class PythonSearchCli:
             logging.debug("No _configuration provided, using default")
 
         self.configuration = configuration
+
+    # the commands below are properties so each one only imports its modules when it is used
+
+    @property
+    def events(self):
         import python_search.events
 
-        self.events = python_search.events
-        self._semantic_search = SemanticSearch
-        self._entries_loader = EntriesLoader
-        self._kitty_search = KittyForSearchUI
+        return python_search.events
+
+    @property
+    def _semantic_search(self):
+        from python_search.search.search_ui.semantic_search import SemanticSearch
+
+        return SemanticSearch
+
+    @property
+    def _entries_loader(self):
+        from python_search.search.entries_loader import EntriesLoader
+
+        return EntriesLoader
+
+    @property
+    def _kitty_search(self):
+        from python_search.search.search_ui.kitty_for_search_ui import KittyForSearchUI
+
+        return KittyForSearchUI
+
+    @property
+    def _search_daemon(self):
+        from python_search.search.search_ui.search_daemon import SearchDaemon
+
+        return SearchDaemon
 
     def run_key(self, key: str):
-        EntryRunner(self._get_configuration()).run(key)
+        from python_search.entry_runner import EntryRunner
+
+        EntryRunner(self.configuration).run(key)
 
     def _get_configuration(self):
         if not self.configuration:
+            from python_search.configuration.loader import ConfigurationLoader
+
             self.configuration = ConfigurationLoader().load_config()
         return self.configuration
 
@@ -76,6 +101,7 @@ class PythonSearchCli:
         """
         Opens the Search UI. Main entrypoint of the application
         """
+        from python_search.search.search_ui.kitty_for_search_ui import KittyForSearchUI
 
         KittyForSearchUI.focus_or_open(self.configuration)
 
@@ -83,6 +109,8 @@ class PythonSearchCli:
         """
         Starts the UI for collecting a new entry into python search
         """
+        from python_search.entry_capture.register_new import RegisterNew
+
         return RegisterNew().launch_ui()
 
     def _copy_entry_content(self, entry_str: str):
@@ -94,10 +122,8 @@ class PythonSearchCli:
 
         key = str(Key.from_fzf(entry_str))
 
-        InterpreterMatcher.build_instance(self.configuration).clipboard(key)
-        LogRunPerformedClient().send(
-            EntryExecuted(key=key, query_input="", shortcut=False)
-        )
+        InterpreterMatcher.build_instance(self._get_configuration()).clipboard(key)
+        self._log_run(key)
 
     def _copy_key_only(self, entry_str: str):
         """
@@ -107,9 +133,17 @@ class PythonSearchCli:
 
         key = str(Key.from_fzf(entry_str))
         Clipboard().set_content(key, enable_notifications=True)
-        LogRunPerformedClient().send(
-            EntryExecuted(key=key, query_input="", shortcut=False)
-        )
+        self._log_run(key)
+
+    def _log_run(self, key: str):
+        configuration = self._get_configuration()
+        if not configuration.collect_data:
+            return
+
+        from python_search.entry_runner import EntryRunner
+        from python_search.events.event_sink import get_event_sink
+
+        get_event_sink().submit(EntryRunner.log_run, configuration, key=key, query_input="", shortcut=False)
 
     def configure_shortcuts(self):
         """
@@ -127,6 +161,8 @@ class PythonSearchCli:
                 self.configuration = configuration
 
             def hide_launcher(self):
+                from python_search.host_system.window_hide import HideWindow
+
                 HideWindow().hide(self.configuration.APPLICATION_TITLE)
 
         return Utils(self.configuration)
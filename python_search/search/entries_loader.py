@@ -24,11 +24,32 @@ class EntriesLoader:
     def load_entries_as_json(self):
         import json
 
+        return json.dumps(EntriesLoader.load_serialized_entries())
+
+    @staticmethod
+    def load_serialized_entries() -> dict:
+        """
+        The serialized entries from the compiled snapshot, the entries project is only
+        imported, and the snapshot compiled again, if one of its files changed
+        """
+        from python_search.configuration.entries_snapshot import EntriesSnapshot
+
+        snapshot = EntriesSnapshot.open_fresh()
+        if snapshot is None:
+            snapshot = EntriesSnapshot.compile()
+
+        return snapshot.serialized_entries()
+
+    @staticmethod
+    def serialize_entries(entries: dict) -> dict:
+        """
+        Returns the entries in the json friendly format consumed by the search ui
+        """
         result = {}
-        for entry in EntriesLoader.load_all_entries():
+        for entry in EntriesLoader.convert_to_list_of_entries(entries):
             result[entry.key] = entry.get_serialized_value()
 
-        return json.dumps(result)
+        return result
 
     @staticmethod
     def load_all_entries() -> List[Entry]:
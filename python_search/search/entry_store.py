@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Iterator, Optional, Tuple
+
+from python_search.configuration.entries_snapshot import EntriesSnapshot
+
+
+class EntryView:
+    """
+    Read only stand-in for core_entities.Entry over an entry of the store.
+    The fields are decoded from the mapped file the first time they are used.
+    """
+
+    __slots__ = ("_snapshot", "_position", "_key", "_type", "_content")
+
+    def __init__(self, snapshot: EntriesSnapshot, position: int):
+        self._snapshot = snapshot
+        self._position = position
+        self._key = None
+        self._type = None
+        self._content = None
+
+    @property
+    def key(self) -> str:
+        if self._key is None:
+            self._key = self._snapshot.field(self._position, EntriesSnapshot.KEY)
+        return self._key
+
+    @property
+    def value(self) -> dict:
+        return {self.get_type_str(): self.get_content_str()}
+
+    def get_content_str(self, strip_new_lines=False) -> str:
+        if self._content is None:
+            self._content = self._snapshot.field(self._position, EntriesSnapshot.CONTENT)
+
+        if strip_new_lines:
+            return self._content.replace("\n", " ")
+
+        return self._content
+
+    def get_type_str(self) -> str:
+        if self._type is None:
+            self._type = self._snapshot.field(self._position, EntriesSnapshot.TYPE)
+        return self._type
+
+    def get_serialized_value(self) -> dict:
+        return self.value
+
+
+class EntryStore(Mapping):
+    """
+    The serialized entries of the search ui read straight from the memory mapped entries snapshot.
+
+    Behaves like the {key: {type: content}} dict it replaces, but nothing is decoded up front:
+    opening it parses only the header and an entry is read from its offset when it is accessed,
+    so the resident memory stays small and the startup cost constant with any number of entries.
+    """
+
+    def __init__(self, snapshot: EntriesSnapshot):
+        self._snapshot = snapshot
+
+    @staticmethod
+    def open(location: Optional[str] = None, fresh: bool = True) -> Optional["EntryStore"]:
+        """
+        The store of the snapshot, None if there is none or, when fresh is set, if it is stale
+        """
+        snapshot = EntriesSnapshot.open_fresh(location) if fresh else EntriesSnapshot.open(location)
+
+        return EntryStore(snapshot) if snapshot else None
+
+    def entry(self, key: str) -> EntryView:
+        position = self._snapshot.position_of(key, case_sensitive=True)
+        if position is None:
+            raise KeyError(key)
+
+        return EntryView(self._snapshot, position)
+
+    def __getitem__(self, key: str) -> dict:
+        return self.entry(key).value
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self._snapshot.position_of(key, case_sensitive=True) is not None
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        # walks the offset table in order instead of looking every key up
+        for key, type, content in self._snapshot.rows():
+            yield key, {type: content}
+
+    def __iter__(self) -> Iterator[str]:
+        return self._snapshot.keys()
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
@@ -1,20 +1,44 @@
+from python_search.events.frecency import FrecencyTable
 from python_search.logger import setup_term_ui_logger
+from python_search.metrics import get_metrics
+from python_search.tracing import get_tracer
+from python_search.search.search_ui.backend_fanout import BackendFanout
 from python_search.search.search_ui.bm25_search import Bm25Search
+from python_search.search.search_ui.rank_fusion import RankFusion, ScoredCandidates
 from python_search.search.search_ui.semantic_search import SemanticSearch
+from python_search.search.search_ui.string_match_index import (
+    PrefixSearchStack,
+    StringMatchIndex,
+)
 
 
-from typing import Generator, Iterator, List
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Callable, Dict, Generator, Iterator, List, Optional
 
 logger = setup_term_ui_logger()
+metrics = get_metrics()
+tracer = get_tracer()
 
 
 class QueryLogic:
     NUMBER_ENTRIES_TO_RETURN = 50
     ENABLE_SEMANTIC_SEARCH = False
     ENABLE_BM25_SEARCH = True
+    # how long a search waits for the slower backends before merging what is there
+    LATENCY_BUDGET_MS = 30
+    # how often a streaming search checks if it was cancelled while waiting for the slower backends
+    CANCEL_CHECK_SECONDS = 0.01
+    # how much how often and how lately an entry was used counts compared to a top match of one backend
+    FRECENCY_WEIGHT = 1.0
+    # how often a search checks if entries were run since, instead of on every keystroke
+    FRECENCY_REFRESH_SECONDS = 1.0
 
-    def __init__(self, commands: dict[str, str]) -> None:
+    def __init__(self, commands: dict[str, str], frecency: Optional[FrecencyTable] = None) -> None:
         self.commands = commands
+        self.string_index = StringMatchIndex(self.commands)
+        self.prefix_stack = PrefixSearchStack(self.string_index)
         if self.ENABLE_BM25_SEARCH:
             self.search_bm25 = Bm25Search(
                 self.commands, number_entries_to_return=self.NUMBER_ENTRIES_TO_RETURN
@@ -23,108 +47,230 @@ class QueryLogic:
             self.search_semantic = SemanticSearch(
                 self.commands, number_entries_to_return=self.NUMBER_ENTRIES_TO_RETURN
             )
+        self.fanout = BackendFanout(self.backend_results)
+        self.frecency = frecency if frecency is not None else FrecencyTable.load()
+        self._frecency_refreshed_at = time.monotonic()
+        self.rank_fusion = RankFusion()
+        self.rank_fusion.add_boost(self.frecency.boost(), self.FRECENCY_WEIGHT)
         self.last_query = None
         self.in_results_list = []
 
-    def search(self, query: str) -> List[str]:
+    def update_entries(self, commands: dict[str, str]) -> None:
+        """
+        Updates the indexes with changed entries without rebuilding them
+        """
+        self.commands = commands
+        self.string_index.sync(self.commands)
+        self.prefix_stack.clear()
+        self.fanout.clear()
+        if self.ENABLE_BM25_SEARCH:
+            self.search_bm25 = Bm25Search(
+                self.commands, number_entries_to_return=self.NUMBER_ENTRIES_TO_RETURN
+            )
+        self.last_query = None
+        self.in_results_list = []
+
+    @metrics.timed("ps_search")
+    @tracer.traced("query_logic.search")
+    def search(
+        self,
+        query: str,
+        on_results: Optional[Callable[[List[str]], None]] = None,
+        cancelled: Optional[threading.Event] = None,
+        debounce_ms: float = 0,
+    ) -> List[str]:
         """
         gets results from different search methods and merge them to remove duplicates
+
+        Without on_results the slower backends get the latency budget. With it the results are streamed:
+        on_results gets them after the string match and again every time a slower backend is merged in.
+
+        :param cancelled: set when the query went stale, a streaming search stops waiting and returns
+        :param debounce_ms: pause of a streaming search before starting the slower backends
         """
+        if time.monotonic() - self._frecency_refreshed_at >= self.FRECENCY_REFRESH_SECONDS:
+            self._frecency_refreshed_at = time.monotonic()
+            if self.frecency.refresh():
+                # entries were run since, the remembered results are ranked with the old scores
+                self.prefix_stack.clear()
+                self.last_query = None
 
-        if query == self.last_query and query != "" and self.last_query is not None:
-            return self.in_results_list
+        cached_results = self.cached_results(query)
+        if cached_results is not None:
+            if on_results is not None:
+                on_results(cached_results)
+            return cached_results
 
         logger.info("Query: '{}'".format(query))
-        self.last_query = query
-        self.in_results_list = []
 
         try:
-            # Get results from different search methods
-            string_results = list(self.string_match(query))
-
-            bm25_results = []
-            if self.ENABLE_BM25_SEARCH:
-                bm25_results = self.search_bm25.search(query)
-
-            semantic_results = []
-            if self.ENABLE_SEMANTIC_SEARCH:
-                semantic_results = self.search_semantic.search(query)
-
-            logger.info("Starting query logic merge")
-
-            # Merge results with priority
-            all_results = []
-
-            if len(query) <= 3:
-                # For short queries, prioritize exact string matches
-                all_results.extend(string_results)
-                all_results.extend(bm25_results)
-            else:
-                # For longer queries, prioritize BM25 then string matching
-                all_results.extend(bm25_results)
-                all_results.extend(string_results)
-
-            all_results.extend(semantic_results)
-
-            # Remove duplicates while preserving order
-            seen = set()
-            for result in all_results:
-                if result not in seen and result in self.commands.keys():
-                    self.in_results_list.append(result)
-                    seen.add(result)
-                    if len(self.in_results_list) >= self.NUMBER_ENTRIES_TO_RETURN:
-                        break
+            backends = self.enabled_backends()
+            if on_results is not None:
+                cancelled = cancelled if cancelled else threading.Event()
+                return self._stream(query, backends, on_results, cancelled, debounce_ms)
 
-            return self.in_results_list
+            # the slower backends run concurrently while the string match runs here
+            futures = self.fanout.submit(query, backends[1:])
+            results = {backends[0]: self.backend_results(backends[0], query)}
+
+            outcome = self.fanout.collect(futures, self.LATENCY_BUDGET_MS)
+            results.update(outcome.results)
+            for backend, exception in outcome.failed.items():
+                logger.error(f"Error in {backend} search: {exception}")
+            if outcome.missed:
+                logger.warning(f"Backends {outcome.missed} missed the {self.LATENCY_BUDGET_MS}ms budget for '{query}'")
+                # not remembered as the results of the query so asking again merges the late results
+                return self.merge(query, results)
+
+            return self.complete(query, results)
 
         except Exception as e:
             logger.error(f"Error in search: {e}")
             return []
 
+    def first_results(self, query: str) -> List[str]:
+        """
+        What a streaming search shows first: the results already known or the string matches
+        """
+        cached_results = self.cached_results(query)
+        if cached_results is not None:
+            return cached_results
+
+        backend = self.enabled_backends()[0]
+        return self.merge(query, {backend: self.backend_results(backend, query)})
+
+    def _stream(
+        self,
+        query: str,
+        backends: List[str],
+        on_results: Callable[[List[str]], None],
+        cancelled: threading.Event,
+        debounce_ms: float,
+    ) -> List[str]:
+        results = {backends[0]: self.backend_results(backends[0], query)}
+        ranking = self.merge(query, results)
+        on_results(ranking)
+        if len(backends) == 1:
+            return self.complete(query, results)
+
+        # gives a fast typist the chance to cancel us before the slow backends run
+        if cancelled.wait(debounce_ms / 1000):
+            return ranking
+
+        futures = self.fanout.submit(query, backends[1:])
+        pending = {future: backend for backend, future in futures.items()}
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=self.CANCEL_CHECK_SECONDS, return_when=FIRST_COMPLETED)
+                if cancelled.is_set():
+                    return ranking
+                for future in done:
+                    backend = pending.pop(future)
+                    if future.exception():
+                        logger.error(f"Error in {backend} search: {future.exception()}")
+                        continue
+                    results[backend] = future.result()
+                if done:
+                    ranking = self.merge(query, results)
+                    on_results(ranking)
+        finally:
+            for future in pending:
+                future.cancel()
+
+        return self.complete(query, results)
+
+    def enabled_backends(self) -> List[str]:
+        """
+        The search methods in use, the fastest first
+        """
+        backends = ["string"]
+        if self.ENABLE_BM25_SEARCH:
+            backends.append("bm25")
+        if self.ENABLE_SEMANTIC_SEARCH:
+            backends.append("semantic")
+
+        return backends
+
+    def backend_results(self, backend: str, query: str) -> ScoredCandidates:
+        """
+        Scored results of a single search method, an empty list if it fails
+        """
+        try:
+            with tracer.span("query_logic.backend", backend=backend):
+                if backend == "string":
+                    query_lower = query.lower()
+                    # key matches come first and count more than matches in the content
+                    return [
+                        (key, 1.0 if query_lower in key.lower() else 0.5)
+                        for key in self.string_match(query)
+                    ]
+                if backend == "bm25":
+                    return self.search_bm25.search_scored(query)
+                if backend == "semantic":
+                    return self.search_semantic.search_scored(query)
+        except Exception as e:
+            logger.error(f"Error in {backend} search: {e}")
+            return []
+
+        raise Exception(f"Unknown search backend {backend}")
+
+    def cached_results(self, query: str) -> Optional[List[str]]:
+        """
+        Results of a query that was already searched, None otherwise
+        """
+        if query == self.last_query and query != "" and self.last_query is not None:
+            return self.in_results_list
+
+        # deleting a character goes back to a query we already have the results for
+        cached_results = self.prefix_stack.cached_results(query) if query else None
+        if cached_results is not None:
+            self.last_query = query
+            self.in_results_list = cached_results
+
+        return cached_results
+
+    def complete(self, query: str, results: Dict[str, ScoredCandidates]) -> List[str]:
+        """
+        Merges the results of all backends and remembers them as the results of the query
+        """
+        self.last_query = query
+        self.in_results_list = self.merge(query, results)
+
+        if query:
+            self.prefix_stack.store_results(query, self.in_results_list)
+
+        return self.in_results_list
+
+    def merge(self, query: str, results: Dict[str, ScoredCandidates]) -> List[str]:
+        """
+        Fuses the results of the backends that are available, missing ones are skipped
+        """
+        logger.info("Starting query logic merge")
+        candidates = {
+            backend: [(key, score) for key, score in scored if key in self.commands]
+            for backend, scored in results.items()
+        }
+
+        return self.rank_fusion.fuse(query, candidates, self.NUMBER_ENTRIES_TO_RETURN)
+
     def string_match(self, query: str) -> List[str]:
         """String matching that returns a list instead of generator"""
         results = []
 
         try:
             if not query:
-                # For empty queries, return all keys but limit to avoid performance issues
-                count = 0
+                # For empty queries, the most frecent keys followed by the others in their order
+                results = [key for key in self.frecency.top(self.NUMBER_ENTRIES_TO_RETURN) if key in self.commands]
+                shown = set(results)
                 for key in self.commands.keys():
-                    if count >= self.NUMBER_ENTRIES_TO_RETURN:
+                    if len(results) >= self.NUMBER_ENTRIES_TO_RETURN:
                         break
-                    results.append(key)
-                    count += 1
+                    if key not in shown:
+                        results.append(key)
                 return results
 
-            # Convert query to lowercase for case-insensitive search
-            query_lower = query.lower()
-            count = 0
-
-            # First pass: exact key matches (fastest)
-            for key in self.commands.keys():
-                if count >= self.NUMBER_ENTRIES_TO_RETURN:
-                    break
-                if query_lower in key.lower():
-                    results.append(key)
-                    count += 1
-
-            # Second pass: content matches (slower, only if needed)
-            if count < self.NUMBER_ENTRIES_TO_RETURN:
-                for key in self.commands.keys():
-                    if count >= self.NUMBER_ENTRIES_TO_RETURN:
-                        break
-                    # Skip if already matched in first pass
-                    if query_lower not in key.lower():
-                        try:
-                            command_str = str(self.commands[key]).lower()
-                            if query_lower in command_str:
-                                results.append(key)
-                                count += 1
-                        except:
-                            # Skip entries that can't be converted to string
-                            continue
-
-            return results
+            # appending a character to the previous query only filters its matches
+            return self.prefix_stack.string_match(query, self.NUMBER_ENTRIES_TO_RETURN)
 
         except Exception as e:
             logger.error(f"Error in string_match: {e}")
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+
+class FanoutResult(NamedTuple):
+    """Outcome of running the search backends for a query"""
+
+    # backend name -> results of the backends that finished within the budget
+    results: Dict[str, List[str]]
+    # backends that did not finish within the budget
+    missed: List[str]
+    elapsed_ms: float
+    # backend name -> exception of the backends that failed
+    failed: Dict[str, BaseException] = {}
+
+
+class BackendFanout:
+    """
+    Runs the search backends of a query concurrently in a thread pool and collects whatever
+    finished within a latency budget.
+
+    Backends that miss the budget keep running. The results of the recent queries are kept, so
+    asking for the same query again gets the late results without running the backends again.
+    Results of backends started before the last clear are not kept.
+    """
+
+    DEFAULT_BUDGET_MS = 30
+    MAX_RECENT_RESULTS = 64
+
+    def __init__(self, backend_results: Callable[[str, str], List[str]], max_workers: int = 4):
+        """
+        :param backend_results: function receiving the backend name and the query and returning its results
+        """
+        self._backend_results = backend_results
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search_backend")
+        self._recent_results: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        # incremented by clear, results of backends started in an older generation are stale
+        self._generation = 0
+
+    def submit(self, query: str, backends: List[str]) -> Dict[str, Future]:
+        """
+        Starts all backends for the query without waiting for them
+        """
+        futures = {}
+        for backend in backends:
+            with self._lock:
+                recent_results = self._recent_results.get((backend, query))
+                generation = self._generation
+            if recent_results is not None:
+                future = Future()
+                future.set_result(recent_results)
+                futures[backend] = future
+                continue
+
+            future = self._executor.submit(self._backend_results, backend, query)
+            future.add_done_callback(
+                lambda done, backend=backend, generation=generation: self._remember(backend, query, generation, done)
+            )
+            futures[backend] = future
+
+        return futures
+
+    def collect(self, futures: Dict[str, Future], budget_ms: Optional[float] = None) -> FanoutResult:
+        """
+        Waits for the submitted backends until the budget is over
+        """
+        budget_ms = budget_ms if budget_ms is not None else self.DEFAULT_BUDGET_MS
+        start = time.perf_counter()
+        wait(futures.values(), timeout=budget_ms / 1000)
+
+        results = {}
+        missed = []
+        failed = {}
+        for backend, future in futures.items():
+            if not future.done():
+                missed.append(backend)
+            elif future.cancelled():
+                continue
+            elif future.exception():
+                failed[backend] = future.exception()
+            else:
+                results[backend] = future.result()
+
+        return FanoutResult(results, missed, (time.perf_counter() - start) * 1000, failed)
+
+    def run(self, query: str, backends: List[str], budget_ms: Optional[float] = None) -> FanoutResult:
+        return self.collect(self.submit(query, backends), budget_ms)
+
+    def _remember(self, backend: str, query: str, generation: int, future: Future) -> None:
+        if future.cancelled() or future.exception():
+            return
+
+        with self._lock:
+            if generation != self._generation:
+                # started before the entries changed
+                return
+            self._recent_results[(backend, query)] = future.result()
+            while len(self._recent_results) > self.MAX_RECENT_RESULTS:
+                self._recent_results.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Forgets the results of the recent queries, to be called when the entries change
+        """
+        with self._lock:
+            self._generation += 1
+            self._recent_results.clear()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class Bm25Index:
+    """
+    Inverted index with the statistics needed to score BM25Plus that can be updated one entry at a time.
+
+    The index is persisted as a snapshot plus a delta log of the changes done since the snapshot.
+    Loading replays the log on top of the snapshot, so changing one entry only costs appending
+    its tokens to the log instead of rebuilding and pickling the whole corpus.
+    """
+
+    SNAPSHOT_LOCATION = "/tmp/bm25_index.pickle"
+    DELTA_LOG_LOCATION = "/tmp/bm25_index.delta.jsonl"
+    # after this many logged changes the log is merged into a new snapshot
+    MAX_DELTA_LOG_SIZE = 1000
+
+    # same parameters as rank_bm25.BM25Plus
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, snapshot_location: Optional[str] = None, delta_log_location: Optional[str] = None):
+        self._snapshot_location = snapshot_location if snapshot_location else self.SNAPSHOT_LOCATION
+        self._delta_log_location = delta_log_location if delta_log_location else self.DELTA_LOG_LOCATION
+        # term -> {key: term frequency in the entry}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        # key -> {term: term frequency} of the entry
+        self.documents: Dict[str, Dict[str, int]] = {}
+        # key -> number of tokens of the entry
+        self.lengths: Dict[str, int] = {}
+        # key -> fingerprint of the text the tokens were generated from
+        self.fingerprints: Dict[str, str] = {}
+        self.total_length = 0
+        self._delta_log_size = 0
+
+    @staticmethod
+    def load(snapshot_location: Optional[str] = None, delta_log_location: Optional[str] = None) -> "Bm25Index":
+        """
+        Loads the persisted snapshot and merges the delta log into it
+        """
+        index = Bm25Index(snapshot_location, delta_log_location)
+
+        if os.path.exists(index._snapshot_location):
+            import pickle
+
+            try:
+                with open(index._snapshot_location, "rb") as f:
+                    (
+                        index.postings,
+                        index.documents,
+                        index.lengths,
+                        index.fingerprints,
+                    ) = pickle.load(f)
+                index.total_length = sum(index.lengths.values())
+            except Exception as e:
+                print(f"Could not load bm25 snapshot, starting from scratch: {e}")
+                index = Bm25Index(snapshot_location, delta_log_location)
+
+        if os.path.exists(index._delta_log_location):
+            with open(index._delta_log_location, "r") as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        # a partially written last line of a crashed writer
+                        continue
+                    index._apply(change)
+                    index._delta_log_size += 1
+
+        return index
+
+    def upsert(self, key: str, tokens: List[str], fingerprint: str) -> None:
+        """
+        Adds or replaces the tokens of a single entry
+        """
+        change = {"op": "upsert", "key": key, "tokens": tokens, "fingerprint": fingerprint}
+        self._apply(change)
+        self._log([change])
+
+    def delete(self, key: str) -> None:
+        """
+        Removes a single entry
+        """
+        if key not in self.documents:
+            return
+        change = {"op": "delete", "key": key}
+        self._apply(change)
+        self._log([change])
+
+    def sync(self, texts: Dict[str, str], tokenize: Callable[[str, str], List[str]]) -> int:
+        """
+        Brings the index up to date with the given entry texts, tokenizing only the entries that changed.
+        Returns the number of changed entries.
+        """
+        changes = []
+        for key, text in texts.items():
+            fingerprint = self.fingerprint(text)
+            if self.fingerprints.get(key) == fingerprint:
+                continue
+            changes.append({"op": "upsert", "key": key, "tokens": tokenize(key, text), "fingerprint": fingerprint})
+
+        for key in self.documents:
+            if key not in texts:
+                changes.append({"op": "delete", "key": key})
+
+        for change in changes:
+            self._apply(change)
+
+        if self._delta_log_size + len(changes) > self.MAX_DELTA_LOG_SIZE:
+            self.compact()
+        elif changes:
+            self._log(changes)
+
+        return len(changes)
+
+    def compact(self) -> None:
+        """
+        Writes a new snapshot with all changes merged and truncates the delta log
+        """
+        import pickle
+
+        tmp_location = f"{self._snapshot_location}.{os.getpid()}.tmp"
+        with open(tmp_location, "wb") as f:
+            pickle.dump((self.postings, self.documents, self.lengths, self.fingerprints), f)
+        os.replace(tmp_location, self._snapshot_location)
+
+        # changes replayed twice are harmless as both operations are idempotent
+        open(self._delta_log_location, "w").close()
+        self._delta_log_size = 0
+
+    def get_scores(self, tokens: Iterable[str]) -> Dict[str, float]:
+        """
+        BM25Plus scores of the entries containing at least one of the tokens.
+
+        BM25Plus also gives idf * delta (delta=1) to every entry for every known query token.
+        As it is the same for all entries it does not change the ranking and is left out.
+        """
+        scores: Dict[str, float] = {}
+        number_of_documents = len(self.documents)
+        if not number_of_documents:
+            return scores
+
+        average_length = self.total_length / number_of_documents
+        for token in tokens:
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+
+            idf = math.log((number_of_documents + 1) / len(postings))
+            for key, frequency in postings.items():
+                length_norm = self.K1 * (1 - self.B + self.B * self.lengths[key] / average_length)
+                score = idf * (frequency * (self.K1 + 1)) / (length_norm + frequency)
+                scores[key] = scores.get(key, 0.0) + score
+
+        return scores
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        import hashlib
+
+        return hashlib.md5(text.encode()).hexdigest()
+
+    def _apply(self, change: dict) -> None:
+        key = change["key"]
+        if key in self.documents:
+            self._remove(key)
+        if change["op"] == "upsert":
+            self._add(key, change["tokens"], change["fingerprint"])
+
+    def _add(self, key: str, tokens: List[str], fingerprint: str) -> None:
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+        self.documents[key] = frequencies
+        self.lengths[key] = len(tokens)
+        self.fingerprints[key] = fingerprint
+        self.total_length += len(tokens)
+        for token, frequency in frequencies.items():
+            self.postings.setdefault(token, {})[key] = frequency
+
+    def _remove(self, key: str) -> None:
+        frequencies = self.documents.pop(key)
+        del self.fingerprints[key]
+        self.total_length -= self.lengths.pop(key)
+
+        for token in frequencies:
+            postings = self.postings[token]
+            del postings[key]
+            if not postings:
+                del self.postings[token]
+
+    def _log(self, changes: List[dict]) -> None:
+        # a single append of whole lines keeps concurrent writers from interleaving
+        with open(self._delta_log_location, "a") as f:
+            f.write("".join(json.dumps(change) + "\n" for change in changes))
+        self._delta_log_size += len(changes)
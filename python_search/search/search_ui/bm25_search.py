@@ -1,61 +1,58 @@
-from typing import List
-import os
-from rank_bm25 import BM25Plus as BM25
-import nltk
-from python_search.entry_change import EntryChangeDetector
+import math
+from typing import Dict, List, Tuple
+from python_search.search.search_ui.bm25_index import Bm25Index
 
 
 class Bm25Search:
-    DATABASE_LOCATION = "/tmp/bm25.pickle"
-
     NUMBER_ENTRIES_TO_RETURN = 15
 
     def __init__(self, entries, number_entries_to_return=None):
+        import nltk
+
         self.tokenizer = nltk.tokenize.RegexpTokenizer(r"\w+")
         self.lemmatizer = nltk.stem.PorterStemmer()
         self.commands = entries
         self.entries: List[str] = list(self.commands.keys())
-        self.entry_change_detector = EntryChangeDetector()
+        self._positions: Dict[str, int] = {key: i for i, key in enumerate(self.entries)}
         self.bm25 = self.setup_bm25()
+        self._scoring_engine = None
         self.number_entries_to_return = (
             number_entries_to_return
             if number_entries_to_return
             else self.NUMBER_ENTRIES_TO_RETURN
         )
 
-    def searialize_database(self, bm25):
-        import pickle
-
-        with open(self.DATABASE_LOCATION, "wb") as f:
-            pickle.dump(bm25, f)
-
-        print("New bm25 config saved at /tmp/bm25.pickle")
-
-    def desearialize_database(self):
-        import pickle
-
-        with open(self.DATABASE_LOCATION, "rb") as f:
-            return pickle.load(f)
-
-    def setup_bm25(self, force_rebuild=False):
-        if (
-            os.path.exists(self.DATABASE_LOCATION)
-            and self.entry_change_detector.has_changed() is False
-        ):
-            return self.desearialize_database()
+    def setup_bm25(self) -> Bm25Index:
+        """
+        Loads the persisted index and updates only the entries that changed since it was saved
+        """
+        index = Bm25Index.load()
+        changes = index.sync(
+            {key: key + str(value) for key, value in self.commands.items()},
+            self.tokenize_entry,
+        )
+        if changes:
+            print(f"Updated {changes} entries in the bm25 index")
 
-        return self.build_bm25()
+        return index
 
-    def build_bm25(self):
-        tokenized_corpus = [
-            self.tokenize((key + str(value))) + self.split_key(key)
-            for key, value in self.commands.items()
-        ]
+    def build_bm25(self) -> Bm25Index:
+        """
+        Rebuilds the index from scratch
+        """
+        index = Bm25Index()
+        index.sync(
+            {key: key + str(value) for key, value in self.commands.items()},
+            self.tokenize_entry,
+        )
+        index.compact()
+        self.bm25 = index
+        self._scoring_engine = None
 
-        bm25 = BM25(tokenized_corpus)
-        self.searialize_database(bm25)
+        return index
 
-        return bm25
+    def tokenize_entry(self, key: str, text: str) -> List[str]:
+        return self.tokenize(text) + self.split_key(key)
 
     def split_key(self, key):
         """
@@ -78,26 +75,138 @@ class Bm25Search:
         if not query:
             return self.entries[0 : self.number_entries_to_return]
 
-        tokenized_query = self.tokenize(query)
+        matches = [key for key, _ in self.search_scored(query)]
 
-        try:
-            matches = self.bm25.get_top_n(
-                tokenized_query, self.entries, n=self.number_entries_to_return
-            )
-        except Exception:
-            self.build_bm25()
-            matches = self.bm25.get_top_n(
-                tokenized_query, self.entries, n=self.number_entries_to_return
-            )
+        # entries without any of the tokens all have the same score and come after the matches
+        matched = set(matches)
+        position = len(self.entries) - 1
+        while len(matches) < self.number_entries_to_return and position >= 0:
+            if self.entries[position] not in matched:
+                matches.append(self.entries[position])
+            position -= 1
 
         return matches
 
+    def search_scored(self, query: str) -> List[Tuple[str, float]]:
+        """
+        The best entries containing any of the query tokens with their bm25 scores
+        """
+        if not query:
+            return []
+
+        tokenized_query = self.tokenize(query)
+
+        engine = self.get_scoring_engine()
+        if engine:
+            return engine.top_n(tokenized_query, self.number_entries_to_return)
+
+        scores = self.bm25.get_scores(tokenized_query)
+
+        # equal scores rank the entry further down the entries first, the same explicit rule as the scoring engine
+        matches = sorted(
+            scores.keys(),
+            key=lambda key: (scores[key], self._positions.get(key, -1)),
+            reverse=True,
+        )[: self.number_entries_to_return]
+
+        return [(key, scores[key]) for key in matches]
+
+    def get_scoring_engine(self):
+        """
+        Builds the vectorized scoring engine on first use, returns None when numpy is not available
+        """
+        if self._scoring_engine is None:
+            try:
+                self._scoring_engine = Bm25ScoringEngine(self.bm25, self.entries)
+            except ImportError:
+                self._scoring_engine = False
+
+        return self._scoring_engine
+
     def tokenize(self, string) -> List[str]:
         tokens = self.tokenizer.tokenize(string)
         lemmas = [self.lemmatizer.stem(t) for t in tokens]
         return lemmas
 
 
+class Bm25ScoringEngine:
+    """
+    Vectorized BM25Plus scoring over a sparse term x entry matrix in CSR layout.
+
+    Every row holds the precomputed bm25 weights of one term, so a query is a few row gathers,
+    a bincount to sum them per entry and a partition of the matched entries to get the top k.
+    Returns the same ranking as sorting the BM25Plus scores of all entries and reversing it.
+    """
+
+    def __init__(self, index: Bm25Index, entries: List[str]):
+        import numpy as np
+
+        self._np = np
+        self._entries = entries
+        positions = {key: i for i, key in enumerate(entries)}
+        number_of_documents = len(entries)
+
+        lengths = np.array([index.lengths.get(key, 0) for key in entries], dtype=np.float64)
+        average_length = lengths.sum() / number_of_documents if number_of_documents else 1.0
+
+        self._rows: Dict[str, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        frequencies: List[int] = []
+        idf: List[float] = []
+        for term, postings in index.postings.items():
+            self._rows[term] = len(self._rows)
+            indices.extend(positions[key] for key in postings)
+            frequencies.extend(postings.values())
+            indptr.append(len(indices))
+            idf.append(math.log((number_of_documents + 1) / len(postings)))
+
+        self._indptr = np.array(indptr, dtype=np.int64)
+        self._indices = np.array(indices, dtype=np.int64)
+        frequency = np.array(frequencies, dtype=np.float64)
+        length_norm = Bm25Index.K1 * (1 - Bm25Index.B + Bm25Index.B * lengths[self._indices] / average_length)
+        self._weights = (
+            np.repeat(np.array(idf, dtype=np.float64), np.diff(self._indptr))
+            * frequency
+            * (Bm25Index.K1 + 1)
+            / (length_norm + frequency)
+        )
+        self._number_of_documents = number_of_documents
+
+    def top_n(self, tokens: List[str], n: int) -> List[Tuple[str, float]]:
+        """
+        The n best entries containing any of the tokens with their scores
+        """
+        np = self._np
+        rows = [self._rows[token] for token in tokens if token in self._rows]
+
+        if not rows:
+            return []
+
+        if len(rows) == 1:
+            # a row already holds every matched entry once with its final score
+            matched = self._indices[self._indptr[rows[0]] : self._indptr[rows[0] + 1]]
+            matched_scores = self._weights[self._indptr[rows[0]] : self._indptr[rows[0] + 1]]
+        else:
+            columns = np.concatenate([self._indices[self._indptr[row] : self._indptr[row + 1]] for row in rows])
+            weights = np.concatenate([self._weights[self._indptr[row] : self._indptr[row + 1]] for row in rows])
+            scores = np.bincount(columns, weights=weights, minlength=self._number_of_documents)
+            matched = np.flatnonzero(scores)
+            matched_scores = scores[matched]
+
+        if len(matched) > n:
+            # keep everything tied with the n-th best score, the ties are then broken by the position
+            threshold = np.partition(matched_scores, len(matched) - n)[len(matched) - n]
+            keep = matched_scores >= threshold
+            matched, matched_scores = matched[keep], matched_scores[keep]
+        # the best score first and, on equal scores, the entry further down the entries first
+        order = np.lexsort((-matched, -matched_scores))[:n]
+
+        return [
+            (self._entries[position], float(score)) for position, score in zip(matched[order], matched_scores[order])
+        ]
+
+
 if __name__ == "__main__":
     import fire
 
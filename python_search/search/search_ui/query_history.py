@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from python_search.events.event_log import EventLog
+
+QUERY_HISTORY_LOCATION = os.environ["HOME"] + "/.python_search/data/query_history"
+
+
+class QueryHistory:
+    """
+    The keys run from the search ui, navigated from the latest with the . and , keys.
+
+    The runs are appended to an EventLog and read backwards lazily: the first navigation of a
+    session reads only the last block of the log and the events read are kept, so every further
+    step back costs the read of at most one more event.
+
+    The first time the history is used and still empty, the runs saved in tiny data warehouse
+    before it existed are imported once.
+    """
+
+    # file in the folder of the log recording that the tiny data warehouse runs were imported
+    IMPORTED_MARKER = "data_warehouse_imported"
+
+    def __init__(self, location: Optional[str] = None):
+        self._event_log = EventLog(location if location else QUERY_HISTORY_LOCATION)
+        self._events: Optional[Iterator[dict]] = None
+        # the events read so far, the latest first
+        self._loaded: List[dict] = []
+        self._import_checked = False
+
+    def append(self, key: str, query: str = "", type_sequence: str = "") -> None:
+        self._import_once()
+        event = {"key": key, "query": query, "type_sequence": type_sequence, "timestamp": time.time()}
+        self._event_log.append(event)
+        if self._events is not None:
+            # the reader started before this event so it will not return it
+            self._loaded.insert(0, event)
+
+    def get(self, position: int) -> Optional[dict]:
+        """
+        The run at the position counting back from the latest one, None if there is no such run
+        """
+        if position < 0:
+            return None
+
+        if self._events is None:
+            self._import_once()
+            self._events = self._event_log.read_reverse()
+
+        while len(self._loaded) <= position:
+            event = next(self._events, None)
+            if event is None:
+                return None
+            self._loaded.append(event)
+
+        return self._loaded[position]
+
+    def get_key(self, position: int) -> str:
+        event = self.get(position)
+
+        return event["key"] if event else ""
+
+    def import_data_warehouse(self, event_name: str = "python_search_run_key") -> int:
+        """
+        Appends the runs saved in tiny data warehouse before this history existed, oldest first.
+        Only the first call imports them, the next ones return 0.
+        """
+        self._import_checked = True
+        with self._import_lock():
+            if os.path.exists(self._marker_location()):
+                return 0
+
+            from tiny_data_warehouse import DataWarehouse
+
+            df = DataWarehouse().event(event_name)
+            rows = df.sort_values(by="tdw_timestamp").to_dict("records") if len(df) else []
+            for row in rows:
+                self.append(row["key"], row.get("query", ""), row.get("type_sequence", ""))
+            self._mark_imported()
+
+        return len(rows)
+
+    def _import_once(self) -> None:
+        """
+        Imports the tiny data warehouse runs if the log is still empty, checked once per instance
+        """
+        if self._import_checked:
+            return
+        self._import_checked = True
+        if os.path.exists(self._marker_location()):
+            return
+
+        if self._event_log.segments():
+            # runs were written before the import existed, older runs would come after them
+            with self._import_lock():
+                self._mark_imported()
+            return
+
+        try:
+            self.import_data_warehouse()
+        except (ImportError, ValueError):
+            # without tiny data warehouse or the event in it there are no older runs
+            with self._import_lock():
+                self._mark_imported()
+        except Exception as e:
+            from python_search.logger import setup_term_ui_logger
+
+            setup_term_ui_logger().warning(f"Could not import the query history of tiny data warehouse: {e}")
+
+    def _marker_location(self) -> str:
+        return os.path.join(self._event_log.location, self.IMPORTED_MARKER)
+
+    def _mark_imported(self) -> None:
+        open(self._marker_location(), "w").close()
+
+    @contextmanager
+    def _import_lock(self):
+        import fcntl
+
+        os.makedirs(self._event_log.location, exist_ok=True)
+        with open(os.path.join(self._event_log.location, f"{self.IMPORTED_MARKER}.lock"), "w") as f:
+            # closing the file releases the lock
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            yield
+
+
+def main():
+    import fire
+
+    fire.Fire(QueryHistory)
+
+
+if __name__ == "__main__":
+    main()
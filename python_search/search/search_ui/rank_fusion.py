@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import heapq
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+# a ranked list of (key, score) pairs, best first
+ScoredCandidates = List[Tuple[str, float]]
+Weights = Dict[str, float]
+
+
+def default_weights(query: str) -> Weights:
+    """
+    Short queries are mostly prefixes of keys so exact string matches get the most weight,
+    longer ones are better served by bm25
+    """
+    if len(query) <= 3:
+        return {"string": 1.0, "bm25": 0.6, "semantic": 0.4}
+
+    return {"bm25": 1.0, "string": 0.8, "semantic": 0.5}
+
+
+class RankFusion:
+    """
+    Fuses the ranked candidates of the search backends into a single ranking.
+
+    Every candidate gets, for each backend returning it, the weighted reciprocal rank
+    plus the weighted backend score normalized to [0, 1]. Boosts like the recency or the
+    frequency of use of an entry are added on top. It is a single pass over the bounded
+    top k lists of the backends, so the cost does not depend on the number of entries.
+    """
+
+    # the k of reciprocal rank fusion, dampens the difference between the first ranks
+    RRF_K = 60
+    # how much the normalized scores count compared to the reciprocal ranks
+    SCORE_WEIGHT = 0.5
+
+    def __init__(
+        self,
+        weights: Optional[Union[Weights, Callable[[str], Weights]]] = None,
+        boosts: Optional[List[Tuple[Callable[[str], float], float]]] = None,
+    ):
+        """
+        :param weights: backend name -> weight, or a function returning them for a query
+        :param boosts: pairs of a function returning a value in [0, 1] for a key and its weight
+        """
+        self._weights = weights if weights else default_weights
+        self._boosts = boosts if boosts else []
+
+    def add_boost(self, boost: Callable[[str], float], weight: float) -> None:
+        self._boosts.append((boost, weight))
+
+    def fuse(self, query: str, candidates: Dict[str, ScoredCandidates], limit: int) -> List[str]:
+        weights = self._weights(query) if callable(self._weights) else self._weights
+
+        fused: Dict[str, float] = {}
+        # the first time a key was seen breaks ties so the fusion is deterministic
+        first_seen: Dict[str, int] = {}
+        for backend, scored in candidates.items():
+            weight = weights.get(backend, 0.0)
+            if not scored or not weight:
+                continue
+
+            scores = [score for _, score in scored]
+            lowest, highest = min(scores), max(scores)
+            spread = highest - lowest
+
+            for rank, (key, score) in enumerate(scored):
+                normalized = (score - lowest) / spread if spread else 1.0
+                contribution = weight * (1 / (self.RRF_K + rank + 1) + self.SCORE_WEIGHT * normalized / self.RRF_K)
+                fused[key] = fused.get(key, 0.0) + contribution
+                first_seen.setdefault(key, len(first_seen))
+
+        for boost, weight in self._boosts:
+            for key in fused:
+                fused[key] += weight * boost(key) / self.RRF_K
+
+        return heapq.nsmallest(limit, fused, key=lambda key: (-fused[key], first_seen[key]))
+
+    @staticmethod
+    def recency_boost(recent_keys: List[str]) -> Callable[[str], float]:
+        """
+        1 for the last used key decreasing with how long ago a key was used, 0 if it was not used recently
+        """
+        positions = {}
+        for position, key in enumerate(recent_keys):
+            positions.setdefault(key, position)
+
+        return lambda key: 1 / (1 + positions[key]) if key in positions else 0.0
+
+    @staticmethod
+    def frequency_boost(usage_counts: Dict[str, int]) -> Callable[[str], float]:
+        """
+        Usage count of a key relative to the most used one
+        """
+        highest = max(usage_counts.values()) if usage_counts else 0
+
+        return lambda key: usage_counts.get(key, 0) / highest if highest else 0.0
@@ -0,0 +1,226 @@
+"""
+Long lived search process for the terminal ui.
+
+Loading the entries project and building the search indexes is the most expensive
+part of opening the search window. The daemon does it once and keeps the
+configuration, the QueryLogic indexes and the bm25 model in memory. The terminal ui
+then connects to it via a unix socket and only sends queries.
+
+The protocol is one json object per line in both directions:
+    {"method": "search", "query": "foo"} -> {"result": ["foo key", ...]}
+
+A reload always imports the entries project again, with "if_changed" only when one of its files changed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from typing import List, Optional
+
+from python_search.logger import setup_term_ui_logger
+
+SOCKET_PATH = "/tmp/python_search_daemon.sock"
+
+logger = setup_term_ui_logger()
+
+
+class SearchDaemon:
+    """
+    Holds the loaded entries and the search logic in memory and serves them over a unix socket.
+
+    Start it with: pys _search_daemon start
+    """
+
+    def __init__(self, socket_path: str = SOCKET_PATH):
+        self._socket_path = socket_path
+        self._lock = threading.Lock()
+        self._configuration = None
+        self._commands: dict = {}
+        self._search_logic = None
+        self._server = None
+        self._change_detector = None
+
+    def start(self):
+        """
+        Loads the entries and serves requests until the process is killed
+        """
+        self._load()
+        self.serve()
+
+    def serve(self):
+        """
+        Serves requests with the currently loaded entries
+        """
+        if os.path.exists(self._socket_path):
+            if SearchDaemonClient.connect(self._socket_path):
+                raise Exception(f"A search daemon is already listening on {self._socket_path}")
+            os.remove(self._socket_path)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        response = daemon.handle(json.loads(line))
+                    except Exception as e:
+                        logger.error(f"Search daemon failed to handle request: {e}")
+                        response = {"error": str(e)}
+                    self.wfile.write((json.dumps(response) + "\n").encode())
+                    self.wfile.flush()
+
+        self._server = socketserver.ThreadingUnixStreamServer(self._socket_path, Handler)
+        self._server.daemon_threads = True
+        print(f"Search daemon listening on {self._socket_path} with {len(self._commands)} entries")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self._socket_path):
+                os.remove(self._socket_path)
+
+    def stop(self):
+        """
+        Stops a running daemon
+        """
+        client = SearchDaemonClient.connect(self._socket_path)
+        if not client:
+            print("No search daemon running")
+            return
+        client.shutdown()
+
+    def handle(self, request: dict) -> dict:
+        method = request.get("method")
+
+        if method == "ping":
+            return {"result": "pong"}
+
+        if method == "entries":
+            return {"result": self._commands}
+
+        if method == "search":
+            with self._lock:
+                return {"result": self._search_logic.search(request.get("query", ""))}
+
+        if method == "reload":
+            self._load(reload=True, if_changed=request.get("if_changed", False))
+            return {"result": len(self._commands)}
+
+        if method == "shutdown":
+            # shutdown blocks until the serving loop exits so it cannot run in the handler thread
+            threading.Thread(target=self._server.shutdown).start()
+            return {"result": "bye"}
+
+        raise Exception(f"Unknown method {method}")
+
+    def _load(self, reload=False, if_changed=False):
+        from python_search.configuration.entries_snapshot import EntriesSnapshot
+        from python_search.configuration.loader import ConfigurationLoader
+        from python_search.entry_change import EntryChangeDetector
+        from python_search.search.search_ui.QueryLogic import QueryLogic
+
+        if if_changed and self._change_detector and not self._change_detector.changed_files(update=False):
+            # no file of the entries project changed so there is no need to import it again
+            return
+
+        loader = ConfigurationLoader()
+        project_root = loader.get_entries_project_root()
+        files = EntriesSnapshot.file_signatures(project_root)
+        configuration = loader.reload() if reload else loader.load_config()
+        # other processes read the entries from the snapshot instead of importing the project
+        commands = EntriesSnapshot.write(configuration, files, project_root).serialized_entries()
+
+        if self._change_detector is None:
+            # the state only lives in memory, it describes what this daemon has loaded
+            self._change_detector = EntryChangeDetector(
+                state_file=f"{self._socket_path}.entries_state.json",
+                project_root=project_root,
+            )
+        # the files are only recorded as loaded once the import succeeded
+        changes = self._change_detector.detect(commands, save=False)
+
+        with self._lock:
+            if self._search_logic:
+                if changes:
+                    logger.info(f"Re-indexing {len(changes.keys())} changed entries")
+                    self._search_logic.update_entries(commands)
+            else:
+                self._search_logic = QueryLogic(commands)
+            self._configuration = configuration
+            self._commands = commands
+
+
+class SearchDaemonClient:
+    """
+    Thin client of the search daemon. Exposes the same search api as QueryLogic
+    so the terminal ui can use either of them.
+    """
+
+    CONNECT_TIMEOUT_SECONDS = 0.05
+    REQUEST_TIMEOUT_SECONDS = 30
+
+    def __init__(self, connection: socket.socket):
+        self._connection = connection
+        self._reader = connection.makefile("rb")
+
+    @staticmethod
+    def connect(socket_path: str = SOCKET_PATH) -> Optional["SearchDaemonClient"]:
+        """
+        Returns a connected client or None when no daemon is running
+        """
+        if not os.path.exists(socket_path):
+            return None
+
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(SearchDaemonClient.CONNECT_TIMEOUT_SECONDS)
+        try:
+            connection.connect(socket_path)
+        except OSError:
+            connection.close()
+            return None
+        connection.settimeout(SearchDaemonClient.REQUEST_TIMEOUT_SECONDS)
+
+        return SearchDaemonClient(connection)
+
+    def search(self, query: str) -> List[str]:
+        return self._request("search", query=query)
+
+    def entries(self) -> dict:
+        return self._request("entries")
+
+    def reload(self, if_changed: bool = False) -> int:
+        return self._request("reload", if_changed=if_changed)
+
+    def shutdown(self):
+        return self._request("shutdown")
+
+    def _request(self, method: str, **params):
+        payload = {"method": method, **params}
+        self._connection.sendall((json.dumps(payload) + "\n").encode())
+        line = self._reader.readline()
+        if not line:
+            raise Exception("Search daemon closed the connection")
+
+        response = json.loads(line)
+        if "error" in response:
+            raise Exception(f"Search daemon error: {response['error']}")
+
+        return response["result"]
+
+    def close(self):
+        self._reader.close()
+        self._connection.close()
+
+
+def main():
+    import fire
+
+    fire.Fire(SearchDaemon)
+
+
+if __name__ == "__main__":
+    main()
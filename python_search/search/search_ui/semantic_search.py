@@ -1,26 +1,119 @@
 from python_search.search.entries_loader import EntriesLoader
-import tqdm
+from typing import Callable, Dict, List, Optional, Tuple
 import os
 
 CHROMA_DB_PATH = os.environ["HOME"] + "/.chroma_python_search.db"
+EMBEDDINGS_CACHE_PATH = os.environ["HOME"] + "/.python_search_embeddings_cache.pickle"
+
+
+class EmbeddingCache:
+    """
+    Embeddings of the entry documents keyed by the hash of their content, so an unchanged
+    document is never embedded again, even after the chroma collection was dropped.
+    """
+
+    def __init__(self, location: Optional[str] = None):
+        self._location = location if location else EMBEDDINGS_CACHE_PATH
+        self._embeddings: Dict[str, List[float]] = {}
+
+        if os.path.exists(self._location):
+            import pickle
+
+            try:
+                with open(self._location, "rb") as f:
+                    self._embeddings = pickle.load(f)
+            except Exception as e:
+                print(f"Could not load the embeddings cache, starting from scratch: {e}")
+
+    def embed(self, documents: List[str], embedding_function: Callable[[List[str]], List]) -> List[List[float]]:
+        """
+        Embeddings of the documents, only the ones not in the cache are sent to the embedding function
+        """
+        hashes = [self.content_hash(document) for document in documents]
+        missing = {}
+        for content_hash, document in zip(hashes, documents):
+            if content_hash not in self._embeddings:
+                missing[content_hash] = document
+
+        if missing:
+            embeddings = embedding_function(list(missing.values()))
+            for content_hash, embedding in zip(missing.keys(), embeddings):
+                self._embeddings[content_hash] = [float(value) for value in embedding]
+
+        return [self._embeddings[content_hash] for content_hash in hashes]
+
+    def save(self, keep_hashes: Optional[set] = None) -> None:
+        """
+        Persists the cache, dropping the embeddings of documents that no longer exist if keep_hashes is given
+        """
+        import pickle
+
+        if keep_hashes is not None:
+            self._embeddings = {
+                content_hash: embedding
+                for content_hash, embedding in self._embeddings.items()
+                if content_hash in keep_hashes
+            }
+
+        tmp_location = f"{self._location}.{os.getpid()}.tmp"
+        with open(tmp_location, "wb") as f:
+            pickle.dump(self._embeddings, f)
+        os.replace(tmp_location, self._location)
+
+    def __len__(self) -> int:
+        return len(self._embeddings)
+
+    @staticmethod
+    def content_hash(document: str) -> str:
+        import hashlib
+
+        return hashlib.md5(document.encode()).hexdigest()
 
 
 class SemanticSearch:
-    def __init__(self, entries: dict = None, number_entries_to_return=None):
-        self.get_chroma_instance()
+    # number of entries embedded and upserted in a single call
+    BATCH_SIZE = 256
+
+    def __init__(self, entries: dict = None, number_entries_to_return=None, batch_size=None, backend=None):
+        """
+        :param backend: "chroma" or "numpy", defaults to the one of the configuration
+        """
         if entries:
-            self.entries = EntriesLoader.convert_to_list_of_entries(entries)
+            self.entries = list(EntriesLoader.convert_to_list_of_entries(entries))
         else:
-            self.entries = EntriesLoader.load_all_entries()
+            self.entries = list(EntriesLoader.load_all_entries())
+        self.batch_size = batch_size if batch_size else self.BATCH_SIZE
+        self.backend = backend if backend else self.configured_backend()
+        self._embedding_function = None
+        self._documents = None
+
+        self.number_entries_to_return = number_entries_to_return if number_entries_to_return else 15
 
+        if self.backend == "numpy":
+            # only rebuilt if an entry changed since the index was saved
+            self.vector_index = self.setup_vector_index()
+            return
+
+        self.get_chroma_instance()
         try:
             self.collection = self.client.get_collection("entries")
         except Exception:
-            self.setup_entries()
+            self.collection = None
+        # the collection remembers the digest of the entries it was synced with
+        if self.collection is None or (self.collection.metadata or {}).get("entries_digest") != self.entries_digest():
+            self.collection = self.setup_entries()
 
-        self.number_entries_to_return = (
-            number_entries_to_return if number_entries_to_return else 15
-        )
+    @staticmethod
+    def configured_backend() -> str:
+        """
+        The backend of the configuration, read from the entries snapshot so the entries project is not imported
+        """
+        from python_search.configuration.entries_snapshot import EntriesSnapshot
+
+        snapshot = EntriesSnapshot.open()
+        backend = snapshot.configuration_flag("semantic_search_backend") if snapshot is not None else None
+
+        return backend if backend else "chroma"
 
     def get_chroma_instance(self):
         import chromadb
@@ -28,32 +121,129 @@ class SemanticSearch:
         self.client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
         return self.client
 
-    def setup_entries(self):
-        print("Setting up documents")
-        existing_ids = self.client.get_or_create_collection("entries").get()["ids"]
-        missing_entries = [
-            entry for entry in self.entries if entry.key not in existing_ids
-        ]
-        print("Found ", len(missing_entries), " missing entries")
+    def setup_entries(self, batch_size=None):
+        """
+        Brings the collection up to date with the entries: new and changed entries are upserted
+        in batches with their cached embeddings and removed entries are deleted.
+        With the numpy backend the vector index is rebuilt instead.
+        """
+        batch_size = batch_size if batch_size else self.batch_size
+        if self.backend == "numpy":
+            self.vector_index = self.setup_vector_index(batch_size)
+            return self.vector_index
 
         collection = self.client.get_or_create_collection("entries")
-        for entry in tqdm.tqdm(missing_entries):
+
+        # only the metadata is fetched, it holds the hash of the document each entry was embedded from
+        existing = collection.get(include=["metadatas"])
+        indexed_hashes = {
+            key: (metadata or {}).get("content_hash") for key, metadata in zip(existing["ids"], existing["metadatas"])
+        }
+
+        documents, hashes = self.documents()
+        changed = [key for key in documents if indexed_hashes.get(key) != hashes[key]]
+        removed = [key for key in indexed_hashes if key not in documents]
+        print("Found ", len(changed), " new or changed entries and ", len(removed), " removed entries")
+
+        for start in range(0, len(removed), batch_size):
+            collection.delete(ids=removed[start : start + batch_size])
+
+        cache = EmbeddingCache()
+        for start in range(0, len(changed), batch_size):
+            keys = changed[start : start + batch_size]
+            batch = [documents[key] for key in keys]
             collection.upsert(
-                documents=[
-                    entry.key + " " + entry.get_content_str() + entry.get_type_str()
-                ],
-                ids=[entry.key],
+                ids=keys,
+                documents=batch,
+                embeddings=cache.embed(batch, self.embedding_function()),
+                metadatas=[{"content_hash": hashes[key]} for key in keys],
             )
 
+        if changed or removed:
+            cache.save(keep_hashes=set(hashes.values()))
+        collection.modify(metadata={"entries_digest": self.entries_digest()})
+
         return collection
 
+    def setup_vector_index(self, batch_size=None):
+        """
+        Rebuilds the numpy vector index if any entry changed, only new or changed entries are embedded
+        """
+        from python_search.search.search_ui.vector_index import NumpyVectorIndex
+
+        batch_size = batch_size if batch_size else self.batch_size
+        documents, hashes = self.documents()
+
+        existing = NumpyVectorIndex.load()
+        if existing is not None and dict(zip(existing.keys, existing.hashes)) == hashes:
+            return existing
+
+        cache = EmbeddingCache()
+        keys = list(documents.keys())
+        embeddings = []
+        for start in range(0, len(keys), batch_size):
+            batch = [documents[key] for key in keys[start : start + batch_size]]
+            embeddings.extend(cache.embed(batch, self.embedding_function()))
+
+        index = NumpyVectorIndex.build(keys, [hashes[key] for key in keys], embeddings)
+        index.save()
+        cache.save(keep_hashes=set(hashes.values()))
+
+        return index
+
+    def embedding_function(self):
+        """
+        The embedding model chroma uses by default, it runs locally without the database
+        """
+        if self._embedding_function is None:
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+            self._embedding_function = DefaultEmbeddingFunction()
+
+        return self._embedding_function
+
+    def documents(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        The document embedded for every entry key and the hash of each document
+        """
+        if self._documents is None:
+            documents = {entry.key: self.document_for(entry) for entry in self.entries}
+            hashes = {key: EmbeddingCache.content_hash(document) for key, document in documents.items()}
+            self._documents = (documents, hashes)
+
+        return self._documents
+
+    def entries_digest(self) -> str:
+        """
+        A single hash of all entry documents, it changes when any entry is added, changed or removed
+        """
+        _, hashes = self.documents()
+        return EmbeddingCache.content_hash("".join(f"{key}\0{content_hash}\0" for key, content_hash in hashes.items()))
+
+    @staticmethod
+    def document_for(entry) -> str:
+        return entry.key + " " + entry.get_content_str() + entry.get_type_str()
+
     def search(self, query: str):
+        return [key for key, _ in self.search_scored(query)]
+
+    def search_scored(self, query: str):
+        """
+        The closest entries with a similarity score, higher is closer
+        """
         if not query:
             query = ""
+
+        if self.backend == "numpy":
+            query_embedding = self.embedding_function()([query])[0]
+            return self.vector_index.top_k(query_embedding, self.number_entries_to_return)
+
         results = self.collection.query(
-            query_texts=[query], n_results=self.number_entries_to_return, include=[]
-        )["ids"][0]
-        return results
+            query_texts=[query],
+            n_results=self.number_entries_to_return,
+            include=["distances"],
+        )
+        return [(key, 1 / (1 + distance)) for key, distance in zip(results["ids"][0], results["distances"][0])]
 
 
 if __name__ == "__main__":
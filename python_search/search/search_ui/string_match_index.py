@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class StringMatchIndex:
+    """
+    Case insensitive substring search over the keys and the contents of the entries.
+
+    Keys and contents are lowercased once and indexed by their trigrams, so a query only
+    verifies the entries that contain all trigrams of it instead of scanning the whole corpus.
+    Results keep the order of the entries with the key matches before the content matches,
+    entries added after the index was built come after the existing ones.
+    """
+
+    GRAM_SIZE = 3
+    # candidate sets bigger than this are walked in entry order instead of sorted
+    MAX_CANDIDATES_TO_SORT = 4096
+
+    def __init__(self, commands: Optional[dict] = None):
+        # the id of an entry is its position in insertion order, removed entries leave a None behind
+        self._keys: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._raw_contents: List[Optional[str]] = []
+        self._lower_keys: List[Optional[str]] = []
+        self._lower_contents: List[Optional[str]] = []
+        self._key_grams: Dict[str, Set[int]] = {}
+        self._content_grams: Dict[str, Set[int]] = {}
+
+        if commands:
+            self.sync(commands)
+
+    def sync(self, commands: dict) -> int:
+        """
+        Updates the index to match the given entries, re-indexing only the ones that changed.
+        Returns the number of changed entries.
+        """
+        changes = 0
+        for key, value in commands.items():
+            if self.update(key, value):
+                changes += 1
+
+        for key in [key for key in self._ids if key not in commands]:
+            self.remove(key)
+            changes += 1
+
+        if len(self._keys) > 2 * len(self._ids) + 1000:
+            self._compact()
+
+        return changes
+
+    def update(self, key: str, value) -> bool:
+        """
+        Adds or updates a single entry, returns False if it did not change
+        """
+        content = str(value)
+        entry_id = self._ids.get(key)
+
+        if entry_id is not None:
+            if self._raw_contents[entry_id] == content:
+                return False
+            self._unindex(self._content_grams, self._lower_contents[entry_id], entry_id)
+        else:
+            entry_id = len(self._keys)
+            self._ids[key] = entry_id
+            self._keys.append(key)
+            self._lower_keys.append(key.lower())
+            self._raw_contents.append(None)
+            self._lower_contents.append(None)
+            self._index(self._key_grams, self._lower_keys[entry_id], entry_id)
+
+        self._raw_contents[entry_id] = content
+        self._lower_contents[entry_id] = content.lower()
+        self._index(self._content_grams, self._lower_contents[entry_id], entry_id)
+
+        return True
+
+    def remove(self, key: str) -> None:
+        entry_id = self._ids.pop(key, None)
+        if entry_id is None:
+            return
+
+        self._unindex(self._key_grams, self._lower_keys[entry_id], entry_id)
+        self._unindex(self._content_grams, self._lower_contents[entry_id], entry_id)
+        self._keys[entry_id] = None
+        self._raw_contents[entry_id] = None
+        self._lower_keys[entry_id] = None
+        self._lower_contents[entry_id] = None
+
+    def search(self, query: str, limit: int) -> List[str]:
+        """
+        Returns up to limit keys containing the query, key matches first
+        """
+        query = query.lower()
+
+        key_matches = self._matching_ids(self._key_grams, self._lower_keys, query, limit, set())
+        content_matches = []
+        if len(key_matches) < limit:
+            content_matches = self._matching_ids(
+                self._content_grams,
+                self._lower_contents,
+                query,
+                limit - len(key_matches),
+                set(key_matches),
+            )
+
+        return self.keys_of(key_matches + content_matches)
+
+    def match_ids(self, query: str) -> Tuple[List[int], List[int]]:
+        """
+        All ids of the entries matching the query, split in key matches and content only matches
+        """
+        query = query.lower()
+        key_matches = self._matching_ids(self._key_grams, self._lower_keys, query, None, set())
+        content_matches = self._matching_ids(self._content_grams, self._lower_contents, query, None, set(key_matches))
+
+        return key_matches, content_matches
+
+    def refine_ids(self, query: str, key_ids: List[int], content_ids: List[int]) -> Tuple[List[int], List[int]]:
+        """
+        Same as match_ids for a query that extends the one key_ids and content_ids were matched with.
+        Only the previous matches are checked, everything else cannot contain the longer query.
+        """
+        query = query.lower()
+        key_matches = []
+        lost_key_match = []
+        for entry_id in key_ids:
+            text = self._lower_keys[entry_id]
+            if text is None:
+                continue
+            if query in text:
+                key_matches.append(entry_id)
+            else:
+                lost_key_match.append(entry_id)
+
+        content_matches = [
+            entry_id
+            for entry_id in heapq.merge(lost_key_match, content_ids)
+            if self._lower_contents[entry_id] is not None and query in self._lower_contents[entry_id]
+        ]
+
+        return key_matches, content_matches
+
+    def keys_of(self, ids: Iterable[int]) -> List[str]:
+        return [self._keys[entry_id] for entry_id in ids]
+
+    def keys(self) -> Iterable[str]:
+        return self._ids.keys()
+
+    def _matching_ids(
+        self,
+        grams_index: Dict[str, Set[int]],
+        texts: List[Optional[str]],
+        query: str,
+        limit: Optional[int],
+        exclude: Set[int],
+    ) -> List[int]:
+        if len(query) < self.GRAM_SIZE:
+            # short queries match most entries, walking them in order finds enough quickly
+            candidates = range(len(texts))
+        else:
+            grams = sorted(
+                (grams_index.get(gram, set()) for gram in self._grams(query)),
+                key=len,
+            )
+            matching = set.intersection(*grams)
+            if limit is None or len(matching) <= self.MAX_CANDIDATES_TO_SORT:
+                candidates = sorted(matching)
+            else:
+                candidates = (entry_id for entry_id in range(len(texts)) if entry_id in matching)
+
+        result = []
+        for entry_id in candidates:
+            text = texts[entry_id]
+            if text is None or entry_id in exclude or query not in text:
+                continue
+            result.append(entry_id)
+            if limit is not None and len(result) >= limit:
+                break
+
+        return result
+
+    def _grams(self, text: str) -> Set[str]:
+        return {text[i : i + self.GRAM_SIZE] for i in range(len(text) - self.GRAM_SIZE + 1)}
+
+    def _index(self, grams_index: Dict[str, Set[int]], text: str, entry_id: int) -> None:
+        for gram in self._grams(text):
+            grams_index.setdefault(gram, set()).add(entry_id)
+
+    def _unindex(self, grams_index: Dict[str, Set[int]], text: str, entry_id: int) -> None:
+        for gram in self._grams(text):
+            ids = grams_index[gram]
+            ids.discard(entry_id)
+            if not ids:
+                del grams_index[gram]
+
+    def _compact(self) -> None:
+        compacted = StringMatchIndex()
+        for key, entry_id in self._ids.items():
+            compacted.update(key, self._raw_contents[entry_id])
+        self.__dict__.update(compacted.__dict__)
+
+
+class PrefixSearchStack:
+    """
+    Bounded stack with the matches of the last queries typed, each of them a prefix of the next one.
+
+    Typing one more character only filters the matches of the previous query and deleting one
+    goes back to the matches, and the final results, cached for the shorter query.
+    """
+
+    MAX_SIZE = 32
+
+    class Frame:
+        __slots__ = ("query", "key_ids", "content_ids", "results")
+
+        def __init__(self, query: str, key_ids: List[int], content_ids: List[int]):
+            self.query = query
+            self.key_ids = key_ids
+            self.content_ids = content_ids
+            self.results: Optional[List[str]] = None
+
+    def __init__(self, index: StringMatchIndex, max_size: Optional[int] = None):
+        self._index = index
+        self._max_size = max_size if max_size else self.MAX_SIZE
+        self._frames: List[PrefixSearchStack.Frame] = []
+
+    def string_match(self, query: str, limit: int) -> List[str]:
+        frame = self._frame_for(query)
+        if not frame:
+            return self._index.search(query, limit)
+
+        ids = frame.key_ids[:limit]
+        if len(ids) < limit:
+            ids += frame.content_ids[: limit - len(ids)]
+
+        return self._index.keys_of(ids)
+
+    def cached_results(self, query: str) -> Optional[List[str]]:
+        """
+        The final results stored for the query if it is still on the stack
+        """
+        query = query.lower()
+        for frame in reversed(self._frames):
+            if frame.query == query:
+                return frame.results
+
+        return None
+
+    def store_results(self, query: str, results: List[str]) -> None:
+        frame = self._frame_for(query)
+        if frame:
+            frame.results = results
+
+    def clear(self) -> None:
+        self._frames = []
+
+    def _frame_for(self, query: str) -> Optional["PrefixSearchStack.Frame"]:
+        query = query.lower()
+        while self._frames and not query.startswith(self._frames[-1].query):
+            self._frames.pop()
+
+        if self._frames and self._frames[-1].query == query:
+            return self._frames[-1]
+
+        if len(query) < self._index.GRAM_SIZE:
+            # short queries match too many entries to be worth keeping
+            return None
+
+        if self._frames:
+            previous = self._frames[-1]
+            key_ids, content_ids = self._index.refine_ids(query, previous.key_ids, previous.content_ids)
+        else:
+            key_ids, content_ids = self._index.match_ids(query)
+
+        self._frames.append(PrefixSearchStack.Frame(query, key_ids, content_ids))
+        if len(self._frames) > self._max_size:
+            self._frames.pop(0)
+
+        return self._frames[-1]
@@ -1,24 +1,34 @@
+import asyncio
+import functools
 import os
 import sys
-from typing import Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
 import json
 import time
 import shutil
 
 from python_search.core_entities import Entry
+from python_search.events.event_sink import get_event_sink
+from python_search.search.entry_store import EntryStore
 from python_search.search.search_ui.QueryLogic import QueryLogic
+from python_search.search.search_ui.query_history import QueryHistory
 from python_search.search.search_ui.search_actions import Actions
-from python_search.search.search_ui.search_utils import setup_datadog
+from python_search.search.search_ui.search_daemon import SearchDaemonClient
 
 from python_search.apps.theme.theme import get_current_theme
 from python_search.host_system.system_paths import SystemPaths
 from python_search.logger import setup_term_ui_logger
+from python_search.metrics import get_metrics
+from python_search.tracing import get_tracer
 from getch import getch
 
 logger = setup_term_ui_logger()
 
 startup_time = time.time_ns()
-statsd = setup_datadog()
+metrics = get_metrics()
+tracer = get_tracer()
 
 # disable hugging face warning about forking token paralelism when reloading entries
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
@@ -29,7 +39,9 @@ class SearchTerminalUi:
     MAX_CONTENT_SIZE = 53  # Reduced by 7 characters from previous 60
     RUN_KEY_EVENT = "python_search_run_key"
     DEFAULT_DISPLAY_ROWS = 7  # Default number of rows to display at once
-    DEBOUNCE_DELAY_MS = 75  # 75ms debounce delay
+    DEBOUNCE_DELAY_MS = 75  # delay before the slow search backends run for a query
+    # keys acting on one of the results: enter, tab, copy and the numbers running an entry
+    RESULT_KEYS = ["\n", "\t", "'", "1", "2", "3", "4", "5", "6", "7", "8", "9"]
 
     _documents_future = None
     commands = None
@@ -42,11 +54,12 @@ class SearchTerminalUi:
         self.previous_query = ""
         self.typed_up_to_run = ""
         self.tdw = None
+        self.query_history = QueryHistory()
         self.reloaded = False
         self.first_run = True
-        self._last_search_time = 0
         self.scroll_offset = 0  # For pagination
         self.all_matched_keys = []  # Store all search results
+        self.results_query = None  # query all_matched_keys are the results of
         self.query = ""
         self.selected_row = 0
         self.selected_query = -1
@@ -130,7 +143,7 @@ class SearchTerminalUi:
         """
         Rrun the application main loop
         """
-        statsd.increment("ps_run_triggered")
+        metrics.increment("ps_run_triggered")
         # hide cursor
         print("\033[?25l", end="")
         self.query = ""
@@ -139,21 +152,127 @@ class SearchTerminalUi:
         self.scroll_offset = 0
         end_startup = time.time_ns()
         duration_startup_seconds = (end_startup - startup_time) / 1000**3
-        statsd.histogram("ps_startup_no_render_seconds", duration_startup_seconds)
+        metrics.histogram("ps_startup_no_render_seconds", duration_startup_seconds)
 
+        asyncio.run(self._run_async())
+
+    async def _run_async(self):
+        """
+        Key input, searching and rendering run as separate tasks so a slow search backend
+        never delays echoing what was typed
+        """
+        self._loop = asyncio.get_running_loop()
+        self._search_executor = ThreadPoolExecutor(max_workers=1)
+        self._search_task = None
+        self._search_cancelled = threading.Event()
+        keys = asyncio.Queue()
+        self._start_key_reader(keys)
+
+        self._start_search()
         self.render()
         self.first_run = False
 
         while True:
-            # blocking function call
-            c = self.get_caracter()
+            c = await keys.get()
             logger.info("processing char" + c)
+            if c in self.RESULT_KEYS and self.results_query != self.query:
+                # keys typed faster than they are searched leave the results of an older query
+                await self._search_now(self.query)
             self.process_chars(c)
+            if self.query != self.previous_query or self.reloaded:
+                self.reloaded = False
+                self._start_search()
             self.render()
             # sets query here
             self.previous_query = self.query
 
-    @statsd.timed("ps_render")
+    def _start_key_reader(self, keys: asyncio.Queue):
+        def read_keys():
+            while True:
+                # blocking function call
+                c = self.get_caracter()
+                self._loop.call_soon_threadsafe(keys.put_nowait, c)
+
+        # a daemon thread as the blocking getch cannot be interrupted when the ui exits
+        threading.Thread(target=read_keys, daemon=True).start()
+
+    def _start_search(self):
+        """
+        Cancels the search of a stale query and starts a new one
+        """
+        self._cancel_search()
+        self._search_cancelled = threading.Event()
+        self._search_task = asyncio.create_task(self._search(self.query, self._search_cancelled))
+
+    def _cancel_search(self):
+        # the search thread stops waiting for the slower backends once cancelled is set
+        self._search_cancelled.set()
+        if self._search_task and not self._search_task.done():
+            self._search_task.cancel()
+
+    async def _search(self, query: str, cancelled: threading.Event):
+        """
+        Streams the results in: string matches first, then each slower backend merged in when ready.
+        The search runs in the search thread and hands every stage to the event loop.
+        """
+        search_logic = self.search_logic
+        try:
+            if not isinstance(search_logic, QueryLogic):
+                # the search daemon merges the backends on its side
+                keys = await self._loop.run_in_executor(self._search_executor, search_logic.search, query)
+                self._show_stage(query, cancelled, keys)
+                return
+
+            def on_results(keys: List[str]):
+                self._loop.call_soon_threadsafe(self._show_stage, query, cancelled, keys)
+
+            await self._loop.run_in_executor(
+                self._search_executor,
+                functools.partial(
+                    search_logic.search,
+                    query,
+                    on_results=on_results,
+                    cancelled=cancelled,
+                    debounce_ms=self.DEBOUNCE_DELAY_MS,
+                ),
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error during search: {e}")
+
+    async def _search_now(self, query: str):
+        """
+        The first results of the query without debouncing, for a key acting on them
+        """
+        self._cancel_search()
+        search_logic = self.search_logic
+        first_results = search_logic.first_results if isinstance(search_logic, QueryLogic) else search_logic.search
+        try:
+            keys = await self._loop.run_in_executor(self._search_executor, first_results, query)
+        except Exception as e:
+            logger.error(f"Error during search: {e}")
+            return
+        self._set_results(query, keys)
+
+    def _show_stage(self, query: str, cancelled: threading.Event, keys: List[str]):
+        # results arriving after a newer query started are dropped
+        if not cancelled.is_set():
+            self._show_results(query, keys)
+
+    def _show_results(self, query: str, keys: List[str]):
+        self._set_results(query, keys)
+        self.render()
+
+    def _set_results(self, query: str, keys: List[str]):
+        self.all_matched_keys = keys
+        self.results_query = query
+        if self.selected_row >= len(self.all_matched_keys):
+            self.selected_row = 0
+            self.scroll_offset = 0
+
+    @metrics.timed("ps_render")
+    @tracer.traced("term_ui.render")
     def render(self):
         # Recalculate display rows and sizes in case terminal was resized
         new_display_rows = self._calculate_optimal_display_rows()
@@ -169,24 +288,6 @@ class SearchTerminalUi:
         self.print_first_line()
         logger.info("rendering loop started")
 
-        # Simple debouncing: only search if enough time has passed or query is different
-        current_time = time.time() * 1000  # Convert to milliseconds
-        should_search = (
-            self.query != self.previous_query or (current_time - self._last_search_time) >= self.DEBOUNCE_DELAY_MS
-        )
-
-        if should_search:
-            self._last_search_time = current_time
-            try:
-                # search now returns a list, not a generator
-                self.all_matched_keys = self.search_logic.search(self.query)
-            except Exception as e:
-                logger.error(f"Error during search: {e}")
-                # Keep using previous results or empty list
-                if not hasattr(self, "all_matched_keys") or self.all_matched_keys is None:
-                    self.all_matched_keys = []
-        # If not searching due to debounce, keep using previous results
-
         # Calculate visible range based on scroll offset
         start_idx = self.scroll_offset
         end_idx = min(start_idx + self.display_rows, len(self.all_matched_keys))
@@ -198,7 +299,7 @@ class SearchTerminalUi:
         for i in range(start_idx, end_idx):
             key = self.all_matched_keys[i]
             try:
-                entry = Entry(key, self.commands[key])
+                entry = self._entry(key)
             except Exception:
                 entry = Entry(key, {"snippet": "Error loading entry"})
 
@@ -210,16 +311,44 @@ class SearchTerminalUi:
 
             current_display_row += 1
 
-    def _setup_entries(self):
-        import subprocess
+    def _setup_entries(self, reload=False):
+        """
+        Uses the search daemon when it is running, otherwise the compiled entries snapshot
+        or, if it is stale, loads the entries in a subprocess
+        """
+        daemon = SearchDaemonClient.connect()
+        if daemon:
+            try:
+                if reload:
+                    daemon.reload()
+                # the daemon compiles the snapshot when it loads so the entries can be mapped from it
+                self.commands = EntryStore.open() or daemon.entries()
+                self.search_logic = daemon
+                return
+            except Exception as e:
+                logger.warning(f"Search daemon failed, loading entries locally: {e}")
+                daemon.close()
 
-        output = subprocess.getoutput(
-            SystemPaths.get_binary_full_path('pys') + " _entries_loader load_entries_as_json 2>/dev/null"
-        )
-        # print("output", output)
-        self.commands = json.loads(output)
+        store = EntryStore.open()
+        if store:
+            self.commands = store
+        else:
+            import subprocess
+
+            # importing the entries project in a subprocess also compiles the snapshot for next time
+            output = subprocess.getoutput(
+                SystemPaths.get_binary_full_path('pys') + " _entries_loader load_entries_as_json 2>/dev/null"
+            )
+            self.commands = json.loads(output)
         self.search_logic = QueryLogic(self.commands)
 
+    def _entry(self, key: str):
+        if isinstance(self.commands, EntryStore):
+            # decodes only the fields of the rows displayed
+            return self.commands.entry(key)
+
+        return Entry(key, self.commands[key])
+
     def get_caracter(self) -> str:
         try:
             logger.info("getting char")
@@ -233,6 +362,7 @@ class SearchTerminalUi:
 
         print("\x1b[2J\x1b[H" + self.cf.cursor(f"({len(self.commands)})> ") + f"{self.cf.bold(content)}")
 
+    @tracer.traced("term_ui.process_chars")
     def process_chars(self, c: str):
         self.typed_up_to_run += c
         ord_c = ord(c)
@@ -255,7 +385,7 @@ class SearchTerminalUi:
             # tab
             if self.selected_row < len(self.all_matched_keys):
                 self.actions.edit_key(self.all_matched_keys[self.selected_row], block=True)
-                self._setup_entries()
+                self._setup_entries(reload=True)
                 self.reloaded = True
         elif c == "'":
             # copy to clipboard
@@ -298,7 +428,7 @@ class SearchTerminalUi:
         elif ord_c == 67:
             sys.exit(0)
         elif ord_c == 92 or c == "]":
-            self._setup_entries()
+            self._setup_entries(reload=True)
             self.reloaded = True
         elif c == "-":
             # go up and clear
@@ -316,9 +446,11 @@ class SearchTerminalUi:
         if self.selected_row < len(self.all_matched_keys):
             selected_key = self.all_matched_keys[self.selected_row]
             self.actions.run_key(selected_key)
-            statsd.increment("ps_run_key")
-            self._get_data_warehouse().write_event(
-                self.RUN_KEY_EVENT,
+            metrics.increment("ps_run_key")
+            self.query_history.append(selected_key, self.query, self.typed_up_to_run)
+            # the data warehouse imports pandas, it is written by the event sink thread
+            get_event_sink().submit(
+                self._write_run_key_event,
                 {
                     "query": self.query,
                     "key": selected_key,
@@ -326,16 +458,14 @@ class SearchTerminalUi:
                 },
             )
 
-            statsd.gauge("ps_query_len_size", len(self.typed_up_to_run))
+            metrics.gauge("ps_query_len_size", len(self.typed_up_to_run))
             self.typed_up_to_run = ""
 
     def get_previously_used_query(self, position) -> str:
-        # len
-        df = self._get_data_warehouse().event(self.RUN_KEY_EVENT)
-        if position >= len(df):
-            return ""
+        return self.query_history.get_key(position)
 
-        return df.sort_values(by="tdw_timestamp", ascending=False).iloc[position]["key"]
+    def _write_run_key_event(self, event: dict) -> None:
+        self._get_data_warehouse().write_event(self.RUN_KEY_EVENT, event)
 
     def _get_data_warehouse(self):
         if not self.tdw:
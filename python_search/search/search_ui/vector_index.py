@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import List, Optional, Tuple
+
+VECTOR_INDEX_LOCATION = os.environ["HOME"] + "/.python_search_vectors"
+
+
+class NumpyVectorIndex:
+    """
+    In process vector store for the semantic search, an alternative to chroma that needs no database.
+
+    The normalized embeddings are saved as a float32 or float16 .npy matrix that is memory mapped
+    on load, so opening the index costs milliseconds regardless of its size. Small indexes are
+    searched by brute force with a single matrix-vector product. Bigger ones are split in
+    inverted lists around k-means centroids and the rows of each list are stored contiguously,
+    so a query only reads the lists of the closest centroids.
+    """
+
+    MANIFEST_NAME = "manifest.json"
+    VERSION = 1
+    # below this many entries brute force is fast enough and exact
+    IVF_MIN_ENTRIES = 100000
+    KMEANS_ITERATIONS = 10
+    # number of inverted lists searched per query
+    DEFAULT_PROBES = 8
+    # rows multiplied at once, bounds the memory used to upcast float16 matrices
+    CHUNK_SIZE = 16384
+
+    def __init__(self, keys: List[str], hashes: List[str], vectors, centroids=None, offsets=None):
+        import numpy as np
+
+        self.keys = keys
+        # content hash of the document each row was embedded from
+        self.hashes = hashes
+        self.vectors = vectors
+        self.centroids = centroids
+        self.offsets = np.asarray(offsets, dtype=np.int64) if offsets is not None else None
+
+    @staticmethod
+    def build(
+        keys: List[str],
+        hashes: List[str],
+        embeddings,
+        dtype: str = "float32",
+        number_of_lists: Optional[int] = None,
+    ) -> "NumpyVectorIndex":
+        """
+        Builds an index in memory, with inverted lists if there are enough entries or number_of_lists is given
+        """
+        import numpy as np
+
+        if not len(keys):
+            return NumpyVectorIndex([], [], np.zeros((0, 0), dtype=dtype))
+
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(keys), -1)
+        vectors = NumpyVectorIndex._normalize(vectors)
+
+        if number_of_lists is None and len(keys) >= NumpyVectorIndex.IVF_MIN_ENTRIES:
+            number_of_lists = int(np.sqrt(len(keys)))
+        if not number_of_lists or number_of_lists <= 1:
+            return NumpyVectorIndex(list(keys), list(hashes), vectors.astype(dtype))
+
+        centroids, assignments = NumpyVectorIndex._kmeans(vectors, min(number_of_lists, len(keys)))
+        # rows of the same list are stored next to each other
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=len(centroids)))))
+
+        return NumpyVectorIndex(
+            [keys[i] for i in order],
+            [hashes[i] for i in order],
+            vectors[order].astype(dtype),
+            centroids,
+            offsets,
+        )
+
+    @staticmethod
+    def load(location: Optional[str] = None) -> Optional["NumpyVectorIndex"]:
+        """
+        Memory maps a saved index, None if there is none
+        """
+        location = location if location else VECTOR_INDEX_LOCATION
+        try:
+            return NumpyVectorIndex._load(location)
+        except FileNotFoundError:
+            # two saves ran since the manifest was read and removed its arrays, the current one points to newer ones
+            return NumpyVectorIndex._load(location)
+
+    @staticmethod
+    def _load(location: str) -> Optional["NumpyVectorIndex"]:
+        import numpy as np
+
+        manifest_location = os.path.join(location, NumpyVectorIndex.MANIFEST_NAME)
+        if not os.path.exists(manifest_location):
+            return None
+
+        with open(manifest_location, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != NumpyVectorIndex.VERSION:
+            return None
+
+        vectors = np.load(os.path.join(location, manifest["vectors"]), mmap_mode="r")
+        centroids = None
+        if manifest.get("centroids"):
+            centroids = np.load(os.path.join(location, manifest["centroids"]))
+
+        return NumpyVectorIndex(manifest["keys"], manifest["hashes"], vectors, centroids, manifest.get("offsets"))
+
+    def save(self, location: Optional[str] = None) -> None:
+        """
+        Writes the arrays under new names and then replaces the manifest pointing to them,
+        readers see either the old or the new index but never a mix of both.
+        The arrays of the replaced manifest are kept for the readers that just read it.
+        """
+        import numpy as np
+
+        location = location if location else VECTOR_INDEX_LOCATION
+        os.makedirs(location, exist_ok=True)
+        suffix = f"{time.time_ns()}.{os.getpid()}"
+
+        manifest = {
+            "version": self.VERSION,
+            "keys": self.keys,
+            "hashes": self.hashes,
+            "vectors": f"vectors.{suffix}.npy",
+            "centroids": None,
+            "offsets": None,
+        }
+        np.save(os.path.join(location, manifest["vectors"]), np.asarray(self.vectors))
+        if self.centroids is not None:
+            manifest["centroids"] = f"centroids.{suffix}.npy"
+            manifest["offsets"] = self.offsets.tolist()
+            np.save(os.path.join(location, manifest["centroids"]), self.centroids)
+
+        previous_generation = self._manifest_generation(location)
+        tmp_location = os.path.join(location, f"{self.MANIFEST_NAME}.{suffix}.tmp")
+        with open(tmp_location, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_location, os.path.join(location, self.MANIFEST_NAME))
+
+        if previous_generation is None:
+            return
+        # arrays older than the replaced manifest, a reader that already mapped them keeps its mapping
+        # and the ones of a save running in parallel are newer
+        for name in os.listdir(location):
+            generation = self._generation(name)
+            if name.endswith(".npy") and generation is not None and generation < previous_generation:
+                os.remove(os.path.join(location, name))
+
+    @staticmethod
+    def _manifest_generation(location: str) -> Optional[int]:
+        """
+        When the arrays of the current manifest were saved, None if there is no valid manifest
+        """
+        try:
+            with open(os.path.join(location, NumpyVectorIndex.MANIFEST_NAME), "r") as f:
+                return NumpyVectorIndex._generation(json.load(f)["vectors"])
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def _generation(name: str) -> Optional[int]:
+        # arrays are named vectors.<time_ns>.<pid>.npy and centroids.<time_ns>.<pid>.npy
+        try:
+            return int(name.split(".")[1])
+        except (IndexError, ValueError):
+            return None
+
+    def top_k(self, query_embedding, k: int, probes: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        The k keys with the highest cosine similarity to the query embedding, best first
+        """
+        import numpy as np
+
+        if not self.keys or k <= 0:
+            return []
+
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+
+        if self.centroids is None:
+            ranges = [(0, len(self.keys))]
+        else:
+            probes = min(probes if probes else self.DEFAULT_PROBES, len(self.centroids))
+            closest_lists = np.argsort(-(self.centroids @ query), kind="stable")[:probes]
+            ranges = [(int(self.offsets[i]), int(self.offsets[i + 1])) for i in np.sort(closest_lists)]
+
+        rows = []
+        scores = []
+        for start, end in ranges:
+            for chunk_start in range(start, end, self.CHUNK_SIZE):
+                chunk_end = min(chunk_start + self.CHUNK_SIZE, end)
+                chunk = np.asarray(self.vectors[chunk_start:chunk_end], dtype=np.float32)
+                scores.append(chunk @ query)
+                rows.append(np.arange(chunk_start, chunk_end))
+
+        if not scores:
+            return []
+        scores = np.concatenate(scores)
+        rows = np.concatenate(rows)
+
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        return [(self.keys[rows[i]], float(scores[i])) for i in best]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @staticmethod
+    def _normalize(vectors):
+        import numpy as np
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+    @staticmethod
+    def _kmeans(vectors, number_of_lists: int):
+        """
+        Spherical k-means, centroids are kept normalized so the closest is the one with the highest dot product
+        """
+        import numpy as np
+
+        random_generator = np.random.default_rng(0)
+        centroids = vectors[random_generator.choice(len(vectors), number_of_lists, replace=False)].copy()
+
+        for _ in range(NumpyVectorIndex.KMEANS_ITERATIONS):
+            assignments = NumpyVectorIndex._assign(vectors, centroids)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=number_of_lists)
+            non_empty = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[non_empty]
+            # an empty list keeps its previous centroid
+            sums = centroids.copy()
+            sums[non_empty] = np.add.reduceat(vectors[order], starts, axis=0)
+            centroids = NumpyVectorIndex._normalize(sums)
+
+        return centroids, NumpyVectorIndex._assign(vectors, centroids)
+
+    @staticmethod
+    def _assign(vectors, centroids):
+        import numpy as np
+
+        assignments = np.zeros(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), NumpyVectorIndex.CHUNK_SIZE):
+            chunk = vectors[start : start + NumpyVectorIndex.CHUNK_SIZE]
+            assignments[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+
+        return assignments
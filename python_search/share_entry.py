@@ -1,4 +1,3 @@
-from python_search.configuration.loader import ConfigurationLoader
 from python_search.apps.clipboard import Clipboard
 from python_search.core_entities import Entry, Key
 from python_search.error.exception import notify_exception
@@ -6,7 +5,10 @@ from python_search.error.exception import notify_exception
 
 class ShareEntry:
     def __init__(self):
-        self._entries = ConfigurationLoader().load_entries()
+        from python_search.search.entries_loader import EntriesLoader
+
+        # the serialized entries have the same content so the project is not imported
+        self._entries = EntriesLoader.load_serialized_entries()
 
     @notify_exception()
     def share_key(self, key: str):
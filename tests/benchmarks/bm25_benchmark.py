@@ -0,0 +1,71 @@
+"""
+Benchmark of the vectorized bm25 scoring engine on a synthetic corpus.
+
+Run it with: python -m tests.benchmarks.bm25_benchmark --entries 50000
+"""
+
+import json
+import random
+import tempfile
+import time
+
+from python_search.search.search_ui.bm25_index import Bm25Index
+from python_search.search.search_ui.bm25_search import Bm25ScoringEngine
+
+VOCABULARY_SIZE = 20000
+
+
+def synthetic_corpus(number_of_entries: int, seed=42) -> dict:
+    random_generator = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(VOCABULARY_SIZE)]
+    # zipf like distribution so some terms are very frequent as in real entries
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+
+    corpus = {}
+    for i in range(number_of_entries):
+        tokens = random_generator.choices(vocabulary, weights=weights, k=random_generator.randint(3, 30))
+        corpus[f"entry {i} " + " ".join(tokens[:3])] = " ".join(tokens)
+
+    return corpus
+
+
+def percentile(values, percentage):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentage / 100))]
+
+
+def run(entries=50000, queries=1000, top_n=50):
+    corpus = synthetic_corpus(entries)
+    folder = tempfile.mkdtemp()
+    index = Bm25Index(f"{folder}/snapshot.pickle", f"{folder}/delta.jsonl")
+    index.sync(corpus, lambda key, text: text.split())
+
+    start = time.perf_counter()
+    engine = Bm25ScoringEngine(index, list(corpus.keys()))
+    build_seconds = time.perf_counter() - start
+
+    random_generator = random.Random(7)
+    vocabulary = [f"term{i}" for i in range(VOCABULARY_SIZE)]
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+    durations = []
+    for _ in range(queries):
+        # queries follow the same distribution as the entries, so frequent terms get searched too
+        tokens = random_generator.choices(vocabulary, weights=weights, k=random_generator.randint(1, 3))
+        start = time.perf_counter()
+        engine.top_n(tokens, top_n)
+        durations.append((time.perf_counter() - start) * 1000)
+
+    result = {
+        "entries": entries,
+        "queries": queries,
+        "engine_build_seconds": round(build_seconds, 4),
+        "query_p50_ms": round(percentile(durations, 50), 4),
+        "query_p99_ms": round(percentile(durations, 99), 4),
+    }
+    print(json.dumps(result, indent=4))
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(run)
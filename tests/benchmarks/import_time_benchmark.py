@@ -0,0 +1,70 @@
+"""
+Import time of the modules of the console entry points compared with a budget.
+
+Timings depend on the machine, the budgets are for a laptop with warm disk caches.
+
+Run it with: python -m tests.benchmarks.import_time_benchmark
+"""
+
+import re
+import subprocess
+import sys
+
+from tests.test_import_time import ENTRY_POINTS
+
+DEFAULT_BUDGET_MS = 100
+# console script -> budget in milliseconds of importing its module, when it differs from the default
+BUDGETS_MS = {
+    "python_search": 150,
+    "pys": 150,
+    "run_key": 150,
+    "term_ui": 300,
+    "register_new_launch_ui": 150,
+}
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_ms(module: str) -> float:
+    """
+    Cumulative import time of the module in milliseconds, in a new interpreter
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        raise Exception(result.stderr.strip().splitlines()[-1])
+
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match and match.group(3) == module:
+            return int(match.group(1)) / 1000
+
+    raise Exception(f"No import time reported for {module}")
+
+
+def run(repeat=3):
+    """
+    Prints the import time of every entry point and fails if one is over its budget
+    """
+    over_budget = []
+    for script, module in ENTRY_POINTS.items():
+        budget_ms = BUDGETS_MS.get(script, DEFAULT_BUDGET_MS)
+        # the best of a few runs filters out a busy machine
+        elapsed_ms = min(import_ms(module) for _ in range(repeat))
+        print(f"{script}: {elapsed_ms:.1f}ms, budget {budget_ms}ms")
+        if elapsed_ms > budget_ms:
+            over_budget.append(script)
+
+    if over_budget:
+        print(f"Over the budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(run)
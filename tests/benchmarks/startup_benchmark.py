@@ -0,0 +1,286 @@
+"""
+Benchmark of the startup and search latencies on synthetic entries projects.
+
+Measures, for every project size:
+    snapshot_compile_ms      importing entries_main and compiling the entries snapshot, in a new interpreter
+    term_ui_first_render_ms  running the terminal ui until its main loop painted the first results, in a new interpreter
+    run_key_ms               running a key from the command line until the entry finished, in a new interpreter
+    query_p50_ms/p99_ms      QueryLogic.search for every keystroke of typed queries
+    bm25_build_seconds       building the bm25 index of all entries
+
+The results are saved as json and compared with a baseline, a metric more than tolerance slower
+than the baseline is reported as a regression and makes the command fail.
+
+The committed startup_baseline.json was measured on the machine noted in it. Timings depend on the
+machine, so save a new baseline before comparing on another one. Metrics null in the baseline are not
+compared.
+
+Run it with: python -m tests.benchmarks.startup_benchmark run --sizes 100,10000,100000
+Save the baseline with: python -m tests.benchmarks.startup_benchmark run --update_baseline
+"""
+
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+BASELINE_LOCATION = os.path.join(os.path.dirname(__file__), "startup_baseline.json")
+RESULTS_LOCATION = "/tmp/python_search_startup_benchmark.json"
+NOOP_KEY = "benchmark noop"
+# the ui never exits by itself if it paints no results
+PROCESS_TIMEOUT_SECONDS = 600
+WORDS = [
+    "git", "push", "docker", "pods", "mail", "python", "search", "copy", "date", "open", "jira",
+    "ticket", "deploy", "staging", "logs", "kubectl", "notes", "meeting", "calendar", "slack",
+]  # fmt: skip
+
+# points the caches of the benchmarked process to the benchmark folder instead of the real ones
+PRELUDE = """
+import sys
+from python_search.configuration import entries_snapshot
+from python_search.search.search_ui.bm25_index import Bm25Index
+
+folder = sys.argv[1]
+entries_snapshot.SNAPSHOT_LOCATION = folder + "/entries.snapshot"
+Bm25Index.SNAPSHOT_LOCATION = folder + "/bm25_index.pickle"
+Bm25Index.DELTA_LOG_LOCATION = folder + "/bm25_index.delta.jsonl"
+"""
+
+COMPILE_SNAPSHOT = PRELUDE + """
+from python_search.configuration.entries_snapshot import EntriesSnapshot
+EntriesSnapshot.compile()
+"""
+
+FIRST_RENDER = PRELUDE + """
+import contextlib, io, os, threading
+from python_search.search.search_ui import search_daemon
+# measures the ui loading the entries by itself even if a daemon is running
+search_daemon.SearchDaemonClient.connect = staticmethod(lambda *args, **kwargs: None)
+from python_search.search.search_ui.terminal_ui import SearchTerminalUi
+
+show_results = SearchTerminalUi._show_results
+
+def show_first_results(self, query, keys):
+    show_results(self, query, keys)
+    if keys:
+        # the first results are painted, the process ends here
+        os._exit(0)
+
+SearchTerminalUi._show_results = show_first_results
+# no key is ever typed
+SearchTerminalUi.get_caracter = lambda self: threading.Event().wait()
+
+with contextlib.redirect_stdout(io.StringIO()):
+    SearchTerminalUi().run()
+"""
+
+RUN_KEY = PRELUDE + f"""
+sys.argv = ["run_key", "{NOOP_KEY}"]
+from python_search.entry_runner import main
+main()
+"""
+
+
+def synthetic_entries(number_of_entries: int, seed=42) -> Dict[str, dict]:
+    random_generator = random.Random(seed)
+    entries = {NOOP_KEY: {"cmd": "true"}}
+    for i in range(number_of_entries - 1):
+        words = " ".join(random_generator.choices(WORDS, k=random_generator.randint(2, 5)))
+        kind = i % 3
+        if kind == 0:
+            entries[f"{words} {i}"] = {"url": f"https://example.com/{words.replace(' ', '/')}/{i}"}
+        elif kind == 1:
+            entries[f"{words} {i}"] = {"snippet": f"{words} snippet number {i}"}
+        else:
+            entries[f"{words} {i}"] = {"cli_cmd": f"echo {words} {i}", "tags": ["Benchmark"]}
+
+    return entries
+
+
+def write_project(folder: str, entries: Dict[str, dict]) -> str:
+    project = os.path.join(folder, "project")
+    os.makedirs(project, exist_ok=True)
+    with open(os.path.join(project, "entries_main.py"), "w") as f:
+        f.write("from python_search.configuration.configuration import PythonSearchConfiguration\n\n")
+        f.write(f"entries = {json.dumps(entries, indent=0)}\n\n")
+        f.write("config = PythonSearchConfiguration(entries=entries)\n")
+
+    return project
+
+
+def time_process(script: str, folder: str, project: str, repeat: int, warm_up: bool = False) -> Optional[float]:
+    """
+    Median wall time in milliseconds of a new interpreter running the script, None if it fails
+
+    :param warm_up: runs the script once more before timing it, so the caches it writes exist
+    """
+    env = dict(os.environ, PS_ENTRIES_HOME=project)
+    durations = []
+    for _ in range(repeat + 1 if warm_up else repeat):
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(
+                [sys.executable, "-c", script, folder],
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=PROCESS_TIMEOUT_SECONDS,
+            )
+        except subprocess.TimeoutExpired:
+            print(f"Timed out after {PROCESS_TIMEOUT_SECONDS} seconds", file=sys.stderr)
+            return None
+        durations.append((time.perf_counter() - start) * 1000)
+        if result.returncode != 0:
+            print(result.stderr.strip().splitlines()[-1], file=sys.stderr)
+            return None
+
+    return round(statistics.median(durations[1:] if warm_up else durations), 2)
+
+
+def typed_queries(entries: Dict[str, dict], number_of_queries: int, seed=7) -> List[str]:
+    """
+    Every prefix of queries made of words of the keys, in the order they are typed
+    """
+    random_generator = random.Random(seed)
+    keys = list(entries.keys())
+    keystrokes = []
+    for _ in range(number_of_queries):
+        words = random_generator.choice(keys).split(" ")[:2]
+        query = " ".join(words)
+        keystrokes += [query[: i + 1] for i in range(len(query))]
+
+    return keystrokes
+
+
+def measure_search(entries: Dict[str, dict], folder: str, number_of_queries: int) -> Dict[str, Optional[float]]:
+    from python_search.search.entries_loader import EntriesLoader
+    from python_search.search.search_ui.bm25_index import Bm25Index
+
+    Bm25Index.SNAPSHOT_LOCATION = os.path.join(folder, "search_bm25_index.pickle")
+    Bm25Index.DELTA_LOG_LOCATION = os.path.join(folder, "search_bm25_index.delta.jsonl")
+    commands = EntriesLoader.serialize_entries(entries)
+    result = {"query_p50_ms": None, "query_p99_ms": None, "bm25_build_seconds": None}
+
+    try:
+        from python_search.search.search_ui.bm25_search import Bm25Search
+        from python_search.search.search_ui.QueryLogic import QueryLogic
+
+        start = time.perf_counter()
+        Bm25Search(commands).build_bm25()
+        result["bm25_build_seconds"] = round(time.perf_counter() - start, 4)
+
+        query_logic = QueryLogic(commands)
+        durations = []
+        for query in typed_queries(entries, number_of_queries):
+            start = time.perf_counter()
+            query_logic.search(query)
+            durations.append((time.perf_counter() - start) * 1000)
+        query_logic.fanout.shutdown()
+    except ImportError as e:
+        print(f"Skipping the search benchmark: {e}", file=sys.stderr)
+        return result
+
+    durations.sort()
+    result["query_p50_ms"] = round(durations[len(durations) // 2], 4)
+    result["query_p99_ms"] = round(durations[min(len(durations) - 1, int(len(durations) * 0.99))], 4)
+
+    return result
+
+
+def benchmark_size(number_of_entries: int, queries: int, repeat: int) -> Dict[str, Optional[float]]:
+    folder = tempfile.mkdtemp(prefix="python_search_benchmark_")
+    entries = synthetic_entries(number_of_entries)
+    project = write_project(folder, entries)
+    # the bigger projects are slow enough that fewer runs are stable
+    repeat = max(1, repeat if number_of_entries <= 10000 else repeat // 3)
+
+    result = {"snapshot_compile_ms": time_process(COMPILE_SNAPSHOT, folder, project, repeat)}
+    # the ui and run_key read the snapshot compiled above
+    # the ui keeps its search indexes on disk, a warm start is what users see every time but the first
+    result["term_ui_first_render_ms"] = time_process(FIRST_RENDER, folder, project, repeat, warm_up=True)
+    result["run_key_ms"] = time_process(RUN_KEY, folder, project, repeat)
+    result.update(measure_search(entries, folder, queries))
+
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float, minimum_difference_ms: float = 2.0) -> List[str]:
+    """
+    Metrics slower than the baseline by more than the tolerance, tiny absolute differences are noise
+    """
+    regressions = []
+    for size, metrics in results["results"].items():
+        for metric, value in metrics.items():
+            reference = baseline.get("results", {}).get(size, {}).get(metric)
+            if value is None or not reference:
+                continue
+
+            difference = value - reference
+            if metric.endswith("_seconds"):
+                difference *= 1000
+            if value > reference * (1 + tolerance) and difference > minimum_difference_ms:
+                regressions.append(f"{size} entries {metric}: {value} vs {reference} in the baseline")
+
+    return regressions
+
+
+def run(
+    sizes="100,10000,100000",
+    queries=50,
+    repeat=6,
+    output=RESULTS_LOCATION,
+    baseline=BASELINE_LOCATION,
+    update_baseline=False,
+    tolerance=0.25,
+):
+    """
+    Runs the benchmark for every size of entries project and compares it with the baseline
+    """
+    if isinstance(sizes, int):
+        sizes = str(sizes)
+    if isinstance(sizes, tuple):
+        sizes = ",".join(str(size) for size in sizes)
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split(" ")[0],
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} cpus",
+        "results": {},
+    }
+    for size in [int(size) for size in sizes.split(",")]:
+        results["results"][str(size)] = benchmark_size(size, queries, repeat)
+        print(json.dumps({size: results["results"][str(size)]}, indent=4))
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"Results saved to {output}")
+
+    if update_baseline:
+        with open(baseline, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Baseline saved to {baseline}")
+        return
+
+    if not os.path.exists(baseline):
+        print(f"No baseline at {baseline}, save one with --update_baseline")
+        return
+
+    with open(baseline) as f:
+        regressions = compare(results, json.load(f), tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions compared to the baseline")
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire()
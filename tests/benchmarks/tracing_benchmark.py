@@ -0,0 +1,34 @@
+"""
+Benchmark of the cost of a span, with tracing disabled and enabled.
+
+Run it with: python -m tests.benchmarks.tracing_benchmark --iterations 1000000
+"""
+
+import json
+import time
+
+from python_search.tracing import Tracer
+
+
+def per_span_ns(tracer: Tracer, iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        with tracer.span("term_ui.process_chars"):
+            pass
+
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def run(iterations=1000000):
+    result = {
+        "iterations": iterations,
+        "disabled_span_ns": round(per_span_ns(Tracer(), iterations), 1),
+        "enabled_span_ns": round(per_span_ns(Tracer(enabled=True), iterations), 1),
+    }
+    print(json.dumps(result, indent=4))
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(run)
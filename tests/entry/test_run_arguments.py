@@ -0,0 +1,21 @@
+from python_search.entry_runner import parse_run_arguments
+
+
+def test_shortcut_command_lines_are_parsed_without_fire():
+    assert parse_run_arguments(["my key"]) == {"entry_text": "my key"}
+    assert parse_run_arguments(["my key", "--from_shortcut=True"]) == {
+        "entry_text": "my key",
+        "from_shortcut": True,
+    }
+    assert parse_run_arguments(["my key", "--wrap_in_terminal", "--query_used", "my"]) == {
+        "entry_text": "my key",
+        "wrap_in_terminal": True,
+        "query_used": "my",
+    }
+
+
+def test_anything_else_is_left_to_fire():
+    assert parse_run_arguments([]) is None
+    assert parse_run_arguments(["--help"]) is None
+    assert parse_run_arguments(["my key", "other"]) is None
+    assert parse_run_arguments(["my key", "--from_shortcut=yes"]) is None
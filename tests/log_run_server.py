@@ -0,0 +1,87 @@
+"""
+Minimal stand-in for the /log_run and /log_run_batch endpoints of the webservice.
+
+Run it with: python -m tests.log_run_server --port 8000
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+class LogRunServer:
+    def __init__(self, port: int = 0, batch_endpoint: bool = True):
+        self.batch_endpoint = batch_endpoint
+        self.events: List[dict] = []
+        self.requests = 0
+        self.connections = 0
+        # statuses answered to the next requests before accepting them
+        self.failures: List[int] = []
+        self._seen_keys = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "LogRunServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _receive(self, path: str, body: dict, idempotency_key: str) -> int:
+        with self._lock:
+            self.requests += 1
+            if self.failures:
+                return self.failures.pop(0)
+            if path == "/log_run_batch" and not self.batch_endpoint:
+                return 404
+            if path not in ("/log_run", "/log_run_batch"):
+                return 404
+            # a retried request is accepted without saving its events again
+            if idempotency_key not in self._seen_keys:
+                self._seen_keys.add(idempotency_key)
+                self.events += body["events"] if path == "/log_run_batch" else [body]
+            return 200
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status = server._receive(self.path, body, self.headers.get("Idempotency-Key"))
+                response = json.dumps({"status": status}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main(port: int = 8000, batch_endpoint: bool = True):
+    server = LogRunServer(port, batch_endpoint)
+    print(f"Listening on {server.url}")
+    server._server.serve_forever()
+
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(main)
@@ -0,0 +1,78 @@
+import threading
+
+from python_search.search.search_ui.backend_fanout import BackendFanout
+
+
+def test_collects_backends_within_budget_and_reports_missed():
+    release_slow = threading.Event()
+    calls = []
+
+    def backend_results(backend, query):
+        calls.append(backend)
+        if backend == "slow":
+            release_slow.wait(5)
+        return [f"{backend} {query}"]
+
+    fanout = BackendFanout(backend_results)
+    outcome = fanout.run("abc", ["fast", "slow"], budget_ms=50)
+
+    assert outcome.results == {"fast": ["fast abc"]}
+    assert outcome.missed == ["slow"]
+
+    release_slow.set()
+    fanout.shutdown()
+
+
+def test_late_results_are_reused_for_the_same_query():
+    calls = []
+
+    def backend_results(backend, query):
+        calls.append(backend)
+        return [query]
+
+    fanout = BackendFanout(backend_results)
+    first = fanout.run("abc", ["bm25"], budget_ms=1000)
+    second = fanout.run("abc", ["bm25"], budget_ms=1000)
+
+    assert first.results == second.results == {"bm25": ["abc"]}
+    assert calls == ["bm25"]
+
+    fanout.clear()
+    fanout.run("abc", ["bm25"], budget_ms=1000)
+    assert calls == ["bm25", "bm25"]
+    fanout.shutdown()
+
+
+def test_results_started_before_clear_are_not_kept():
+    release = threading.Event()
+    calls = []
+
+    def backend_results(backend, query):
+        calls.append(backend)
+        release.wait(5)
+        return [query]
+
+    fanout = BackendFanout(backend_results)
+    futures = fanout.submit("abc", ["bm25"])
+    fanout.clear()
+    release.set()
+    futures["bm25"].result()
+
+    fanout.run("abc", ["bm25"], budget_ms=1000)
+    assert calls == ["bm25", "bm25"]
+    fanout.shutdown()
+
+
+def test_failed_backends_are_reported():
+    def backend_results(backend, query):
+        if backend == "broken":
+            raise ValueError("index missing")
+        return [query]
+
+    fanout = BackendFanout(backend_results)
+    outcome = fanout.run("abc", ["bm25", "broken"], budget_ms=1000)
+
+    assert outcome.results == {"bm25": ["abc"]}
+    assert not outcome.missed
+    assert str(outcome.failed["broken"]) == "index missing"
+    fanout.shutdown()
@@ -0,0 +1,55 @@
+from python_search.search.search_ui.bm25_index import Bm25Index
+
+
+def tokenize(key, text):
+    return text.lower().split()
+
+
+def build_index(tmp_path):
+    return Bm25Index.load(str(tmp_path / "snapshot.pickle"), str(tmp_path / "delta.jsonl"))
+
+
+def test_sync_only_tokenizes_changed_entries(tmp_path):
+    index = build_index(tmp_path)
+    assert index.sync({"a": "git push", "b": "docker pods"}, tokenize) == 2
+
+    tokenized = []
+
+    def tracking_tokenize(key, text):
+        tokenized.append(key)
+        return tokenize(key, text)
+
+    assert index.sync({"a": "git push", "b": "docker pods git"}, tracking_tokenize) == 1
+    assert tokenized == ["b"]
+    assert set(index.get_scores(["git"]).keys()) == {"a", "b"}
+
+
+def test_delete_removes_entry_from_postings(tmp_path):
+    index = build_index(tmp_path)
+    index.sync({"a": "git push", "b": "docker pods"}, tokenize)
+    index.delete("a")
+
+    assert index.get_scores(["git"]) == {}
+    assert "git" not in index.postings
+    assert index.total_length == 2
+
+
+def test_delta_log_is_merged_on_load(tmp_path):
+    index = build_index(tmp_path)
+    index.sync({"a": "git push", "b": "docker pods"}, tokenize)
+    index.compact()
+    index.upsert("c", ["git", "log"], "fingerprint")
+    index.delete("b")
+
+    loaded = build_index(tmp_path)
+    assert set(loaded.documents.keys()) == {"a", "c"}
+    assert loaded.get_scores(["git", "log"]) == index.get_scores(["git", "log"])
+
+
+def test_compact_truncates_delta_log(tmp_path):
+    index = build_index(tmp_path)
+    index.sync({"a": "git push"}, tokenize)
+    index.compact()
+
+    assert (tmp_path / "delta.jsonl").read_text() == ""
+    assert build_index(tmp_path).documents == index.documents
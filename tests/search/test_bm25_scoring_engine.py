@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from python_search.search.search_ui.bm25_index import Bm25Index
+
+np = pytest.importorskip("numpy")
+rank_bm25 = pytest.importorskip("rank_bm25")
+pytest.importorskip("nltk")
+
+
+def test_engine_scores_like_rank_bm25(tmp_path):
+    from python_search.search.search_ui.bm25_search import Bm25ScoringEngine
+
+    random_generator = random.Random(3)
+    words = ["git", "push", "docker", "pods", "mail", "python", "search", "copy", "date"]
+    corpus = {
+        f"entry {i}": [random_generator.choice(words) for _ in range(random_generator.randint(1, 8))]
+        for i in range(500)
+    }
+
+    index = Bm25Index(str(tmp_path / "snapshot.pickle"), str(tmp_path / "delta.jsonl"))
+    index.sync({key: " ".join(tokens) for key, tokens in corpus.items()}, lambda key, text: text.split())
+    entries = list(corpus.keys())
+    engine = Bm25ScoringEngine(index, entries)
+    reference = rank_bm25.BM25Plus(list(corpus.values()))
+
+    for query in [["git"], ["docker", "pods"], ["mail", "mail", "copy"], ["unknown"]]:
+        scores = reference.get_scores(query)
+        # the scores of rank_bm25 with the ties broken by the explicit rule of the engine
+        ranking = sorted(entries, key=lambda key: (scores[entries.index(key)], entries.index(key)), reverse=True)
+        expected = [key for key in ranking if set(query) & set(corpus[key])][:20]
+        assert [key for key, _ in engine.top_n(query, 20)] == expected
+
+
+def test_ties_rank_the_entry_further_down_first(tmp_path):
+    from python_search.search.search_ui.bm25_search import Bm25ScoringEngine
+
+    corpus = {f"entry {i}": "git push" for i in range(5)}
+    index = Bm25Index(str(tmp_path / "snapshot.pickle"), str(tmp_path / "delta.jsonl"))
+    index.sync(corpus, lambda key, text: text.split())
+    engine = Bm25ScoringEngine(index, list(corpus.keys()))
+
+    assert [key for key, _ in engine.top_n(["git"], 3)] == ["entry 4", "entry 3", "entry 2"]
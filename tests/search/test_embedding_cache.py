@@ -0,0 +1,102 @@
+from python_search.search.search_ui.semantic_search import EmbeddingCache
+
+
+def test_unchanged_documents_are_not_embedded_again(tmp_path):
+    embedded = []
+
+    def embedding_function(documents):
+        embedded.extend(documents)
+        return [[float(len(document))] for document in documents]
+
+    location = str(tmp_path / "embeddings.pickle")
+    cache = EmbeddingCache(location)
+    assert cache.embed(["ab", "abc"], embedding_function) == [[2.0], [3.0]]
+    cache.save()
+
+    cache = EmbeddingCache(location)
+    assert cache.embed(["abc", "abcd"], embedding_function) == [[3.0], [4.0]]
+    assert embedded == ["ab", "abc", "abcd"]
+
+
+def test_save_drops_documents_that_no_longer_exist(tmp_path):
+    location = str(tmp_path / "embeddings.pickle")
+    cache = EmbeddingCache(location)
+    cache.embed(["a", "b"], lambda documents: [[1.0] for _ in documents])
+    cache.save(keep_hashes={EmbeddingCache.content_hash("b")})
+
+    assert len(EmbeddingCache(location)) == 1
+
+
+def test_the_configured_backend_is_read_from_the_snapshot(tmp_path, monkeypatch):
+    from python_search.configuration import entries_snapshot
+    from python_search.search.search_ui.semantic_search import SemanticSearch
+
+    class Configuration:
+        collect_data = True
+        use_webservice = False
+        semantic_search_backend = "numpy"
+        commands = {"git push": {"cli_cmd": "git push"}}
+
+    location = str(tmp_path / "entries.snapshot")
+    monkeypatch.setattr(entries_snapshot, "SNAPSHOT_LOCATION", location)
+    assert SemanticSearch.configured_backend() == "chroma"
+
+    entries_snapshot.EntriesSnapshot.write(Configuration(), {}, str(tmp_path), location)
+    assert SemanticSearch.configured_backend() == "numpy"
+
+
+class FakeCollection:
+    def __init__(self):
+        self.metadata = None
+        self.rows = {}
+        self.upserted = []
+
+    def get(self, include):
+        return {"ids": list(self.rows), "metadatas": [metadata for metadata in self.rows.values()]}
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        self.upserted += ids
+        self.rows.update(zip(ids, metadatas))
+
+    def delete(self, ids):
+        for key in ids:
+            del self.rows[key]
+
+    def modify(self, metadata):
+        self.metadata = metadata
+
+
+class FakeClient:
+    def __init__(self):
+        self.collection = None
+
+    def get_collection(self, name):
+        if self.collection is None:
+            raise Exception(f"Collection {name} does not exist")
+        return self.collection
+
+    def get_or_create_collection(self, name):
+        self.collection = self.collection if self.collection else FakeCollection()
+        return self.collection
+
+
+def test_changed_entries_are_synced_to_an_existing_collection(tmp_path, monkeypatch):
+    from python_search.search.search_ui import semantic_search
+    from python_search.search.search_ui.semantic_search import SemanticSearch
+
+    client = FakeClient()
+    monkeypatch.setattr(semantic_search, "EMBEDDINGS_CACHE_PATH", str(tmp_path / "embeddings.pickle"))
+    monkeypatch.setattr(SemanticSearch, "get_chroma_instance", lambda self: setattr(self, "client", client))
+    monkeypatch.setattr(SemanticSearch, "embedding_function", lambda self: lambda docs: [[1.0] for _ in docs])
+
+    entries = {"git push": {"cli_cmd": "git push"}, "docker pods": {"cli_cmd": "docker ps"}}
+    SemanticSearch(entries, backend="chroma")
+    assert sorted(client.collection.upserted) == ["docker pods", "git push"]
+
+    client.collection.upserted = []
+    SemanticSearch(entries, backend="chroma")
+    assert client.collection.upserted == []
+
+    SemanticSearch({"git push": {"cli_cmd": "git push --force"}}, backend="chroma")
+    assert client.collection.upserted == ["git push"]
+    assert list(client.collection.rows) == ["git push"]
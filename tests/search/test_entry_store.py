@@ -0,0 +1,49 @@
+from python_search.configuration.entries_snapshot import EntriesSnapshot
+from python_search.search.entry_store import EntryStore
+
+
+class FakeConfiguration:
+    collect_data = False
+    use_webservice = False
+
+    def __init__(self, commands):
+        self.commands = commands
+
+
+def _open_store(tmp_path, commands) -> EntryStore:
+    location = str(tmp_path / "entries.snapshot")
+    EntriesSnapshot.write(FakeConfiguration(commands), {}, str(tmp_path), location)
+
+    return EntryStore.open(location, fresh=False)
+
+
+def test_store_behaves_like_the_serialized_entries_dict(tmp_path):
+    commands = {
+        "open github": {"url": "https://github.com"},
+        "Copy Date": {"snippet": "2024\n01"},
+        "copy date": {"cli_cmd": "date | pbcopy"},
+    }
+    store = _open_store(tmp_path, commands)
+
+    assert len(store) == 3
+    assert list(store) == list(commands)
+    assert dict(store.items()) == {
+        key: {next(iter(value)): value[next(iter(value))]} for key, value in commands.items()
+    }
+    # keys only differing by case are distinct entries of the store
+    assert store["copy date"] == {"cli_cmd": "date | pbcopy"}
+    assert "Copy Date" in store
+    assert "COPY DATE" not in store
+    assert store.get("missing") is None
+
+
+def test_entry_views_decode_lazily(tmp_path):
+    store = _open_store(tmp_path, {"Copy Date": {"snippet": "2024\n01"}})
+
+    entry = store.entry("Copy Date")
+
+    assert not hasattr(entry, "__dict__")
+    assert entry.key == "Copy Date"
+    assert entry.get_type_str() == "snippet"
+    assert entry.get_content_str(strip_new_lines=True) == "2024 01"
+    assert entry.value == {"snippet": "2024\n01"}
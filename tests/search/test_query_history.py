@@ -0,0 +1,83 @@
+from python_search.events.event_log import EventLog
+from python_search.search.search_ui.query_history import QueryHistory
+
+
+def test_history_is_navigated_from_the_latest_run(tmp_path):
+    location = str(tmp_path / "query_history")
+    history = QueryHistory(location)
+    for key in ["git push", "docker pods", "jira ticket"]:
+        history.append(key, query=key[:3])
+
+    history = QueryHistory(location)
+    assert history.get_key(0) == "jira ticket"
+    assert history.get_key(2) == "git push"
+    assert history.get(1)["query"] == "doc"
+    assert history.get_key(3) == ""
+    assert history.get_key(-1) == ""
+
+
+def test_history_is_read_lazily(tmp_path):
+    location = str(tmp_path / "query_history")
+    history = QueryHistory(location)
+    for i in range(100):
+        history.append(f"key {i}")
+
+    history = QueryHistory(location)
+    assert history.get_key(1) == "key 98"
+    assert len(history._loaded) == 2
+
+
+def test_runs_of_the_session_come_first(tmp_path):
+    history = QueryHistory(str(tmp_path / "query_history"))
+    history.append("first")
+    assert history.get_key(0) == "first"
+
+    history.append("second")
+
+    assert [history.get_key(i) for i in range(3)] == ["second", "first", ""]
+
+
+class FakeDataWarehouse:
+    imports = 0
+
+    def event(self, name):
+        FakeDataWarehouse.imports += 1
+        return self
+
+    def sort_values(self, by):
+        return self
+
+    def to_dict(self, orient):
+        return [{"key": "oldest run", "query": "old"}, {"key": "old run", "query": "old"}]
+
+    def __len__(self):
+        return 2
+
+
+def test_data_warehouse_runs_are_imported_once_on_first_use(tmp_path, monkeypatch):
+    import sys
+    import types
+
+    monkeypatch.setitem(sys.modules, "tiny_data_warehouse", types.SimpleNamespace(DataWarehouse=FakeDataWarehouse))
+    FakeDataWarehouse.imports = 0
+    location = str(tmp_path / "query_history")
+
+    assert QueryHistory(location).get_key(0) == "old run"
+    history = QueryHistory(location)
+    history.append("new run")
+    assert [history.get_key(i) for i in range(4)] == ["new run", "old run", "oldest run", ""]
+    assert history.import_data_warehouse() == 0
+    assert FakeDataWarehouse.imports == 1
+
+
+def test_a_history_with_runs_is_not_imported_into(tmp_path, monkeypatch):
+    import sys
+    import types
+
+    monkeypatch.setitem(sys.modules, "tiny_data_warehouse", types.SimpleNamespace(DataWarehouse=FakeDataWarehouse))
+    FakeDataWarehouse.imports = 0
+    location = str(tmp_path / "query_history")
+    EventLog(location).append({"key": "existing run"})
+
+    assert [QueryHistory(location).get_key(i) for i in range(2)] == ["existing run", ""]
+    assert FakeDataWarehouse.imports == 0
@@ -0,0 +1,67 @@
+import threading
+
+from python_search.events.frecency import FrecencyTable
+from python_search.search.search_ui.QueryLogic import QueryLogic
+
+
+def query_logic(tmp_path, monkeypatch, slow_backend=None):
+    """
+    QueryLogic over a few entries, with a fake slower backend returning what slow_backend returns
+    """
+    monkeypatch.setattr(QueryLogic, "ENABLE_BM25_SEARCH", False)
+    commands = {f"git {name}": f"git {name}" for name in ["pull", "push", "status", "log"]}
+    logic = QueryLogic(commands, frecency=FrecencyTable.load(str(tmp_path / "frecency.table")))
+
+    if slow_backend is not None:
+        string_results = logic.backend_results
+        monkeypatch.setattr(logic, "enabled_backends", lambda: ["string", "bm25"])
+        monkeypatch.setattr(
+            logic,
+            "backend_results",
+            lambda backend, query: string_results(backend, query) if backend == "string" else slow_backend(query),
+        )
+        logic.fanout = type(logic.fanout)(logic.backend_results)
+
+    return logic
+
+
+def test_streaming_search_shows_the_string_matches_then_the_slower_backends(tmp_path, monkeypatch):
+    logic = query_logic(tmp_path, monkeypatch, slow_backend=lambda query: [("git log", 10.0)])
+    stages = []
+
+    result = logic.search("git", on_results=stages.append)
+
+    assert len(stages) == 2
+    assert "git log" in stages[0]
+    assert stages[1][0] == "git log"
+    assert result == stages[1]
+    # the complete results are remembered
+    assert logic.cached_results("git") == result
+
+
+def test_cancelled_streaming_search_stops_waiting_for_the_slower_backends(tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def slow_backend(query):
+        release.wait(5)
+        return [("git log", 10.0)]
+
+    logic = query_logic(tmp_path, monkeypatch, slow_backend=slow_backend)
+    cancelled = threading.Event()
+    stages = []
+
+    def on_results(keys):
+        stages.append(keys)
+        cancelled.set()
+
+    result = logic.search("git", on_results=on_results, cancelled=cancelled)
+    release.set()
+
+    assert stages == [result]
+    assert logic.cached_results("git") is None
+
+
+def test_first_results_are_the_string_matches(tmp_path, monkeypatch):
+    logic = query_logic(tmp_path, monkeypatch, slow_backend=lambda query: [("git log", 10.0)])
+
+    assert logic.first_results("pu") == ["git pull", "git push"]
@@ -0,0 +1,37 @@
+from python_search.events.frecency import FrecencyTable
+from python_search.search.search_ui.QueryLogic import QueryLogic
+
+
+def query_logic(tmp_path, monkeypatch, runs):
+    monkeypatch.setattr(QueryLogic, "ENABLE_BM25_SEARCH", False)
+    location = str(tmp_path / "frecency.table")
+    for key, timestamp in runs:
+        FrecencyTable.add(key, timestamp, location)
+    commands = {f"git {name}": f"git {name}" for name in ["pull", "push", "status", "log"]}
+
+    return QueryLogic(commands, frecency=FrecencyTable.load(location))
+
+
+def test_empty_query_lists_the_most_frecent_entries_first(tmp_path, monkeypatch):
+    runs = [("git log", 1.0), ("git log", 1.0), ("git push", 1.0), ("deleted", 9.0)]
+    logic = query_logic(tmp_path, monkeypatch, runs)
+
+    assert logic.search("") == ["git log", "git push", "git pull", "git status"]
+
+
+def test_frequently_used_entries_rank_first(tmp_path, monkeypatch):
+    logic = query_logic(tmp_path, monkeypatch, [("git push", 1.0)])
+
+    assert logic.search("git pu") == ["git push", "git pull"]
+
+
+def test_runs_are_picked_up_at_most_once_per_refresh_interval(tmp_path, monkeypatch):
+    logic = query_logic(tmp_path, monkeypatch, [("git push", 1.0)])
+    assert logic.search("git pu") == ["git push", "git pull"]
+
+    for _ in range(3):
+        FrecencyTable.add("git pull", 1.0, str(tmp_path / "frecency.table"))
+    assert logic.search("git pu") == ["git push", "git pull"]
+
+    logic._frecency_refreshed_at -= QueryLogic.FRECENCY_REFRESH_SECONDS
+    assert logic.search("git pu") == ["git pull", "git push"]
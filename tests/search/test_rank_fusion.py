@@ -0,0 +1,32 @@
+from python_search.search.search_ui.rank_fusion import RankFusion
+
+
+def test_entries_found_by_several_backends_rank_first():
+    fusion = RankFusion(weights={"string": 1.0, "bm25": 1.0})
+
+    result = fusion.fuse(
+        "git push",
+        {
+            "string": [("git pull", 1.0), ("git push", 1.0)],
+            "bm25": [("git push", 7.0), ("docker push", 3.0)],
+        },
+        limit=10,
+    )
+
+    assert result == ["git push", "git pull", "docker push"]
+
+
+def test_weights_decide_between_backends():
+    candidates = {"string": [("a", 1.0)], "bm25": [("b", 5.0)]}
+
+    assert RankFusion(weights={"string": 1.0, "bm25": 0.5}).fuse("q", candidates, 10) == ["a", "b"]
+    assert RankFusion(weights={"string": 0.5, "bm25": 1.0}).fuse("q", candidates, 10) == ["b", "a"]
+
+
+def test_boosts_and_limit():
+    fusion = RankFusion(weights={"string": 1.0})
+    fusion.add_boost(RankFusion.recency_boost(["c", "b"]), 1.0)
+
+    result = fusion.fuse("q", {"string": [("a", 1.0), ("b", 1.0), ("c", 1.0)]}, limit=2)
+
+    assert result == ["c", "b"]
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from python_search.search.search_ui.search_daemon import (
+    SearchDaemon,
+    SearchDaemonClient,
+)
+
+
+class FakeSearchLogic:
+    def search(self, query):
+        return [key for key in ["abc", "def"] if query in key]
+
+
+def test_client_talks_to_daemon_over_socket(tmp_path):
+    socket_path = str(tmp_path / "daemon.sock")
+    daemon = SearchDaemon(socket_path)
+    daemon._commands = {"abc": {"snippet": "a"}, "def": {"snippet": "d"}}
+    daemon._search_logic = FakeSearchLogic()
+
+    thread = threading.Thread(target=daemon.serve, daemon=True)
+    thread.start()
+
+    client = None
+    for _ in range(100):
+        client = SearchDaemonClient.connect(socket_path)
+        if client:
+            break
+        time.sleep(0.01)
+
+    assert client is not None
+    assert client.entries() == daemon._commands
+    assert client.search("ab") == ["abc"]
+    assert client.search("") == ["abc", "def"]
+
+    client.shutdown()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_connect_returns_none_without_daemon(tmp_path):
+    assert SearchDaemonClient.connect(str(tmp_path / "missing.sock")) is None
+
+
+def test_reload_imports_again_unless_only_changes_are_asked_for(tmp_path, monkeypatch):
+    from python_search.configuration import entries_snapshot, loader
+    from python_search.search.search_ui import QueryLogic
+
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "entries_main.py").write_text("config = None\n")
+    imports = []
+
+    class FakeLoader:
+        def get_entries_project_root(self):
+            return str(project)
+
+        def load_config(self):
+            imports.append("load")
+            if len(imports) == 3:
+                raise Exception("broken entries")
+            return None
+
+        reload = load_config
+
+    class FakeSnapshot:
+        @staticmethod
+        def file_signatures(project_root):
+            return {}
+
+        @staticmethod
+        def write(configuration, files, project_root):
+            return FakeSnapshot()
+
+        def serialized_entries(self):
+            return {"abc": {"snippet": "a"}}
+
+    monkeypatch.setattr(loader, "ConfigurationLoader", FakeLoader)
+    monkeypatch.setattr(entries_snapshot, "EntriesSnapshot", FakeSnapshot)
+    monkeypatch.setattr(QueryLogic, "QueryLogic", lambda commands: FakeSearchLogic())
+    daemon = SearchDaemon(str(tmp_path / "daemon.sock"))
+    daemon._load()
+
+    daemon.handle({"method": "reload", "if_changed": True})
+    assert len(imports) == 1
+    daemon.handle({"method": "reload"})
+    assert len(imports) == 2
+
+    # a failed import keeps the changed file pending so the next reload imports it again
+    (project / "entries_main.py").write_text("config = 1\n")
+    with pytest.raises(Exception, match="broken entries"):
+        daemon.handle({"method": "reload", "if_changed": True})
+    daemon.handle({"method": "reload", "if_changed": True})
+    assert len(imports) == 4
@@ -0,0 +1,62 @@
+from python_search.search.search_ui.string_match_index import (
+    PrefixSearchStack,
+    StringMatchIndex,
+)
+
+
+def test_key_matches_come_before_content_matches():
+    index = StringMatchIndex(
+        {
+            "open mail": {"url": "https://gmail.com"},
+            "Gmail inbox": {"url": "https://mail.google.com"},
+            "docker pods": {"cmd": "kubectl get pods"},
+        }
+    )
+
+    assert index.search("MAIL", 10) == ["open mail", "Gmail inbox"]
+    assert index.search("get", 10) == ["docker pods"]
+    assert index.search("ma", 1) == ["open mail"]
+
+
+def test_matches_like_a_full_scan():
+    commands = {f"entry {i}": {"snippet": f"value {i * 7}"} for i in range(300)}
+    index = StringMatchIndex(commands)
+
+    for query in ["entry 1", "value 14", "e", "ry 29", "missing"]:
+        expected_keys = [key for key in commands if query in key.lower()]
+        expected_content = [key for key in commands if query not in key.lower() and query in str(commands[key]).lower()]
+        assert index.search(query, 50) == (expected_keys + expected_content)[:50]
+
+
+def test_sync_updates_and_removes_entries():
+    index = StringMatchIndex({"a": {"snippet": "foo"}, "b": {"snippet": "bar"}})
+
+    assert index.sync({"a": {"snippet": "baz"}, "c": {"snippet": "foo"}}) == 3
+    assert index.search("foo", 10) == ["c"]
+    assert index.search("baz", 10) == ["a"]
+    assert index.search("bar", 10) == []
+    assert index.sync({"a": {"snippet": "baz"}, "c": {"snippet": "foo"}}) == 0
+
+
+def test_prefix_stack_narrows_previous_matches():
+    commands = {f"entry {i}": {"snippet": f"value {i * 7}"} for i in range(300)}
+    index = StringMatchIndex(commands)
+    stack = PrefixSearchStack(index)
+
+    for query in ["ent", "entr", "entry 1", "entry 12", "val", "value 1", "value 14"]:
+        assert stack.string_match(query, 50) == index.search(query, 50)
+
+
+def test_prefix_stack_returns_cached_results_on_backspace():
+    index = StringMatchIndex({"git push": {"cmd": "git push"}, "git pull": {"cmd": "git pull"}})
+    stack = PrefixSearchStack(index, max_size=2)
+
+    stack.string_match("git", 10)
+    stack.store_results("git", ["git push", "git pull"])
+    assert stack.string_match("git pu", 10) == ["git push", "git pull"]
+    assert stack.string_match("git pus", 10) == ["git push"]
+
+    # the oldest frame was dropped to keep the stack bounded
+    assert stack.cached_results("git") is None
+    assert stack.string_match("git pu", 10) == ["git push", "git pull"]
+    assert stack.cached_results("git pu") is None
@@ -0,0 +1,75 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from python_search.search.search_ui.vector_index import NumpyVectorIndex  # noqa: E402
+
+
+def _random_index(number_of_lists=None, dtype="float32"):
+    random_generator = np.random.default_rng(1)
+    embeddings = random_generator.normal(size=(2000, 16)).astype(np.float32)
+    keys = [f"entry {i}" for i in range(len(embeddings))]
+    index = NumpyVectorIndex.build(keys, keys, embeddings, dtype=dtype, number_of_lists=number_of_lists)
+
+    return index, keys, embeddings
+
+
+def test_brute_force_returns_the_most_similar_entries():
+    index, keys, embeddings = _random_index()
+    query = embeddings[7] + 0.01
+
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:10]
+
+    assert [key for key, _ in index.top_k(query, 10)] == [keys[i] for i in expected]
+    assert index.top_k(query, 1)[0][0] == "entry 7"
+
+
+def test_inverted_lists_probing_every_list_are_exact():
+    exact, _, embeddings = _random_index()
+    index, _, _ = _random_index(number_of_lists=20)
+
+    assert index.offsets[-1] == len(index)
+    for query in embeddings[:20]:
+        assert [key for key, _ in index.top_k(query, 5, probes=20)] == [key for key, _ in exact.top_k(query, 5)]
+        assert index.top_k(query, 1, probes=3)[0][0] == exact.top_k(query, 1)[0][0]
+
+
+def test_saved_index_is_memory_mapped(tmp_path):
+    index, _, embeddings = _random_index(number_of_lists=10, dtype="float16")
+    index.save(str(tmp_path))
+    index.save(str(tmp_path))
+
+    loaded = NumpyVectorIndex.load(str(tmp_path))
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.vectors.dtype == np.float16
+    assert loaded.keys == index.keys
+    assert [key for key, _ in loaded.top_k(embeddings[3], 3, probes=10)][0] == "entry 3"
+    # the arrays of the first save are kept for readers of its manifest
+    assert len([name for name in tmp_path.iterdir() if name.suffix == ".npy"]) == 4
+
+    index.save(str(tmp_path))
+    assert len([name for name in tmp_path.iterdir() if name.suffix == ".npy"]) == 4
+
+
+def test_load_retries_when_the_arrays_were_removed_meanwhile(tmp_path, monkeypatch):
+    index, _, _ = _random_index()
+    index.save(str(tmp_path))
+    numpy_load = np.load
+    calls = []
+
+    def load_removed_once(*args, **kwargs):
+        calls.append(args[0])
+        if len(calls) == 1:
+            raise FileNotFoundError(args[0])
+        return numpy_load(*args, **kwargs)
+
+    monkeypatch.setattr(np, "load", load_removed_once)
+
+    assert NumpyVectorIndex.load(str(tmp_path)).keys == index.keys
+    assert len(calls) == 2
+
+
+def test_missing_index_loads_as_none(tmp_path):
+    assert NumpyVectorIndex.load(str(tmp_path)) is None
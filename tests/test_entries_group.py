@@ -0,0 +1,61 @@
+import pytest
+
+from python_search.entries_group import EntriesGroup
+
+
+class WorkEntries(EntriesGroup):
+    def __init__(self):
+        self.commands = {"Open Jira": {"url": "https://jira"}, "standup": {"snippet": "yesterday"}}
+
+
+class PersonalEntries(EntriesGroup):
+    def __init__(self):
+        self.commands = {"open jira": {"url": "https://other"}, "standup": {"snippet": "overridden"}}
+
+
+def test_get_command_is_case_insensitive():
+    group = EntriesGroup()
+    group.aggregate_commands([WorkEntries])
+
+    assert group.get_command("open jira")["url"] == "https://jira"
+    assert group.get_command("STANDUP")["snippet"] == "yesterday"
+    with pytest.raises(Exception, match="Value not found for key: Missing"):
+        group.get_command("Missing")
+
+
+def test_aggregation_reports_keys_only_differing_by_case():
+    group = EntriesGroup()
+    group.aggregate_commands([WorkEntries, PersonalEntries])
+
+    assert list(group.commands) == ["Open Jira", "standup", "open jira"]
+    assert group.get_command("standup")["snippet"] == "overridden"
+    # the first key defined wins
+    assert group.get_command("OPEN JIRA")["url"] == "https://jira"
+    assert group.get_key_collisions() == [["Open Jira", "open jira"]]
+    # the class attribute shared by all groups is left untouched
+    assert EntriesGroup.commands == {}
+
+
+def test_lookups_follow_changes_of_the_commands():
+    group = EntriesGroup()
+    group.commands = {"a": {"snippet": "a"}}
+    assert group.get_command("A") == {"snippet": "a"}
+
+    del group.commands["a"]
+    group.commands["B"] = {"snippet": "b"}
+    assert group.get_command("B") == {"snippet": "b"}
+    with pytest.raises(Exception):
+        group.get_command("a")
+
+    group.commands["C"] = {"snippet": "c"}
+    assert group.get_command("c") == {"snippet": "c"}
+
+
+def test_unknown_keys_do_not_rebuild_the_index(monkeypatch):
+    group = EntriesGroup()
+    group.commands = {"a": {"snippet": "a"}}
+    group.get_command("a")
+
+    monkeypatch.setattr(group, "_build_key_index", lambda: pytest.fail("the index was rebuilt"))
+    with pytest.raises(Exception):
+        group.get_command("missing")
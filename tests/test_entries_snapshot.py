@@ -0,0 +1,67 @@
+import datetime
+import os
+
+from python_search.configuration.entries_snapshot import (
+    EntriesSnapshot,
+    SnapshotConfiguration,
+)
+
+
+class FakeConfiguration:
+    collect_data = True
+    use_webservice = False
+
+    def __init__(self, commands):
+        self.commands = commands
+
+
+def _write(tmp_path, commands):
+    project = tmp_path / "project"
+    project.mkdir(exist_ok=True)
+    (project / "entries_main.py").write_text("config = None\n")
+    location = str(tmp_path / "entries.snapshot")
+    files = EntriesSnapshot.file_signatures(str(project))
+
+    return EntriesSnapshot.write(FakeConfiguration(commands), files, str(project), location), project
+
+
+def test_entries_are_read_back_from_the_snapshot(tmp_path):
+    commands = {
+        "open github": {"url": "https://github.com", "tags": ["Work"]},
+        "List Files": {"cli_cmd": "ls -la", "new-window-non-cli": True},
+        "today": {"snippet": "date", "created_at": datetime.datetime(2024, 1, 1)},
+    }
+    written, _ = _write(tmp_path, commands)
+    snapshot = EntriesSnapshot.open(written.location)
+
+    assert len(snapshot) == 3
+    assert list(snapshot.keys()) == list(commands.keys())
+    assert snapshot.serialized_entries()["open github"] == {"url": "https://github.com"}
+    assert snapshot.get_tags("open github") == ["Work"]
+    # lookups are case insensitive like EntriesGroup.get_command
+    assert snapshot.get_value("list files") == commands["List Files"]
+    assert snapshot.get_value("missing") is None
+    # values with python objects can only be run by importing the project
+    assert snapshot.get_serialized("today") == {"snippet": "date"}
+    assert snapshot.get_value("today") is None
+
+    configuration = SnapshotConfiguration(snapshot)
+    assert configuration.collect_data is True
+    assert configuration.get_command("open github")["url"] == "https://github.com"
+
+
+def test_snapshot_is_stale_when_a_project_file_changes(tmp_path):
+    snapshot, project = _write(tmp_path, {"a": {"snippet": "a"}})
+    assert EntriesSnapshot.open_fresh(snapshot.location, str(project)) is not None
+
+    (project / "entries_main.py").write_text("config = 'changed'\n")
+    assert EntriesSnapshot.open_fresh(snapshot.location, str(project)) is None
+
+
+def test_invalid_snapshots_are_ignored(tmp_path):
+    location = tmp_path / "entries.snapshot"
+    location.write_bytes(b"not a snapshot at all, just some bytes to parse")
+
+    assert EntriesSnapshot.open(str(location)) is None
+    assert EntriesSnapshot.open(str(tmp_path / "missing")) is None
+    assert not os.path.exists(tmp_path / "missing")
@@ -0,0 +1,56 @@
+import os
+
+from python_search.entry_change import EntryChangeDetector
+
+
+def test_reports_the_changed_keys(tmp_path):
+    state_file = str(tmp_path / "state.json")
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "entries_main.py").write_text("config = None\n")
+
+    detector = EntryChangeDetector(state_file, str(project))
+    first = detector.detect({"a": {"snippet": "1"}, "b": {"snippet": "2"}})
+    assert first.added == ["a", "b"]
+
+    detector = EntryChangeDetector(state_file, str(project))
+    assert not detector.detect({"a": {"snippet": "1"}, "b": {"snippet": "2"}})
+
+    changes = detector.detect({"a": {"snippet": "changed"}, "c": {"snippet": "3"}})
+    assert changes.added == ["c"]
+    assert changes.updated == ["a"]
+    assert changes.removed == ["b"]
+
+
+def test_files_are_only_hashed_when_their_stat_changes(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    entries_file = project / "entries_main.py"
+    entries_file.write_text("config = None\n")
+
+    detector = EntryChangeDetector(str(tmp_path / "state.json"), str(project))
+    assert detector.changed_files() == [str(entries_file)]
+    assert detector.changed_files() == []
+
+    # touching without changing the content is not a change
+    os.utime(entries_file, ns=(1, 1))
+    assert detector.changed_files() == []
+
+    entries_file.write_text("config = 1\n")
+    (project / "more_entries.py").write_text("")
+    assert detector.changed_files() == [str(entries_file), str(project / "more_entries.py")]
+
+    entries_file.unlink()
+    assert detector.changed_files() == [str(entries_file)]
+
+
+def test_changed_files_without_update_are_reported_again(tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    entries_file = project / "entries_main.py"
+    entries_file.write_text("config = None\n")
+
+    detector = EntryChangeDetector(str(tmp_path / "state.json"), str(project))
+    assert detector.changed_files(update=False) == [str(entries_file)]
+    assert detector.changed_files() == [str(entries_file)]
+    assert detector.changed_files(update=False) == []
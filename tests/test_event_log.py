@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+from python_search.events.data_collector import GenericDataCollector
+from python_search.events.event_log import EventLog, Position
+
+
+def test_events_are_read_in_order_across_segments(tmp_path):
+    event_log = EventLog(str(tmp_path / "searches_performed"), segment_size=100)
+
+    for i in range(10):
+        event_log.append({"key": f"key {i}", "timestamp": str(i)})
+
+    assert len(event_log.segments()) > 1
+    assert [event["key"] for event in event_log.read()] == [f"key {i}" for i in range(10)]
+    assert [event["key"] for event in event_log.read_reverse()] == [f"key {i}" for i in reversed(range(10))]
+
+
+def test_a_writer_follows_segments_rotated_by_another_one(tmp_path):
+    stale_writer = EventLog(str(tmp_path), segment_size=100)
+    stale_writer.append({"key": "stale 0"})
+    writer = EventLog(str(tmp_path), segment_size=100)
+    # too big for the first segment, so it starts the second one
+    writer.append({"key": "x" * 80})
+
+    stale_writer.append({"key": "stale 1"})
+
+    assert len(writer.segments()) > 1
+    assert [event["key"] for event in writer.read()][-1] == "stale 1"
+
+
+def test_reading_resumes_from_a_position(tmp_path):
+    event_log = EventLog(str(tmp_path), segment_size=100)
+    for i in range(5):
+        event_log.append({"key": f"key {i}"})
+
+    position, _ = list(event_log.read_with_positions())[2]
+    for i in range(5, 8):
+        event_log.append({"key": f"key {i}"})
+
+    assert [event["key"] for event in event_log.read(position)] == [f"key {i}" for i in range(3, 8)]
+    assert list(event_log.read(event_log.end())) == []
+
+
+def test_a_partially_written_event_is_skipped(tmp_path):
+    event_log = EventLog(str(tmp_path))
+    end = event_log.append({"key": "complete"})
+    with open(os.path.join(str(tmp_path), os.listdir(str(tmp_path))[0]), "ab") as f:
+        f.write(b'{"key": "cut')
+
+    assert [position for position, _ in event_log.read_with_positions()] == [end]
+    assert [event["key"] for event in event_log.read_reverse()] == ["complete"]
+
+
+def test_reverse_reading_handles_lines_across_blocks(tmp_path):
+    event_log = EventLog(str(tmp_path))
+    event_log.READ_BLOCK_SIZE = 7
+    for i in range(20):
+        event_log.append({"key": f"key {i}"})
+
+    assert [event["key"] for event in event_log.read_reverse()] == [f"key {i}" for i in reversed(range(20))]
+
+
+def test_unknown_fsync_policy():
+    with pytest.raises(ValueError):
+        EventLog("/tmp", fsync="sometimes")
+
+
+def test_data_collector_reads_legacy_files_and_the_log(tmp_path):
+    collector = GenericDataCollector(base_location=str(tmp_path))
+    os.makedirs(collector.data_location("searches_performed"))
+    for timestamp in ["1700000000.5", "1700000001.25"]:
+        with open(f"{collector.data_location('searches_performed')}/{timestamp}.json", "w") as f:
+            json.dump({"key": f"legacy {timestamp}"}, f)
+
+    collector.write(data={"key": "new"}, table_name="searches_performed")
+
+    assert [event["key"] for event in collector.read("searches_performed")] == [
+        "legacy 1700000000.5",
+        "legacy 1700000001.25",
+        "new",
+    ]
+    assert [event["key"] for event in collector.read_reverse("searches_performed")] == [
+        "new",
+        "legacy 1700000001.25",
+        "legacy 1700000000.5",
+    ]
+    assert EventLog(collector.data_location("searches_performed")).end() == Position(1, len('{"key": "new"}\n'))
@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+from python_search.events.event_sink import EventSink
+
+
+def test_events_are_written_in_the_background():
+    sink = EventSink()
+    written = []
+
+    for i in range(250):
+        assert sink.submit(written.append, i)
+
+    assert sink.flush(timeout=5)
+    assert written == list(range(250))
+    assert sink.stats() == {"submitted": 250, "written": 250, "failed": 0, "dropped": 0, "queued": 0}
+    sink.close()
+
+
+def test_failed_writes_are_counted():
+    sink = EventSink()
+
+    def fail():
+        raise Exception("disk full")
+
+    sink.submit(fail)
+    sink.submit(lambda: None)
+    sink.close()
+
+    assert sink.failed == 1
+    assert sink.written == 1
+
+
+def blocked_sink(policy):
+    """
+    A sink with a queue of 2 whose writer thread waits for the release event
+    """
+    sink = EventSink(max_queue_size=2, policy=policy, batch_size=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    sink.submit(block)
+    started.wait(5)
+
+    return sink, release
+
+
+def test_drop_newest_when_full():
+    sink, release = blocked_sink(EventSink.DROP_NEWEST)
+    written = []
+
+    results = [sink.submit(written.append, i) for i in range(4)]
+    release.set()
+    sink.close()
+
+    assert results == [True, True, False, False]
+    assert written == [0, 1]
+    assert sink.dropped == 2
+
+
+def test_drop_oldest_when_full():
+    sink, release = blocked_sink(EventSink.DROP_OLDEST)
+    written = []
+
+    for i in range(4):
+        sink.submit(written.append, i)
+    release.set()
+    sink.close()
+
+    assert written == [2, 3]
+    assert sink.dropped == 2
+
+
+def test_block_waits_for_room():
+    sink, release = blocked_sink(EventSink.BLOCK)
+    written = []
+    sink.submit(written.append, 0)
+    sink.submit(written.append, 1)
+
+    blocked = threading.Thread(target=sink.submit, args=(written.append, 2))
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join(5)
+    sink.close()
+
+    assert written == [0, 1, 2]
+    assert sink.dropped == 0
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        EventSink(policy="retry")
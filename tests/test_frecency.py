@@ -0,0 +1,152 @@
+import multiprocessing
+import os
+
+import pytest
+
+from python_search.events.frecency import FrecencyTable
+
+DAY = 24 * 3600
+
+
+def test_runs_add_up_and_decay_with_the_half_life(tmp_path):
+    location = str(tmp_path / "frecency.table")
+    FrecencyTable.add("git push", 1000.0, location)
+    FrecencyTable.add("git push", 1000.0, location)
+    FrecencyTable.add("docker pods", 1000.0, location)
+
+    table = FrecencyTable.load(location)
+
+    assert table.score("git push", 1000.0) == 2.0
+    assert table.score("git push", 1000.0 + FrecencyTable.HALF_LIFE_SECONDS) == 1.0
+    assert table.score("missing", 1000.0) == 0.0
+    assert table.relative_score("git push") == 1.0
+    assert table.relative_score("docker pods") == 0.5
+
+
+def test_a_recent_run_outweighs_older_ones(tmp_path):
+    location = str(tmp_path / "frecency.table")
+    for _ in range(3):
+        FrecencyTable.add("old", 0.0, location)
+    FrecencyTable.add("new", 60 * DAY, location)
+
+    assert FrecencyTable.load(location).top(2) == ["new", "old"]
+
+
+def test_the_reference_moves_when_scores_grow_too_large(tmp_path):
+    location = str(tmp_path / "frecency.table")
+    years = 50 * 365 * DAY
+    FrecencyTable.add("old", 0.0, location)
+    FrecencyTable.add("new", years, location)
+
+    table = FrecencyTable.load(location)
+
+    assert table.reference == years
+    assert table.score("new", years) == 1.0
+    assert table.top(2) == ["new", "old"]
+
+
+def test_missing_or_invalid_table(tmp_path):
+    assert len(FrecencyTable.load(str(tmp_path / "missing.table"))) == 0
+
+    invalid = tmp_path / "invalid.table"
+    invalid.write_bytes(b"not a table")
+    table = FrecencyTable.load(str(invalid))
+    assert len(table) == 0
+    assert table.boost()("git push") == 0.0
+
+
+def test_refresh_follows_the_file(tmp_path):
+    location = str(tmp_path / "frecency.table")
+    table = FrecencyTable.load(location)
+    boost = table.boost()
+
+    FrecencyTable.add("git push", 1000.0, location)
+
+    assert table.refresh()
+    assert not table.refresh()
+    assert boost("git push") == 1.0
+
+
+def test_rebuild_from_events(tmp_path):
+    events = [{"key": "a", "timestamp": "10"}, {"key": "b", "timestamp": "10"}, {"key": "b"}, {"key": None}]
+
+    FrecencyTable.rebuild(events, str(tmp_path / "frecency.table"))
+
+    table = FrecencyTable.load(str(tmp_path / "frecency.table"))
+    assert table.score("a", 10.0) == 1.0
+    assert table.score("b", 10.0) == 1.0
+    assert len(table) == 2
+
+
+def test_runs_are_appended_and_read_incrementally(tmp_path):
+    location = str(tmp_path / "frecency.table")
+    FrecencyTable.add("git push", 1000.0, location)
+    table = FrecencyTable.load(location)
+    size = os.path.getsize(location)
+
+    FrecencyTable.add("git push", 1000.0, location)
+    FrecencyTable.add("docker pods", 1000.0, location)
+
+    # only the runs are appended, the scores written first are left as they are
+    assert os.path.getsize(location) == size + 2 * FrecencyTable.ENTRY.size + len("git push") + len("docker pods")
+    assert table.refresh()
+    assert table.score("git push", 1000.0) == 2.0
+    assert table.top(2) == ["git push", "docker pods"]
+
+
+def test_appended_runs_are_compacted_into_the_scores(tmp_path, monkeypatch):
+    monkeypatch.setattr(FrecencyTable, "COMPACT_MIN_BYTES", 100)
+    location = str(tmp_path / "frecency.table")
+    table = FrecencyTable.load(location)
+    for i in range(50):
+        FrecencyTable.add(f"key {i % 3}", 1000.0, location)
+        table.refresh()
+
+    assert os.path.getsize(location) < 50 * FrecencyTable.ENTRY.size
+    assert {key: table.score(key, 1000.0) for key in table.top(3)} == {"key 0": 17.0, "key 1": 17.0, "key 2": 16.0}
+    assert FrecencyTable.load(location).score("key 0", 1000.0) == 17.0
+
+
+def test_a_corrupt_table_is_not_added_to(tmp_path):
+    invalid = tmp_path / "invalid.table"
+    invalid.write_bytes(b"not a table")
+
+    assert not FrecencyTable.add("git push", 1000.0, str(invalid))
+    assert invalid.read_bytes() == b"not a table"
+
+
+def add_runs(location, process):
+    for i in range(50):
+        FrecencyTable.add(f"key {i % 5}", 1000.0, location)
+
+
+def test_concurrent_writers(tmp_path):
+    location = str(tmp_path / "frecency.table")
+    processes = [multiprocessing.Process(target=add_runs, args=(location, i)) for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    table = FrecencyTable.load(location)
+    assert {key: table.score(key, 1000.0) for key in table.top(10)} == {f"key {i}": 40.0 for i in range(5)}
+
+
+def test_the_writer_rebuilds_a_corrupt_table_from_the_events(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    pytest.importorskip("pydantic")
+    from python_search.events import frecency, recency_ring
+    from python_search.events.data_collector import GenericDataCollector
+    from python_search.events.run_performed.writer import RunPerformedWriter
+
+    location = tmp_path / "frecency.table"
+    location.write_bytes(b"not a table")
+    monkeypatch.setattr(frecency, "FRECENCY_LOCATION", str(location))
+    monkeypatch.setattr(recency_ring, "RECENCY_RING_LOCATION", str(tmp_path / "recent.ring"))
+    monkeypatch.setattr(GenericDataCollector, "BASE_DATA_DESTINATION_DIR", str(tmp_path) + "/")
+    GenericDataCollector().write(data={"key": "git push", "timestamp": "1"}, table_name="searches_performed")
+
+    RunPerformedWriter().write(SimpleNamespace(key="docker pods", timestamp=None))
+
+    assert set(FrecencyTable.load(str(location)).top(10)) == {"git push", "docker pods"}
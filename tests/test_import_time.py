@@ -0,0 +1,76 @@
+"""
+Modules imported by the console entry points.
+
+Every entry point starts a new interpreter, so what its module imports is paid on every
+shortcut or window opened. Heavy dependencies have to be imported where they are used.
+The import time budgets are checked in tests/benchmarks/import_time_benchmark.py.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+# dependencies that take tens to hundreds of milliseconds to import
+HEAVY_MODULES = {
+    "chromadb",
+    "datadog",
+    "dill",
+    "fire",
+    "matplotlib",
+    "nltk",
+    "numpy",
+    "openai",
+    "pandas",
+    "pydantic",
+    "pyspark",
+    "requests",
+    "tiny_data_warehouse",
+}
+
+PYPROJECT_LOCATION = os.path.join(os.path.dirname(os.path.dirname(__file__)), "pyproject.toml")
+
+
+def entry_points():
+    """
+    Console script -> module of every script in pyproject.toml, so new scripts are checked too
+    """
+    import tomllib
+
+    with open(PYPROJECT_LOCATION, "rb") as f:
+        scripts = tomllib.load(f)["tool"]["poetry"]["scripts"]
+
+    return {script: target.split(":")[0] for script, target in scripts.items()}
+
+
+ENTRY_POINTS = entry_points()
+
+
+def imported_modules(module: str) -> set:
+    """
+    Every module loaded in a new interpreter after importing the module
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print(chr(10).join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        missing = re.search(r"No module named '([^'.]+)", result.stderr)
+        if missing and missing.group(1) != "python_search":
+            pytest.skip(f"{module} needs {missing.group(1)} which is not installed")
+        raise AssertionError(result.stderr)
+
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize("script", ENTRY_POINTS.keys())
+def test_entry_points_do_not_import_heavy_dependencies(script):
+    imported = imported_modules(ENTRY_POINTS[script])
+
+    heavy = {name for name in imported if name.split(".")[0] in HEAVY_MODULES}
+
+    assert not heavy, f"{script} imports {sorted(heavy)} at startup"
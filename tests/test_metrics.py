@@ -0,0 +1,86 @@
+import json
+import socket
+
+from python_search.metrics import (
+    Histogram,
+    HistogramBackend,
+    Metrics,
+    NoopBackend,
+    PrometheusBackend,
+    StatsdBackend,
+)
+
+
+def test_histogram_percentiles_are_within_the_precision():
+    histogram = Histogram()
+    for i in range(1, 10001):
+        histogram.record(i / 1000)
+
+    assert histogram.count == 10000
+    for percentile, expected in [(50, 5.0), (90, 9.0), (99, 9.9)]:
+        assert abs(histogram.percentile(percentile) - expected) <= expected * Histogram.PRECISION
+    assert histogram.percentile(100) == 10.0
+    assert len(histogram.buckets) < 1000
+
+
+def test_noop_metrics_do_not_wrap_or_buffer():
+    metrics = Metrics(NoopBackend())
+
+    def render():
+        return 1
+
+    assert metrics.timed("ps_render")(render) is render
+    metrics.increment("ps_run_key")
+    assert not metrics._buffer
+    assert metrics._thread is None
+
+
+def test_metrics_are_flushed_to_the_histogram_backend(tmp_path):
+    location = str(tmp_path / "metrics.json")
+    metrics = Metrics(HistogramBackend(location), flush_interval=60)
+
+    @metrics.timed("ps_render")
+    def render():
+        return "rendered"
+
+    assert render() == "rendered"
+    metrics.increment("ps_run_key")
+    metrics.increment("ps_run_key")
+    metrics.gauge("ps_query_len_size", 4)
+    # buffered until flushed by the background thread or on close
+    assert not metrics.backend.counters
+
+    metrics.close()
+    with open(location) as f:
+        summary = json.load(f)
+
+    assert summary["counters"] == {"ps_run_key": 2}
+    assert summary["gauges"] == {"ps_query_len_size": 4}
+    assert summary["histograms"]["ps_render"]["count"] == 1
+
+
+def test_statsd_backend_batches_metrics_in_packets():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(2)
+    backend = StatsdBackend("127.0.0.1", server.getsockname()[1])
+
+    backend.send([("counter", "ps_run_key", 1), ("gauge", "ps_query_len_size", 3), ("histogram", "ps_render", 0.5)])
+
+    assert server.recv(StatsdBackend.MAX_PACKET_SIZE) == b"ps_run_key:1|c\nps_query_len_size:3|g\nps_render:0.5|h"
+    backend.close()
+    server.close()
+
+
+def test_prometheus_backend_writes_the_exposition_file(tmp_path):
+    location = str(tmp_path / "metrics.prom")
+    backend = PrometheusBackend(location)
+
+    backend.send([("counter", "ps_run_key", 1), ("histogram", "ps_render", 0.003), ("histogram", "ps_render", 2)])
+
+    with open(location) as f:
+        exposition = f.read()
+    assert "python_search_ps_run_key_total 1" in exposition
+    assert 'python_search_ps_render_bucket{le="0.005"} 1' in exposition
+    assert 'python_search_ps_render_bucket{le="+Inf"} 2' in exposition
+    assert "python_search_ps_render_count 2" in exposition
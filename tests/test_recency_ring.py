@@ -0,0 +1,89 @@
+import multiprocessing
+
+import pytest
+
+from python_search.events.recency_ring import RecencyRing
+
+
+def test_keys_are_unique_and_the_latest_first(tmp_path):
+    ring = RecencyRing.open(str(tmp_path / "recent.ring"), create=True)
+
+    ring.add("git push", 1.0)
+    ring.add("docker pods", 2.0)
+    ring.add("git push", 3.0)
+
+    assert ring.latest(10) == [("git push", 3.0), ("docker pods", 2.0)]
+    assert ring.latest_keys(1) == ["git push"]
+    assert len(ring) == 2
+
+
+def test_the_least_recently_used_key_is_evicted(tmp_path):
+    location = str(tmp_path / "recent.ring")
+    ring = RecencyRing.open(location, create=True)
+
+    for i in range(RecencyRing.CAPACITY + 2):
+        ring.add(f"key {i}")
+    ring.close()
+
+    ring = RecencyRing.open(location)
+    keys = ring.latest_keys(RecencyRing.CAPACITY + 10)
+    assert len(keys) == RecencyRing.CAPACITY
+    assert keys[0] == f"key {RecencyRing.CAPACITY + 1}"
+    assert "key 0" not in keys and "key 1" not in keys
+
+
+def test_missing_or_invalid_ring(tmp_path):
+    assert RecencyRing.open(str(tmp_path / "missing.ring")) is None
+
+    invalid = tmp_path / "invalid.ring"
+    invalid.write_bytes(b"not a ring")
+    assert RecencyRing.open(str(invalid)) is None
+
+
+def test_rebuild_from_the_latest_events(tmp_path):
+    events = [{"key": "c", "timestamp": "3"}, {"key": "b", "timestamp": "2"}, {"key": "c"}, {"key": None}]
+
+    ring = RecencyRing.rebuild(events, str(tmp_path / "recent.ring"))
+
+    assert ring.latest(10) == [("c", 3.0), ("b", 2.0)]
+
+
+def test_the_first_write_builds_the_ring_from_the_existing_events(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    pytest.importorskip("pydantic")
+    from python_search.events import frecency, recency_ring
+    from python_search.events.data_collector import GenericDataCollector
+    from python_search.events.run_performed.writer import RunPerformedWriter
+
+    location = str(tmp_path / "recent.ring")
+    monkeypatch.setattr(recency_ring, "RECENCY_RING_LOCATION", location)
+    monkeypatch.setattr(frecency, "FRECENCY_LOCATION", str(tmp_path / "frecency.table"))
+    monkeypatch.setattr(GenericDataCollector, "BASE_DATA_DESTINATION_DIR", str(tmp_path) + "/")
+    collector = GenericDataCollector()
+    collector.write(data={"key": "git push", "timestamp": "1"}, table_name="searches_performed")
+    collector.write(data={"key": "docker pods", "timestamp": "2"}, table_name="searches_performed")
+
+    RunPerformedWriter().write(SimpleNamespace(key="open browser", timestamp=None))
+
+    ring = RecencyRing.open(location)
+    assert ring.latest_keys(10) == ["open browser", "docker pods", "git push"]
+
+
+def add_keys(location, process):
+    ring = RecencyRing.open(location, create=True)
+    for i in range(100):
+        ring.add(f"process {process} key {i % 20}")
+    ring.close()
+
+
+def test_concurrent_writers(tmp_path):
+    location = str(tmp_path / "recent.ring")
+    processes = [multiprocessing.Process(target=add_keys, args=(location, i)) for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    keys = RecencyRing.open(location).latest_keys(1000)
+    assert sorted(keys) == sorted(f"process {process} key {i}" for process in range(4) for i in range(20))
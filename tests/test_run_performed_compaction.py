@@ -0,0 +1,75 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from python_search.events.event_log import EventLog  # noqa: E402
+from python_search.events.run_performed.compaction import RunPerformedCompaction  # noqa: E402
+
+
+def timestamp(date: str) -> str:
+    return str(datetime.strptime(date, "%Y-%m-%d %H:%M:%S").timestamp())
+
+
+def load(clean_location: str):
+    import pyarrow.dataset as ds
+
+    return ds.dataset(clean_location, format="parquet", partitioning="hive").to_table().sort_by("timestamp").to_pylist()
+
+
+def test_compaction_only_appends_the_new_events(tmp_path):
+    events = str(tmp_path / "searches_performed")
+    clean = str(tmp_path / "searches_performed_clean")
+    event_log = EventLog(events)
+    event_log.append({"key": "a", "rank_position": "1", "timestamp": timestamp("2024-01-01 10:00:00")})
+    event_log.append({"key": "b", "rank_position": None, "timestamp": timestamp("2024-01-02 10:00:00")})
+    event_log.append({"key": "no timestamp", "timestamp": None})
+
+    assert RunPerformedCompaction(events, clean).compact() == 2
+    assert RunPerformedCompaction(events, clean).compact() == 0
+
+    event_log.append({"key": "c", "timestamp": timestamp("2024-01-02 11:00:00")})
+    assert RunPerformedCompaction(events, clean).compact() == 1
+
+    rows = load(clean)
+    assert [(row["key"], str(row["date"]), row["timestamp"]) for row in rows] == [
+        ("a", "2024-01-01", "2024-01-01 10:00:00"),
+        ("b", "2024-01-02", "2024-01-02 10:00:00"),
+        ("c", "2024-01-02", "2024-01-02 11:00:00"),
+    ]
+    assert rows[0]["rank_position"] == 1
+    # the partition of the first day was not touched by the last run
+    assert len(os.listdir(os.path.join(clean, "date=2024-01-01"))) == 1
+    assert len(os.listdir(os.path.join(clean, "date=2024-01-02"))) == 2
+
+
+def test_a_repeated_run_replaces_instead_of_duplicating(tmp_path):
+    events = str(tmp_path / "searches_performed")
+    clean = str(tmp_path / "searches_performed_clean")
+    EventLog(events).append({"key": "a", "timestamp": timestamp("2024-01-01 10:00:00")})
+
+    compaction = RunPerformedCompaction(events, clean)
+    compaction.compact()
+    # as if the run crashed before saving the watermark
+    os.remove(os.path.join(clean, RunPerformedCompaction.WATERMARK_NAME))
+    compaction.compact()
+
+    assert [row["key"] for row in load(clean)] == ["a"]
+
+
+def test_legacy_files_are_compacted_once(tmp_path):
+    events = str(tmp_path / "searches_performed")
+    clean = str(tmp_path / "searches_performed_clean")
+    os.makedirs(events)
+    for key, date in [("old", "2023-12-31 09:00:00"), ("older", "2023-12-30 09:00:00")]:
+        with open(os.path.join(events, f"{timestamp(date)}.json"), "w") as f:
+            json.dump({"key": key, "timestamp": timestamp(date)}, f)
+
+    assert RunPerformedCompaction(events, clean).compact() == 2
+    EventLog(events).append({"key": "new", "timestamp": timestamp("2024-01-01 10:00:00")})
+    assert RunPerformedCompaction(events, clean).compact() == 1
+
+    assert [row["key"] for row in load(clean)] == ["older", "old", "new"]
@@ -0,0 +1,92 @@
+import socket
+
+import pytest
+
+from python_search.events.run_performed.shipper import RunPerformedShipper
+from tests.log_run_server import LogRunServer
+
+
+@pytest.fixture
+def server():
+    server = LogRunServer().start()
+    yield server
+    server.stop()
+
+
+def unused_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_events_are_shipped_in_batches_over_one_connection(server, tmp_path):
+    shipper = RunPerformedShipper(server.url, str(tmp_path))
+    shipper.BATCH_SIZE = 10
+    for i in range(25):
+        shipper.spool({"key": f"key {i}"})
+
+    assert shipper.ship() == 25
+
+    assert [event["key"] for event in server.events] == [f"key {i}" for i in range(25)]
+    assert server.requests == 3
+    assert server.connections == 1
+    assert shipper.pending() == 0
+    # already shipped events are not sent again
+    assert shipper.ship() == 0
+
+
+def test_events_are_kept_while_the_webservice_is_down(server, tmp_path):
+    down = RunPerformedShipper(f"http://127.0.0.1:{unused_port()}", str(tmp_path))
+    assert down.send({"key": "git push"}) == 0
+    assert down.send({"key": "docker pods"}) == 0
+    assert down.pending() == 2
+
+    assert RunPerformedShipper(server.url, str(tmp_path)).ship() == 2
+    assert [event["key"] for event in server.events] == ["git push", "docker pods"]
+
+
+def test_server_errors_are_retried_with_the_same_idempotency_key(server, tmp_path):
+    shipper = RunPerformedShipper(server.url, str(tmp_path))
+    shipper.BACKOFF_SECONDS = 0.001
+    server.failures = [503, 500]
+
+    assert shipper.send({"key": "git push"}) == 1
+
+    assert server.requests == 3
+    assert [event["key"] for event in server.events] == ["git push"]
+
+
+def test_a_batch_is_left_in_the_spool_after_the_last_retry(server, tmp_path):
+    shipper = RunPerformedShipper(server.url, str(tmp_path))
+    shipper.BACKOFF_SECONDS = 0.001
+    server.failures = [503] * (RunPerformedShipper.MAX_RETRIES + 1)
+
+    assert shipper.send({"key": "git push"}) == 0
+    assert shipper.pending() == 1
+
+    assert shipper.ship() == 1
+    assert len(server.events) == 1
+
+
+def test_events_are_sent_one_by_one_without_a_batch_endpoint(tmp_path):
+    server = LogRunServer(batch_endpoint=False).start()
+    shipper = RunPerformedShipper(server.url, str(tmp_path))
+    for key in ["a", "b"]:
+        shipper.spool({"key": key})
+
+    assert shipper.ship() == 2
+    server.stop()
+
+    assert [event["key"] for event in server.events] == ["a", "b"]
+    assert all(event["event_id"] for event in server.events)
+
+
+def test_rejected_events_do_not_block_the_spool(server, tmp_path):
+    shipper = RunPerformedShipper(server.url, str(tmp_path))
+    server.failures = [422]
+
+    assert shipper.send({"key": "invalid"}) == 1
+    assert shipper.send({"key": "valid"}) == 1
+
+    assert [event["key"] for event in server.events] == ["valid"]
+    assert shipper.pending() == 0
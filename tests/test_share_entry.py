@@ -66,9 +66,9 @@ class TestShareEntry:
         assert "KEY" in method_output, "Expected KEY parameter not found in method help"
 
     @patch("python_search.share_entry.Clipboard")
-    @patch("python_search.share_entry.ConfigurationLoader")
+    @patch("python_search.search.entries_loader.EntriesLoader.load_serialized_entries")
     def test_share_only_value_copies_entry_content_to_clipboard(
-        self, mock_loader, mock_clipboard
+        self, mock_load_entries, mock_clipboard
     ):
         """
         Validates that share_only_value correctly extracts and copies entry content.
@@ -79,7 +79,7 @@ class TestShareEntry:
         Business rule: When copying an entry value, only the content should
         be copied to clipboard, and the user should be notified of the action.
 
-        How it works: Mocks the configuration loader and clipboard, then verifies that
+        How it works: Mocks the serialized entries and clipboard, then verifies that
         the correct entry content is extracted and copied with notifications.
 
         This test can break if:
@@ -92,7 +92,7 @@ class TestShareEntry:
         mock_entries = {
             "test_key": {"snippet": "test content value", "type": "snippet"}
         }
-        mock_loader.return_value.load_entries.return_value = mock_entries
+        mock_load_entries.return_value = mock_entries
         mock_clipboard_instance = MagicMock()
         mock_clipboard.return_value = mock_clipboard_instance
 
@@ -107,8 +107,8 @@ class TestShareEntry:
             "test content value", enable_notifications=True, notify=True
         )
 
-    @patch("python_search.share_entry.ConfigurationLoader")
-    def test_share_only_value_raises_exception_for_nonexistent_entry(self, mock_loader):
+    @patch("python_search.search.entries_loader.EntriesLoader.load_serialized_entries")
+    def test_share_only_value_raises_exception_for_nonexistent_entry(self, mock_load_entries):
         """
         Validates that share_only_value properly handles missing entries.
 
@@ -128,7 +128,7 @@ class TestShareEntry:
         - Key resolution logic changes behavior for missing keys
         """
         # Setup: Create empty entries configuration
-        mock_loader.return_value.load_entries.return_value = {}
+        mock_load_entries.return_value = {}
         share_entry = ShareEntry()
 
         # Perform & Assert: Verify exception is raised for missing entry
@@ -0,0 +1,88 @@
+import json
+import threading
+
+from python_search.tracing import Span, Tracer
+
+
+def test_spans_nest_and_are_exported_as_chrome_trace(tmp_path):
+    tracer = Tracer(enabled=True)
+
+    with tracer.span("query_logic.search", query="git"):
+        with tracer.span("query_logic.backend", backend="string"):
+            pass
+        with tracer.span("query_logic.backend", backend="bm25"):
+            pass
+
+    # spans are saved when they end, the inner ones first
+    assert [(name, depth) for name, _, _, _, depth, _ in tracer.spans] == [
+        ("query_logic.backend", 1),
+        ("query_logic.backend", 1),
+        ("query_logic.search", 0),
+    ]
+
+    location = tracer.export_chrome_trace(str(tmp_path / "trace.json"))
+    with open(location) as f:
+        events = json.load(f)["traceEvents"]
+
+    search = events[2]
+    assert search["ph"] == "X"
+    assert search["args"] == {"query": "git", "depth": 0}
+    for backend in events[:2]:
+        # children are contained in the parent span
+        assert search["ts"] <= backend["ts"]
+        assert backend["ts"] + backend["dur"] <= search["ts"] + search["dur"]
+
+
+def test_depth_is_tracked_per_thread():
+    tracer = Tracer(enabled=True)
+
+    def search():
+        with tracer.span("query_logic.backend"):
+            pass
+
+    with tracer.span("term_ui.render"):
+        thread = threading.Thread(target=search)
+        thread.start()
+        thread.join()
+
+    depths = {name: depth for name, _, _, _, depth, _ in tracer.spans}
+    assert depths == {"query_logic.backend": 0, "term_ui.render": 0}
+
+
+def test_ring_buffer_keeps_the_latest_spans():
+    tracer = Tracer(enabled=True, capacity=3)
+
+    for i in range(5):
+        with tracer.span(f"span {i}"):
+            pass
+
+    assert [span[0] for span in tracer.spans] == ["span 2", "span 3", "span 4"]
+
+
+def test_traced_follows_the_enabled_flag():
+    tracer = Tracer()
+
+    @tracer.traced("entry_runner.run")
+    def run(key):
+        return key
+
+    assert run("a") == "a"
+    assert not tracer.spans
+
+    tracer.enable()
+    assert run("b") == "b"
+    assert [span[0] for span in tracer.spans] == ["entry_runner.run"]
+
+
+def test_disabled_tracing_allocates_and_records_nothing():
+    tracer = Tracer()
+
+    spans = [tracer.span("term_ui.process_chars", query=str(i)) for i in range(1000)]
+    with tracer.span("term_ui.render") as span:
+        pass
+
+    # every span is the same shared no op object, the timing is in tests/benchmarks/tracing_benchmark.py
+    assert all(other is spans[0] for other in spans)
+    assert not isinstance(span, Span)
+    assert not tracer.spans
+    assert not hasattr(tracer._local, "depth")